@@ -3,36 +3,113 @@ Story Builder App - Flask Backend
 Main application entry point
 Phase 2.1: AI Summary-Based World Building
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from pathlib import Path
+import hashlib
 import json
+import os
+import tempfile
 
 # FIXED IMPORTS - removed 'backend.' prefix
 from modules.ai_integration.ollama_client import OllamaClient
+from modules.ai_integration.context_renderer import ContextRenderer, DETAIL_LEVELS, SECTION_LAYOUT
 from modules.world_builder.project_manager import ProjectManager
 from modules.world_builder.world_builder import WorldBuilder
 from modules.world_builder.world_extractor import WorldExtractor
 from modules.consistency.validator import ConsistencyValidator
 from modules.story_engine import ArcManager, ArcExtractor
+from modules.storage import (
+    ENTITY_LISTS, SnapshotStore, content_hash, create_storage, export_archive, file_signature,
+    import_archive, set_default_format
+)
+from modules.retrieval import EmbeddingIndex, SEARCH_TYPES, SearchIndex, WorldIndex
 
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
+CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}, expose_headers=['ETag'])
 
 # ADDED: Setup projects directory
 PROJECTS_DIR = Path(__file__).parent.parent / 'projects'
 PROJECTS_DIR.mkdir(exist_ok=True)
 
+# Storage backend shared by every manager: 'json' (default) or 'sqlite'
+STORAGE_BACKEND = os.environ.get('STORY_STORAGE_BACKEND', 'json')
+# On-disk document format: 'compact' (default), 'pretty' or 'msgpack'
+set_default_format(os.environ.get('STORY_FILE_FORMAT', 'compact'))
+storage = create_storage(STORAGE_BACKEND, PROJECTS_DIR)
+# Reclaim space from deleted projects whose undo window has passed
+storage.trash.start_collector()
+
 # Initialize managers
 ollama = OllamaClient()
-project_manager = ProjectManager()
-world_builder = WorldBuilder(PROJECTS_DIR)
-world_extractor = WorldExtractor(ollama)
-consistency_validator = ConsistencyValidator()
+project_manager = ProjectManager(storage.metadata, storage.catalogue, storage.trash)
+world_builder = WorldBuilder(PROJECTS_DIR, storage)
+world_extractor = WorldExtractor(ollama, storage)
+context_renderer = ContextRenderer(storage)
+world_index = WorldIndex(storage)
+search_index = SearchIndex(storage)
+# Vectors are cached by content hash, shared by every project
+embedding_index = EmbeddingIndex(storage, ollama, PROJECTS_DIR / '.embeddings')
+consistency_validator = ConsistencyValidator(storage)
+snapshots = SnapshotStore(storage)
 
-arc_manager = ArcManager(PROJECTS_DIR)
+arc_manager = ArcManager(PROJECTS_DIR, storage)
 arc_extractor = ArcExtractor()
 
+WORLD_SCHEMAS_PATH = Path(__file__).parent / 'world_schemas.json'
+ARC_SCHEMAS_PATH = Path(__file__).parent / 'arc_schemas.json'
+
+# ============================================================================
+# CONDITIONAL REQUESTS
+# ============================================================================
+# ETags are built from storage version tokens (file stats, journal offsets,
+# change counters), so checking one never reads or serialises the document.
+
+def make_etag(*parts):
+    """Strong ETag for a response identified by version tokens, or None if any is missing"""
+    if any(part is None for part in parts):
+        return None
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def section_etag(project_id, section):
+    """ETag for one world section"""
+    return make_etag('world', project_id, section, storage.section_version(project_id, section))
+
+
+def not_modified(etag):
+    """A 304 response if the client already holds this ETag, otherwise None"""
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def with_etag(response, etag):
+    """Tag a GET response; no-cache makes browsers revalidate with If-None-Match"""
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def precondition_failed(etag):
+    """A 412 response if the request's If-Match doesn't match the current ETag, otherwise None"""
+    if not request.if_match:
+        return None
+    if etag is not None and request.if_match.contains(etag):
+        return None
+    response = jsonify({
+        'success': False,
+        'error': 'Resource was modified since it was read (If-Match failed)'
+    })
+    response.status_code = 412
+    if etag is not None:
+        response.set_etag(etag)
+    return response
+
 # ============================================================================
 # AI ENDPOINTS
 # ============================================================================
@@ -82,9 +159,35 @@ def ai_chat():
 
 @app.route('/api/projects', methods=['GET'])
 def list_projects():
-    """List all projects"""
-    result = project_manager.list_projects(PROJECTS_DIR)
-    return jsonify(result)
+    """
+    List projects (newest first by default)
+    Query (all optional; without any, every project is returned):
+        q - search titles and genres
+        genre - exact genre
+        sort - lastModified, created or title
+        order - asc or desc
+        cursor - next_cursor from the previous page
+        limit - page size
+        refresh - re-check every project's metadata file
+    """
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'limit must be a positive integer'
+        }), 400
+    
+    result = project_manager.list_projects(
+        PROJECTS_DIR,
+        search=request.args.get('q'),
+        genre=request.args.get('genre'),
+        sort=request.args.get('sort', 'lastModified'),
+        order=request.args.get('order'),
+        cursor=request.args.get('cursor'),
+        limit=limit,
+        refresh=request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    )
+    return jsonify(result), 200 if result['success'] else 400
 
 @app.route('/api/projects', methods=['POST'])
 def create_project():
@@ -130,24 +233,226 @@ def load_project(project_id):
 @app.route('/api/projects/<project_id>', methods=['DELETE'])
 def delete_project(project_id):
     """Delete a project"""
-    result = project_manager.delete_project(PROJECTS_DIR, project_id)
+    # Hold the project exclusively so no in-flight request or compaction
+    # writes into it, and drop buffered state so nothing recreates its files
+    with storage.locks.write(project_id):
+        storage.forget(project_id)
+        arc_manager.forget_project(project_id)
+        context_renderer.forget(project_id)
+        world_index.forget(project_id)
+        search_index.forget(project_id)
+        embedding_index.forget(project_id)
+        consistency_validator.forget(project_id)
+        result = project_manager.delete_project(PROJECTS_DIR, project_id)
+    return jsonify(result), 200 if result['success'] else 404
+
+@app.route('/api/projects/trash', methods=['GET'])
+def list_deleted_projects():
+    """List deleted projects that can still be restored"""
+    return jsonify({
+        'success': True,
+        'projects': project_manager.list_trash(PROJECTS_DIR)
+    })
+
+@app.route('/api/projects/trash/<trash_id>/restore', methods=['POST'])
+def restore_deleted_project(trash_id):
+    """Undo a project deletion"""
+    project_id = trash_id.rpartition('~')[0]
+    with storage.locks.write(project_id):
+        storage.forget(project_id)
+        result = project_manager.restore_project(PROJECTS_DIR, trash_id)
+    
+    if result['success']:
+        return jsonify(result)
+    return jsonify(result), 409 if result.get('conflict') else 404
+
+@app.route('/api/projects/trash/<trash_id>', methods=['DELETE'])
+def purge_deleted_project(trash_id):
+    """Permanently delete a project from the trash"""
+    result = project_manager.purge_project(PROJECTS_DIR, trash_id)
     return jsonify(result), 200 if result['success'] else 404
 
+@app.route('/api/projects/<project_id>/export', methods=['GET'])
+def export_project(project_id):
+    """Download the whole project as a .tar.gz archive"""
+    if not storage.project_exists(project_id):
+        return jsonify({"success": False, "error": "Project not found"}), 404
+    
+    # Spool to disk rather than memory; the project's read lock is only
+    # held while the archive is built, not while a slow client downloads it
+    spool = tempfile.TemporaryFile()
+    try:
+        export_archive(storage, project_id, spool)
+    except FileNotFoundError:
+        spool.close()
+        return jsonify({"success": False, "error": "Project not found"}), 404
+    except Exception as e:
+        spool.close()
+        return jsonify({
+            'success': False,
+            'error': f'Failed to export project: {str(e)}'
+        }), 500
+    
+    spool.seek(0)
+    return send_file(
+        spool,
+        mimetype='application/gzip',
+        as_attachment=True,
+        download_name=f'{project_id}.tar.gz',
+        max_age=0
+    )
+
+@app.route('/api/projects/import', methods=['POST'])
+def import_project():
+    """
+    Create a project from an exported archive
+    Body: the .tar.gz itself, or a multipart form with it as "archive"
+    The project keeps its original id unless that id is taken
+    """
+    upload = request.files.get('archive')
+    stream = upload.stream if upload is not None else request.stream
+    
+    result = import_archive(storage, stream, project_manager.generate_project_id)
+    return jsonify(result), 201 if result['success'] else 400
+
 # ADDED: World building endpoints
 @app.route('/api/projects/<project_id>/world/<section>', methods=['GET'])
 def get_world_section(project_id, section):
-    """Get specific world section"""
+    """Get specific world section (supports If-None-Match)"""
+    etag = section_etag(project_id, section) if section in world_builder.VALID_SECTIONS else None
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
     result = world_builder.get_section(PROJECTS_DIR, project_id, section)
     if result:
-        return jsonify(result)
+        return with_etag(jsonify(result), etag if result.get('success') else None)
     return jsonify({'error': f'Section {section} not found'}), 404
 
 @app.route('/api/projects/<project_id>/world/<section>', methods=['PUT'])
 def update_world_section(project_id, section):
-    """Update world section"""
+    """Update world section (If-Match gives optimistic concurrency)"""
     data = request.json
-    result = world_builder.update_section(PROJECTS_DIR, project_id, section, data)
-    return jsonify(result), 200 if result['success'] else 400
+    with storage.locks.write(project_id):
+        failed = precondition_failed(section_etag(project_id, section))
+        if failed:
+            return failed
+        result = world_builder.update_section(PROJECTS_DIR, project_id, section, data)
+        etag = section_etag(project_id, section) if result['success'] else None
+    
+    response = jsonify(result)
+    if etag is not None:
+        response.set_etag(etag)
+    return response, 200 if result['success'] else 400
+
+@app.route('/api/projects/<project_id>/world/<section>', methods=['PATCH'])
+def patch_world_section(project_id, section):
+    """
+    Partially update a world section: a JSON Patch list, {entities, delete}
+    merge patches keyed by id, or a merge patch of the whole section
+    """
+    patch = request.get_json(silent=True)
+    if patch is None:
+        return jsonify({'success': False, 'error': 'Request body must be JSON'}), 400
+    
+    with storage.locks.write(project_id):
+        failed = precondition_failed(section_etag(project_id, section))
+        if failed:
+            return failed
+        result = world_builder.patch_section(PROJECTS_DIR, project_id, section, patch)
+        etag = section_etag(project_id, section) if result['success'] else None
+    
+    response = jsonify(result)
+    if etag is not None:
+        response.set_etag(etag)
+    if result['success']:
+        return response, 200
+    return response, 409 if result.get('conflict') else 400
+
+# ============================================================================
+# WORLD ENTITY ENDPOINTS
+# ============================================================================
+# Single entities of list sections (characters, locations, npcs, ...) by id.
+# Collection routes take batches: POST {"entities": [...]}, PATCH
+# {"entities": [...]} and DELETE {"ids": [...]}.
+
+def entity_status(result, success_status=200):
+    """HTTP status for an entity result: 409 duplicate id, 404 unknown id, 400 other errors"""
+    if result['success']:
+        return success_status
+    if result.get('conflict'):
+        return 409
+    if result.get('missing'):
+        return 404
+    return 400
+
+
+def entity_with_id(section, entity_id, data):
+    """Request body with the id from the URL filled in"""
+    entity = dict(data or {})
+    if section in ENTITY_LISTS:
+        entity[ENTITY_LISTS[section][1]] = entity_id
+    return entity
+
+
+@app.route('/api/projects/<project_id>/world/<section>/entities/<entity_id>', methods=['GET'])
+def get_world_entity(project_id, section, entity_id):
+    """Get one entity by id (supports If-None-Match)"""
+    version = storage.section_version(project_id, section) if section in ENTITY_LISTS else None
+    etag = make_etag('entity', project_id, section, entity_id, version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    result = world_builder.get_entity(project_id, section, entity_id)
+    return with_etag(jsonify(result), etag if result['success'] else None), entity_status(result)
+
+@app.route('/api/projects/<project_id>/world/<section>/entities', methods=['POST'])
+def create_world_entities(project_id, section):
+    """
+    Add entities; ids must be unique
+    Body: an entity, or {"entities": [...]}
+    """
+    data = request.json or {}
+    entities = data['entities'] if 'entities' in data else [data]
+    result = world_builder.create_entities(PROJECTS_DIR, project_id, section, entities)
+    return jsonify(result), entity_status(result, 201)
+
+@app.route('/api/projects/<project_id>/world/<section>/entities', methods=['PATCH'])
+def update_world_entities(project_id, section):
+    """
+    Merge-patch existing entities
+    Body: {"entities": [{"id": ..., <changed fields>}, ...]}
+    """
+    data = request.json or {}
+    result = world_builder.update_entities(PROJECTS_DIR, project_id, section, data.get('entities', []))
+    return jsonify(result), entity_status(result)
+
+@app.route('/api/projects/<project_id>/world/<section>/entities', methods=['DELETE'])
+def delete_world_entities(project_id, section):
+    """
+    Delete entities
+    Body: {"ids": [...]}
+    """
+    data = request.json or {}
+    result = world_builder.delete_entities(PROJECTS_DIR, project_id, section, data.get('ids', []))
+    return jsonify(result), entity_status(result)
+
+@app.route('/api/projects/<project_id>/world/<section>/entities/<entity_id>', methods=['PUT', 'PATCH'])
+def update_world_entity(project_id, section, entity_id):
+    """Replace (PUT) or merge-patch (PATCH) one entity"""
+    entity = entity_with_id(section, entity_id, request.json)
+    result = world_builder.update_entities(
+        PROJECTS_DIR, project_id, section, [entity],
+        merge=request.method == 'PATCH'
+    )
+    return jsonify(result), entity_status(result)
+
+@app.route('/api/projects/<project_id>/world/<section>/entities/<entity_id>', methods=['DELETE'])
+def delete_world_entity(project_id, section, entity_id):
+    """Delete one entity"""
+    result = world_builder.delete_entities(PROJECTS_DIR, project_id, section, [entity_id])
+    return jsonify(result), entity_status(result)
 
 # ADDED: Consistency check endpoint
 @app.route('/api/projects/<project_id>/consistency/check', methods=['POST'])
@@ -165,12 +470,15 @@ def check_consistency(project_id):
 @app.route('/api/world/schemas', methods=['GET'])
 def get_world_schemas():
     """Get world building JSON schemas for AI reference"""
-    schemas_path = Path(__file__).parent / 'world_schemas.json'
+    etag = make_etag('schema', 'world', file_signature(WORLD_SCHEMAS_PATH))
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
     try:
-        with open(schemas_path, 'r', encoding='utf-8') as f:
+        with open(WORLD_SCHEMAS_PATH, 'r', encoding='utf-8') as f:
             schemas = json.load(f)
-        return jsonify(schemas)
+        return with_etag(jsonify(schemas), etag)
     except FileNotFoundError:
         return jsonify({'error': 'Schemas file not found'}), 404
     except json.JSONDecodeError:
@@ -203,6 +511,9 @@ def build_world_from_summary(project_id):
             'error': 'Schemas are required'
         }), 400
     
+    # Extraction overwrites sections wholesale: keep a restore point
+    snapshots.snapshot(project_id, reason='build-from-summary')
+    
     # Extract from AI summary
     result = world_extractor.extract_from_ai_summary(
         projects_dir=PROJECTS_DIR,
@@ -224,18 +535,21 @@ def build_world_from_summary(project_id):
 def get_arc_schemas():
     """Get arc schema templates"""
     try:
-        schema_path = Path(__file__).parent / 'arc_schemas.json'
-        
-        if not schema_path.exists():
+        if not ARC_SCHEMAS_PATH.exists():
             return jsonify({
                 'success': False,
                 'error': 'Arc schemas file not found'
             }), 404
         
-        with open(schema_path, 'r', encoding='utf-8') as f:
+        etag = make_etag('schema', 'arc', file_signature(ARC_SCHEMAS_PATH))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        with open(ARC_SCHEMAS_PATH, 'r', encoding='utf-8') as f:
             schemas = json.load(f)
         
-        return jsonify(schemas)
+        return with_etag(jsonify(schemas), etag)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -243,16 +557,58 @@ def get_arc_schemas():
         }), 500
 
 
+ARC_QUERY_PARAMS = ('status', 'season', 'character', 'location', 'fields', 'cursor', 'limit')
+
+
 @app.route('/api/projects/<project_id>/arcs', methods=['GET'])
 def get_project_arcs(project_id):
-    """Get all arcs for a project (from all seasons)"""
+    """
+    Get arcs for a project (from all seasons)
+    Query (all optional; without any, every arc is returned in full):
+        status, season, character, location - filters
+        fields - comma-separated top-level fields, e.g. id,title,episodes
+        cursor - next_cursor from the previous page
+        limit - page size
+    Supports If-None-Match.
+    """
     try:
-        arcs_data = arc_manager.load_all_arcs(project_id)
-        return jsonify({
-            'success': True,
-            'arcs': arcs_data.get('arcs', []),
-            'metadata': arcs_data.get('metadata', {})
-        })
+        etag = make_etag('arcs', project_id, storage.arcs_version(project_id), request.query_string)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        if not any(param in request.args for param in ARC_QUERY_PARAMS):
+            arcs_data = arc_manager.load_all_arcs(project_id)
+            return with_etag(jsonify({
+                'success': True,
+                'arcs': arcs_data.get('arcs', []),
+                'metadata': arcs_data.get('metadata', {})
+            }), etag)
+        
+        filters = {
+            name: request.args[name]
+            for name in ('status', 'season', 'character', 'location')
+            if name in request.args
+        }
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a positive integer'
+            }), 400
+        
+        result = arc_manager.query_arcs(
+            project_id,
+            filters=filters,
+            fields=fields,
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+        
+        if not result['success']:
+            return jsonify(result), 400
+        return with_etag(jsonify(result), etag)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -260,14 +616,20 @@ def get_project_arcs(project_id):
         }), 500
 
 
+def arc_etag(arc):
+    """ETag for a single arc, from its content"""
+    return make_etag('arc', content_hash(arc))
+
+
 @app.route('/api/projects/<project_id>/arcs/<arc_id>', methods=['GET'])
 def get_project_arc(project_id, arc_id):
-    """Get a specific arc"""
+    """Get a specific arc (supports If-None-Match)"""
     try:
         result = arc_manager.get_arc(project_id, arc_id)
         
         if result['success']:
-            return jsonify(result)
+            etag = arc_etag(result['arc'])
+            return not_modified(etag) or with_etag(jsonify(result), etag)
         else:
             return jsonify(result), 404
     except Exception as e:
@@ -294,7 +656,7 @@ def create_arc(project_id):
         if result['success']:
             return jsonify(result), 201
         else:
-            return jsonify(result), 400
+            return jsonify(result), 409 if result.get('conflict') else 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -304,7 +666,7 @@ def create_arc(project_id):
 
 @app.route('/api/projects/<project_id>/arcs/<arc_id>', methods=['PUT'])
 def update_arc(project_id, arc_id):
-    """Update an existing arc"""
+    """Update an existing arc (If-Match gives optimistic concurrency)"""
     try:
         arc_data = request.json
         
@@ -314,12 +676,20 @@ def update_arc(project_id, arc_id):
                 'error': 'No arc data provided'
             }), 400
         
-        result = arc_manager.update_arc(project_id, arc_id, arc_data)
+        with storage.locks.write(project_id):
+            if request.if_match:
+                current = storage.get_arc(project_id, arc_id)
+                failed = precondition_failed(arc_etag(current) if current is not None else None)
+                if failed:
+                    return failed
+            result = arc_manager.update_arc(project_id, arc_id, arc_data)
         
         if result['success']:
-            return jsonify(result)
+            response = jsonify(result)
+            response.set_etag(arc_etag(result['arc']))
+            return response
         else:
-            return jsonify(result), 404
+            return jsonify(result), 409 if result.get('conflict') else 404
     except Exception as e:
         return jsonify({
             'success': False,
@@ -373,41 +743,33 @@ def build_arcs_from_summary(project_id):
         if not extraction_result['success']:
             return jsonify(extraction_result), 400
         
-        # Save arcs by season using the new system
-        added_arcs = []
-        skipped_arcs = []
-        
-        # Check for existing arcs across all seasons
-        all_existing_arcs = arc_manager.load_all_arcs(project_id)
-        existing_ids = [a['id'] for a in all_existing_arcs['arcs']]
+        snapshots.snapshot(project_id, reason='build-from-summary')
         
-        for arc in extraction_result['arcs']:
-            if arc['id'] in existing_ids:
-                skipped_arcs.append(arc['id'])
-                continue
-            added_arcs.append(arc['id'])
+        # Only create arcs that don't exist yet; existing arcs in the
+        # touched seasons are kept (one read-modify-write per season)
+        operations = [{'op': 'create', 'arc': arc} for arc in extraction_result['arcs']]
+        bulk_result = arc_manager.bulk_apply(project_id, operations)
         
-        # Filter out skipped arcs
-        arcs_to_add = [arc for arc in extraction_result['arcs'] if arc['id'] not in existing_ids]
-        
-        # Save arcs grouped by season
-        if arc_manager.save_arcs_by_season(project_id, arcs_to_add):
-            # Calculate total arcs after addition
-            updated_all_arcs = arc_manager.load_all_arcs(project_id)
-            
-            return jsonify({
-                'success': True,
-                'arcs_added': added_arcs,
-                'arcs_skipped': skipped_arcs,
-                'total_arcs': len(updated_all_arcs['arcs']),
-                'total_seasons': updated_all_arcs['metadata']['totalSeasons'],
-                'message': f"Successfully added {len(added_arcs)} arc(s) across seasons"
-            })
-        else:
+        if bulk_result['seasons_failed']:
             return jsonify({
                 'success': False,
                 'error': 'Failed to save arcs'
             }), 500
+        
+        # Arcs that already exist are reported as skipped
+        added_arcs = [r['id'] for r in bulk_result['results'] if r['success']]
+        skipped_arcs = [r['id'] for r in bulk_result['results'] if not r['success']]
+        
+        seasons = arc_manager.get_available_seasons(project_id)
+        
+        return jsonify({
+            'success': True,
+            'arcs_added': added_arcs,
+            'arcs_skipped': skipped_arcs,
+            'total_arcs': sum(s['arcCount'] for s in seasons),
+            'total_seasons': len(seasons),
+            'message': f"Successfully added {len(added_arcs)} arc(s) across seasons"
+        })
             
     except Exception as e:
         return jsonify({
@@ -416,18 +778,55 @@ def build_arcs_from_summary(project_id):
         }), 500
 
 
+@app.route('/api/projects/<project_id>/arcs/bulk', methods=['POST'])
+def bulk_arcs(project_id):
+    """
+    Apply a batch of arc changes with one write per touched season
+    Body: {
+        "operations": [
+            {"op": "create", "arc": {...}},
+            {"op": "update", "id": str, "arc": {...}},
+            {"op": "upsert", "arc": {...}},
+            {"op": "delete", "id": str}
+        ]
+    }
+    """
+    try:
+        data = request.json or {}
+        operations = data.get('operations')
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({
+                'success': False,
+                'error': 'A non-empty operations list is required'
+            }), 400
+        
+        result = arc_manager.bulk_apply(project_id, operations)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/projects/<project_id>/arcs/season/<int:season>', methods=['GET'])
 def get_arcs_by_season(project_id, season):
-    """Get all arcs for a specific season"""
+    """Get all arcs for a specific season (supports If-None-Match)"""
     try:
+        etag = make_etag('season', project_id, season, storage.arcs_version(project_id))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
         arcs = arc_manager.get_arcs_by_season(project_id, season)
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'season': season,
             'arcs': arcs,
             'count': len(arcs)
-        })
+        }), etag)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -439,39 +838,7 @@ def get_arcs_by_season(project_id, season):
 def get_available_seasons(project_id):
     """Get list of available seasons with arc counts"""
     try:
-        story_dir = PROJECTS_DIR / project_id / 'story'
-        
-        if not story_dir.exists():
-            return jsonify({
-                'success': True,
-                'seasons': []
-            })
-        
-        season_files = list(story_dir.glob('season*_arcs.json'))
-        seasons = []
-        
-        for season_file in season_files:
-            try:
-                with open(season_file, 'r', encoding='utf-8') as f:
-                    season_data = json.load(f)
-                    # Get season from metadata or filename
-                    season_num = season_data.get('metadata', {}).get('season')
-                    if not season_num:
-                        import re
-                        match = re.search(r'season(\d+)_arcs\.json', str(season_file))
-                        season_num = int(match.group(1)) if match else 1
-                    
-                    seasons.append({
-                        'season': season_num,
-                        'arcCount': len(season_data.get('arcs', [])),
-                        'lastUpdated': season_data.get('metadata', {}).get('lastUpdated')
-                    })
-            except Exception as e:
-                print(f"Error reading {season_file}: {e}")
-                continue
-        
-        # Sort by season number
-        seasons.sort(key=lambda x: x['season'])
+        seasons = arc_manager.get_available_seasons(project_id)
         
         return jsonify({
             'success': True,
@@ -484,29 +851,262 @@ def get_available_seasons(project_id):
         }), 500
 
 
+@app.route('/api/projects/<project_id>/episodes/<int:episode>', methods=['GET'])
+def get_episode_coverage(project_id, episode):
+    """
+    Get the arcs whose episode range covers an episode and the plot beats set in it
+    Query (optional): season - only arcs in this season
+    """
+    try:
+        result = arc_manager.get_episode(project_id, episode, request.args.get('season', type=int))
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/projects/<project_id>/characters/<character_id>/episodes', methods=['GET'])
+def get_character_episodes(project_id, character_id):
+    """Get the episodes and plot beats featuring a character"""
+    try:
+        result = arc_manager.get_entity_episodes(project_id, 'character', character_id)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/projects/<project_id>/locations/<location_id>/episodes', methods=['GET'])
+def get_location_episodes(project_id, location_id):
+    """Get the episodes and plot beats set at a location"""
+    try:
+        result = arc_manager.get_entity_episodes(project_id, 'location', location_id)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+WORLD_CONTEXT_SECTIONS = ('characters', 'locations', 'factions', 'religions', 'npcs', 'world_overview')
+
+
+def parse_detail(value):
+    """Parse a detail query like 'characters:full,npcs:names' into {section: level}"""
+    detail = {}
+    for part in filter(None, (value or '').split(',')):
+        section, _, level = part.partition(':')
+        if section not in SECTION_LAYOUT or level not in DETAIL_LEVELS:
+            raise ValueError(f'Invalid detail: {part} (levels: {", ".join(DETAIL_LEVELS)})')
+        detail[section] = level
+    return detail
+
+
 @app.route('/api/projects/<project_id>/world/context', methods=['GET'])
 def get_world_context(project_id):
-    """Get complete world context for arc planning"""
+    """
+    Get complete world context for arc planning (supports If-None-Match)
+    Query: format=json (default) | text; detail=section:level,... for text
+    (levels: full, brief, names, none)
+    """
     try:
+        text_format = request.args.get('format', 'json') == 'text'
+        try:
+            detail = parse_detail(request.args.get('detail')) if text_format else {}
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        sections = tuple(SECTION_LAYOUT) if text_format else WORLD_CONTEXT_SECTIONS
+        
+        # Versions are taken before the reads so a concurrent write can only make the ETag stale
+        etag = make_etag('context', project_id, text_format, sorted(detail.items()), *(
+            storage.section_version(project_id, section) or 0 for section in sections
+        ))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        if text_format:
+            return with_etag(jsonify({
+                'success': True,
+                'format': 'text',
+                'context': context_renderer.render(project_id, detail)
+            }), etag)
+        
         context = {
-            'characters': world_builder.load_world_section(project_id, 'characters'),
-            'locations': world_builder.load_world_section(project_id, 'locations'),
-            'factions': world_builder.load_world_section(project_id, 'factions'),
-            'religions': world_builder.load_world_section(project_id, 'religions'),
-            'npcs': world_builder.load_world_section(project_id, 'npcs'),
-            'world_overview': world_builder.load_world_section(project_id, 'world_overview')
+            section: world_builder.load_world_section(project_id, section)
+            for section in WORLD_CONTEXT_SECTIONS
         }
         
-        return jsonify({
+        return with_etag(jsonify({
             'success': True,
             'context': context
-        })
+        }), etag)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/projects/<project_id>/world/retrieve', methods=['POST'])
+def retrieve_world_context(project_id):
+    """
+    Pick the world entities most relevant to a query (BM25) within a token budget
+    Body: {
+        "query": str,
+        "k": int (optional, default 8),
+        "token_budget": int (optional, default 1000),
+        "sections": [str] (optional)
+    }
+    """
+    data = request.json or {}
+    query = data.get('query', '')
+    if not query.strip():
+        return jsonify({'success': False, 'error': 'Query is required'}), 400
+    
+    try:
+        result = world_index.retrieve(
+            project_id,
+            query,
+            k=int(data.get('k', 8)),
+            token_budget=int(data.get('token_budget', 1000)),
+            sections=data.get('sections')
+        )
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/projects/<project_id>/similar', methods=['POST'])
+def similar_entities(project_id):
+    """
+    Find world entities and arcs similar in meaning to a query (Ollama embeddings)
+    Body: {
+        "query": str,
+        "k": int (optional, default 10),
+        "sources": [str] (optional: section names and/or "arcs")
+    }
+    """
+    data = request.json or {}
+    query = data.get('query', '')
+    if not query.strip():
+        return jsonify({'success': False, 'error': 'Query is required'}), 400
+    
+    try:
+        result = embedding_index.similar(
+            project_id,
+            query,
+            k=int(data.get('k', 10)),
+            sources=data.get('sources')
+        )
+        return jsonify(result), 200 if result['success'] else 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/projects/<project_id>/search', methods=['GET'])
+def search_project(project_id):
+    """
+    Full-text search across world sections, arcs and plot beats
+    Query params:
+        q - words, prefixes (wor*) and "quoted phrases"; all must match
+        type - comma-separated document types (section names, arc, beat)
+        limit - maximum results (default 20)
+    """
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'success': False, 'error': 'Query is required'}), 400
+    
+    types = [t.strip() for t in request.args.get('type', '').split(',') if t.strip()] or None
+    unknown = [t for t in types or [] if t not in SEARCH_TYPES]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown type(s): {', '.join(unknown)}. Valid types: {', '.join(SEARCH_TYPES)}"
+        }), 400
+    
+    limit = request.args.get('limit', 20, type=int)
+    if limit <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'limit must be a positive integer'
+        }), 400
+    
+    try:
+        result = search_index.search(project_id, query, types=types, limit=limit)
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ============================================================================
+# SNAPSHOT ENDPOINTS
+# ============================================================================
+
+@app.route('/api/projects/<project_id>/snapshots', methods=['GET'])
+def list_snapshots(project_id):
+    """List a project's snapshots, newest first"""
+    if not storage.project_exists(project_id):
+        return jsonify({"success": False, "error": "Project not found"}), 404
+    return jsonify({
+        'success': True,
+        'snapshots': snapshots.list_snapshots(project_id)
+    })
+
+@app.route('/api/projects/<project_id>/snapshots', methods=['POST'])
+def create_snapshot(project_id):
+    """
+    Snapshot the project's world and arcs
+    Body (optional): {"label": str}
+    Returns 200 with the latest snapshot if nothing changed since it
+    """
+    data = request.get_json(silent=True) or {}
+    result = snapshots.snapshot(project_id, label=data.get('label', ''))
+    
+    if not result['success']:
+        return jsonify(result), 404
+    return jsonify(result), 201 if result['created'] else 200
+
+@app.route('/api/projects/<project_id>/snapshots/<snapshot_id>', methods=['GET'])
+def get_snapshot(project_id, snapshot_id):
+    """Get one snapshot with its document hashes"""
+    snapshot = snapshots.get_snapshot(project_id, snapshot_id)
+    if snapshot is None:
+        return jsonify({"success": False, "error": "Snapshot not found"}), 404
+    return jsonify({'success': True, 'snapshot': snapshot})
+
+@app.route('/api/projects/<project_id>/snapshots/<snapshot_id>/diff', methods=['GET'])
+def diff_snapshot(project_id, snapshot_id):
+    """
+    Compare a snapshot with a later one
+    Query params:
+        to - snapshot id to compare with (default: the current project)
+    """
+    result = snapshots.diff(project_id, snapshot_id, request.args.get('to'))
+    return jsonify(result), 200 if result['success'] else 404
+
+@app.route('/api/projects/<project_id>/snapshots/<snapshot_id>/restore', methods=['POST'])
+def restore_snapshot(project_id, snapshot_id):
+    """Restore a snapshot; the current state is snapshotted first"""
+    try:
+        result = snapshots.restore(project_id, snapshot_id)
+        return jsonify(result), 200 if result['success'] else 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to restore snapshot: {str(e)}'
+        }), 500
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
@@ -541,6 +1141,7 @@ if __name__ == '__main__':
     print("=" * 60)
     print(f"Backend API: http://localhost:5000")
     print(f"Projects directory: {PROJECTS_DIR}")
+    print(f"Storage backend: {STORAGE_BACKEND}")
     print("=" * 60)
     
     # Check Ollama status on startup
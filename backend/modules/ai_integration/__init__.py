@@ -2,5 +2,6 @@
 AI Integration Module
 """
 from .ollama_client import OllamaClient
+from .context_renderer import ContextRenderer, DEFAULT_DETAIL, DETAIL_LEVELS
 
-__all__ = ['OllamaClient']
\ No newline at end of file
+__all__ = ['OllamaClient', 'ContextRenderer', 'DEFAULT_DETAIL', 'DETAIL_LEVELS']
\ No newline at end of file
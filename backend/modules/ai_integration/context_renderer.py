@@ -0,0 +1,232 @@
+"""
+World Context Renderer
+Renders world sections as compact text for LLM prompts
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..storage import content_hash
+
+
+# Detail levels, most to least verbose
+DETAIL_LEVELS = ('full', 'brief', 'names', 'none')
+
+DEFAULT_DETAIL = {
+    'world_overview': 'full',
+    'characters': 'full',
+    'locations': 'full',
+    'factions': 'brief',
+    'religions': 'brief',
+    'npcs': 'brief',
+    'glossary': 'brief',
+    'content': 'names'
+}
+
+# Section -> (heading, entity list key); world_overview is a single object
+SECTION_LAYOUT = {
+    'world_overview': ('WORLD', None),
+    'characters': ('CHARACTERS', 'characters'),
+    'locations': ('LOCATIONS', 'places'),
+    'factions': ('FACTIONS', 'factions'),
+    'religions': ('RELIGIONS', 'religions'),
+    'npcs': ('NPCS', 'npcs'),
+    'glossary': ('GLOSSARY', 'terms'),
+    'content': ('ITEMS', 'items')
+}
+
+# Fields folded into an entity's header line rather than listed
+HEADER_FIELDS = ('id', 'term', 'name', 'type', 'role', 'category')
+# Fields that describe an entity, in order of preference, for brief output
+SUMMARY_FIELDS = ('description', 'definition', 'summary')
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == '' or value == [] or value == {}
+
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    """First sentence of a text, cut at limit characters"""
+    text = ' '.join(text.split())
+    end = text.find('. ')
+    if 0 < end < limit:
+        return text[:end + 1]
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def _render_value(value: Any) -> str:
+    """Inline rendering of a field value"""
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, list):
+        return '; '.join(_render_value(v) for v in value if not _is_empty(v))
+    if isinstance(value, dict):
+        return _render_ref(value)
+    return str(value)
+
+
+def _render_ref(value: Dict) -> str:
+    """
+    Render a nested object such as a relationship or skill:
+    'target (value, ...): description'
+
+    The target is the first *id field, else the name; text values are
+    listed bare and numbers keep their key.
+    """
+    head = next((k for k in value if k == 'id' or k.endswith('_id')), None)
+    if head is None and not _is_empty(value.get('name')):
+        head = 'name'
+    text = next((k for k in SUMMARY_FIELDS if not _is_empty(value.get(k))), None)
+    rest = [
+        _render_value(v) if isinstance(v, str) else f'{k}={_render_value(v)}'
+        for k, v in value.items()
+        if k not in (head, text) and not _is_empty(v)
+    ]
+
+    out = _render_value(value[head]) if head else ''
+    if rest:
+        out = f"{out} ({', '.join(rest)})" if out else ', '.join(rest)
+    if text:
+        out = f'{out}: {_render_value(value[text])}' if out else _render_value(value[text])
+    return out
+
+
+def render_entity(entity: Dict, level: str = 'full') -> str:
+    """One line: 'id: Name (type) | field: value | ...'"""
+    ident = entity.get('id') or entity.get('term')
+    name = entity.get('name') if entity.get('name') != ident else None
+    header = ': '.join(_render_value(v) for v in (ident, name) if not _is_empty(v))
+    if level == 'names':
+        return header
+
+    kinds = [_render_value(entity[k]) for k in ('type', 'role', 'category') if not _is_empty(entity.get(k))]
+    if kinds:
+        header = f"{header} ({', '.join(kinds)})"
+
+    if level == 'brief':
+        text = next((entity[k] for k in SUMMARY_FIELDS if isinstance(entity.get(k), str) and entity[k]), None)
+        return f'{header} | {_first_sentence(text)}' if text else header
+
+    fields = [
+        f'{k}: {_render_value(v)}'
+        for k, v in entity.items()
+        if k not in HEADER_FIELDS and not _is_empty(v)
+    ]
+    return ' | '.join([header] + fields)
+
+
+class ContextRenderer:
+    """
+    Turns world sections into dense text: one line per entity, empty fields
+    dropped, no JSON punctuation
+
+    Each section renders at a detail level:
+        full   - every non-empty field
+        brief  - header plus the first sentence of its description
+        names  - id and name only
+        none   - left out
+
+    Rendered sections are cached by a hash of their content. The storage
+    version token is checked first, so an unchanged section costs one stat
+    or counter lookup; when it changes the section is re-read and hashed,
+    and only re-rendered if the content actually differs.
+    """
+
+    MAX_CACHED = 512
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._hashes: Dict[Tuple[str, str], Tuple[Any, str]] = {}
+        self._rendered: 'OrderedDict[Tuple[str, str, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, project_id: str, detail: Optional[Dict[str, str]] = None) -> str:
+        """
+        Render every world section
+
+        Args:
+            project_id: Project ID
+            detail: Per-section detail levels overriding DEFAULT_DETAIL
+        """
+        levels = dict(DEFAULT_DETAIL, **(detail or {}))
+        blocks = [
+            self.render_section(project_id, section, levels.get(section, 'brief'))
+            for section in SECTION_LAYOUT
+        ]
+        return '\n\n'.join(block for block in blocks if block)
+
+    def render_section(self, project_id: str, section: str, level: str = 'full') -> str:
+        """Render one section at a detail level ('' if missing, empty or 'none')"""
+        if level not in DETAIL_LEVELS:
+            raise ValueError(f'Unknown detail level: {level}')
+        if level == 'none' or section not in SECTION_LAYOUT:
+            return ''
+
+        key = (project_id, section)
+        # Version first: a concurrent write can then only cause a needless re-hash
+        version = self.storage.section_version(project_id, section)
+        if version is None:
+            return ''
+
+        with self._lock:
+            known = self._hashes.get(key)
+            digest = known[1] if known and known[0] == version else None
+            if digest is not None and (section, level, digest) in self._rendered:
+                self._rendered.move_to_end((section, level, digest))
+                return self._rendered[(section, level, digest)]
+
+        data = self.storage.read_section(project_id, section) or {}
+        if digest is None:
+            digest = content_hash(data)
+            with self._lock:
+                self._hashes[key] = (version, digest)
+
+        with self._lock:
+            text = self._rendered.get((section, level, digest))
+        if text is None:
+            text = self._render(section, data, level)
+
+        with self._lock:
+            self._rendered[(section, level, digest)] = text
+            self._rendered.move_to_end((section, level, digest))
+            while len(self._rendered) > self.MAX_CACHED:
+                self._rendered.popitem(last=False)
+        return text
+
+    def forget(self, project_id: str):
+        """Drop a project's version -> hash entries (rendered text is shared by hash)"""
+        with self._lock:
+            for key in [k for k in self._hashes if k[0] == project_id]:
+                del self._hashes[key]
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _render(self, section: str, data: Dict, level: str) -> str:
+        heading, list_key = SECTION_LAYOUT[section]
+        if list_key is None:
+            lines = self._render_object(data, level)
+        else:
+            lines = [
+                render_entity(entity, level)
+                for entity in data.get(list_key, [])
+                if isinstance(entity, dict)
+            ]
+        lines = [line for line in lines if line]
+        if not lines:
+            return ''
+        return f'{heading}:\n' + '\n'.join(lines)
+
+    def _render_object(self, data: Dict, level: str) -> List[str]:
+        """Lines for a single-object section such as world_overview"""
+        if level == 'names':
+            return [_render_value(data['name'])] if not _is_empty(data.get('name')) else []
+
+        fields = [(k, v) for k, v in data.items() if not _is_empty(v)]
+        if level == 'brief':
+            fields = [(k, v) for k, v in fields if k == 'name' or k in SUMMARY_FIELDS]
+        return [f'{k}: {_render_value(v)}' for k, v in fields]
@@ -11,6 +11,7 @@ class OllamaClient:
     def __init__(self, base_url: str = "http://localhost:11434"):
         self.base_url = base_url
         self.default_model = "llama3.2"
+        self.default_embed_model = "nomic-embed-text"
         
     def check_status(self) -> Dict:
         """
@@ -164,4 +165,51 @@ class OllamaClient:
                 "success": False,
                 "response": "",
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    def embed(self,
+              texts: List[str],
+              model: Optional[str] = None,
+              batch_size: int = 32) -> Dict:
+        """
+        Get embedding vectors, sending texts in batches
+        
+        Args:
+            texts: Texts to embed
+            model: Embedding model name (defaults to nomic-embed-text)
+            batch_size: Texts per request
+            
+        Returns: {"success": bool, "embeddings": List[List[float]], "error": str or None}
+        """
+        if model is None:
+            model = self.default_embed_model
+        
+        embeddings = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                response = requests.post(
+                    f"{self.base_url}/api/embed",
+                    json={"model": model, "input": batch},
+                    timeout=120
+                )
+                
+                if response.status_code != 200:
+                    return {
+                        "success": False,
+                        "embeddings": [],
+                        "error": f"HTTP {response.status_code}: {response.text}"
+                    }
+                
+                vectors = response.json().get("embeddings", [])
+                if len(vectors) != len(batch):
+                    return {
+                        "success": False,
+                        "embeddings": [],
+                        "error": f"Expected {len(batch)} embeddings, got {len(vectors)}"
+                    }
+                embeddings.extend(vectors)
+            
+            return {"success": True, "embeddings": embeddings, "error": None}
+        except Exception as e:
+            return {"success": False, "embeddings": [], "error": str(e)}
@@ -0,0 +1,281 @@
+"""
+Episode Timeline Module
+Episode-level checks over a project's arcs: ranges, beats, chains and whereabouts
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+
+def _as_int(value) -> Optional[int]:
+    """Episode/season numbers may be stored as strings; None if not a number"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EpisodeTimeline:
+    """
+    Arcs laid out per season by episode range
+
+    Interval checks sort each season's ranges once and sweep them with a
+    heap of the ranges still open, so overlaps and gaps cost
+    O(n log n + overlaps) rather than comparing every pair of arcs. Chain
+    checks walk previousArc/nextArc links once (O(V + E)), and location
+    conflicts are found with one dict keyed by (season, episode, character).
+    """
+
+    def __init__(self, seasons: Dict[int, List[Dict]]):
+        """
+        Args:
+            seasons: {season: [arcs]}
+        """
+        self.seasons = seasons
+        self.arcs: Dict[str, Dict] = {}
+        for arcs in seasons.values():
+            for arc in arcs:
+                if isinstance(arc, dict) and isinstance(arc.get('id'), str):
+                    self.arcs.setdefault(arc['id'], arc)
+
+    def check(self) -> Dict:
+        """Run every timeline check; returns warnings and suggestions"""
+        warnings = []
+        suggestions = []
+
+        for season in sorted(self.seasons):
+            ranges = self._ranges(season, warnings, suggestions)
+            self._check_ranges(season, ranges, warnings)
+            self._check_beats(season, ranges, warnings)
+            self._check_whereabouts(season, warnings)
+        self._check_chains(warnings)
+
+        return {'warnings': warnings, 'suggestions': suggestions}
+
+    # ------------------------------------------------------------------
+    # Episode ranges
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def episode_range(arc: Dict) -> Optional[Tuple[int, int]]:
+        """(start, end) from episodes.start/end, or else the episode list"""
+        episodes = arc.get('episodes') or {}
+        if not isinstance(episodes, dict):
+            return None
+        start, end = _as_int(episodes.get('start')), _as_int(episodes.get('end'))
+        if start is None or end is None:
+            listed = [e for e in (_as_int(e) for e in episodes.get('list') or []) if e is not None]
+            if not listed:
+                return None
+            start, end = min(listed), max(listed)
+        return start, end
+
+    def _ranges(self, season: int, warnings: List, suggestions: List) -> Dict[str, Tuple[int, int]]:
+        """Valid episode ranges of a season's arcs by arc id, reporting the rest"""
+        ranges = {}
+        for arc in self.seasons[season]:
+            if not isinstance(arc, dict) or not isinstance(arc.get('id'), str):
+                continue
+            span = self.episode_range(arc)
+            if span is None:
+                suggestions.append({
+                    'type': 'arc_without_episodes',
+                    'message': f'{self._label(arc)} has no episode range',
+                    'path': f"arcs/{arc['id']}/episodes",
+                    'suggestion': 'Set episodes.start and episodes.end'
+                })
+            elif span[0] > span[1]:
+                warnings.append({
+                    'type': 'invalid_episode_range',
+                    'severity': 'high',
+                    'message': f'{self._label(arc)} ends (episode {span[1]}) before it starts (episode {span[0]})',
+                    'path': f"arcs/{arc['id']}/episodes",
+                    'suggestion': 'Swap or correct episodes.start and episodes.end'
+                })
+            else:
+                ranges[arc['id']] = span
+        return ranges
+
+    def _check_ranges(self, season: int, ranges: Dict[str, Tuple[int, int]], warnings: List):
+        """Sweep a season's ranges in start order for overlaps and gaps"""
+        open_ranges: List[Tuple[int, str]] = []   # heap of (end, arc id)
+        covered_to = None
+
+        for start, end, arc_id in sorted((s, e, a) for a, (s, e) in ranges.items()):
+            while open_ranges and open_ranges[0][0] < start:
+                heapq.heappop(open_ranges)
+
+            for other_end, other_id in open_ranges:
+                warnings.append({
+                    'type': 'overlapping_arcs',
+                    'severity': 'medium',
+                    'message': (
+                        f'Season {season}: {self._label(self.arcs[other_id])} and '
+                        f'{self._label(self.arcs[arc_id])} both cover episodes {start}-{min(end, other_end)}'
+                    ),
+                    'path': f'arcs/{arc_id}/episodes',
+                    'arcs': [other_id, arc_id],
+                    'suggestion': 'Adjust the episode ranges, unless the arcs are meant to run in parallel'
+                })
+
+            if covered_to is not None and start > covered_to + 1:
+                warnings.append({
+                    'type': 'episode_gap',
+                    'severity': 'low',
+                    'message': f'Season {season}: no arc covers episodes {covered_to + 1}-{start - 1}',
+                    'path': f'arcs/{arc_id}/episodes',
+                    'suggestion': 'Extend a neighbouring arc or add an arc for these episodes'
+                })
+
+            covered_to = end if covered_to is None else max(covered_to, end)
+            heapq.heappush(open_ranges, (end, arc_id))
+
+    # ------------------------------------------------------------------
+    # Plot beats
+    # ------------------------------------------------------------------
+
+    def _beats(self, season: int):
+        """Yield (arc, position, beat, episode) for the season's beats with an episode"""
+        for arc in self.seasons[season]:
+            if not isinstance(arc, dict) or not isinstance(arc.get('id'), str):
+                continue
+            for position, beat in enumerate(arc.get('plotBeats') or []):
+                if isinstance(beat, dict):
+                    episode = _as_int(beat.get('episode'))
+                    if episode is not None:
+                        yield arc, position, beat, episode
+
+    def _check_beats(self, season: int, ranges: Dict[str, Tuple[int, int]], warnings: List):
+        """Plot beats must fall inside their arc's episode range"""
+        for arc, position, beat, episode in self._beats(season):
+            span = ranges.get(arc['id'])
+            if span is not None and not span[0] <= episode <= span[1]:
+                warnings.append({
+                    'type': 'beat_outside_arc',
+                    'severity': 'medium',
+                    'message': (
+                        f'{self._label(arc)} has a plot beat in episode {episode}, '
+                        f'outside its episodes {span[0]}-{span[1]}'
+                    ),
+                    'path': f"arcs/{arc['id']}/plotBeats/{position}/episode",
+                    'suggestion': "Move the beat or widen the arc's episode range"
+                })
+
+    def _check_whereabouts(self, season: int, warnings: List):
+        """A character can only be at one location per episode"""
+        seen: Dict[Tuple[int, str], Tuple[str, str]] = {}
+        reported = set()
+
+        for arc, position, beat, episode in self._beats(season):
+            location = beat.get('location')
+            if not isinstance(location, str) or not location:
+                continue
+            path = f"arcs/{arc['id']}/plotBeats/{position}"
+            for character in beat.get('characters') or []:
+                if not isinstance(character, str):
+                    continue
+                first = seen.setdefault((episode, character), (location, path))
+                conflict = (episode, character, first[0], location)
+                if first[0] != location and conflict not in reported:
+                    reported.add(conflict)
+                    warnings.append({
+                        'type': 'character_location_conflict',
+                        'severity': 'high',
+                        'message': (
+                            f'Season {season}, episode {episode}: {character} is at both '
+                            f'{first[0]} and {location}'
+                        ),
+                        'path': path,
+                        'conflicts_with': first[1],
+                        'suggestion': 'Move one of the beats to another episode or location'
+                    })
+
+    # ------------------------------------------------------------------
+    # Arc chains
+    # ------------------------------------------------------------------
+
+    def _check_chains(self, warnings: List):
+        """
+        previousArc/nextArc must agree and must not loop
+
+        Links to unknown arcs are left to the reference checks.
+        """
+        successors: Dict[str, List[str]] = {}
+
+        for arc_id, arc in self.arcs.items():
+            connections = arc.get('connections') or {}
+            if not isinstance(connections, dict):
+                continue
+            next_id, previous_id = connections.get('nextArc'), connections.get('previousArc')
+
+            # Malformed links (lists, objects) are not hashable ids
+            if isinstance(next_id, str) and next_id in self.arcs:
+                successors.setdefault(arc_id, []).append(next_id)
+                back = (self.arcs[next_id].get('connections') or {}).get('previousArc')
+                if back != arc_id:
+                    warnings.append(self._broken_link(arc_id, 'nextArc', next_id, 'previousArc', back))
+
+            if isinstance(previous_id, str) and previous_id in self.arcs:
+                successors.setdefault(previous_id, []).append(arc_id)
+                forward = (self.arcs[previous_id].get('connections') or {}).get('nextArc')
+                if forward != arc_id:
+                    warnings.append(self._broken_link(arc_id, 'previousArc', previous_id, 'nextArc', forward))
+
+        for cycle in self._cycles(successors):
+            warnings.append({
+                'type': 'arc_chain_cycle',
+                'severity': 'high',
+                'message': 'Arc chain loops back on itself: ' + ' -> '.join(cycle + [cycle[0]]),
+                'path': f'arcs/{cycle[0]}/connections',
+                'arcs': cycle,
+                'suggestion': 'Break the loop by clearing one nextArc/previousArc link'
+            })
+
+    def _broken_link(self, arc_id: str, field: str, target: str, back_field: str, back) -> Dict:
+        found = f'points to {back}' if back else 'is not set'
+        return {
+            'type': 'broken_arc_chain',
+            'severity': 'medium',
+            'message': (
+                f'{self._label(self.arcs[arc_id])} has {field} {target}, '
+                f'but that arc\'s {back_field} {found}'
+            ),
+            'path': f'arcs/{arc_id}/connections/{field}',
+            'suggestion': f'Set {target}\'s {back_field} to {arc_id}, or correct this link'
+        }
+
+    @staticmethod
+    def _cycles(successors: Dict[str, List[str]]) -> List[List[str]]:
+        """Each distinct cycle once, via iterative three-colour DFS"""
+        state: Dict[str, int] = {}   # 1 = on the current path, 2 = finished
+        cycles = []
+        found = set()
+
+        for root in successors:
+            if root in state:
+                continue
+            path = [root]
+            state[root] = 1
+            stack = [iter(successors.get(root, ()))]
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(child) == 1:
+                    cycle = path[path.index(child):]
+                    # Rotate to start at the smallest id so each loop is reported once
+                    start = cycle.index(min(cycle))
+                    cycle = cycle[start:] + cycle[:start]
+                    if tuple(cycle) not in found:
+                        found.add(tuple(cycle))
+                        cycles.append(cycle)
+                elif child not in state:
+                    state[child] = 1
+                    path.append(child)
+                    stack.append(iter(successors.get(child, ())))
+        return cycles
+
+    @staticmethod
+    def _label(arc: Dict) -> str:
+        return f'Arc "{arc.get("title") or arc.get("id")}"'
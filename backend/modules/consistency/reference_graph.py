@@ -0,0 +1,262 @@
+"""
+Reference Graph Module
+Typed graph of world entities and arcs for whole-world reference checks
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+
+# Section name and list key per node kind (arcs live in seasons, not the world)
+KIND_SOURCES = {
+    'location': ('locations', 'places'),
+    'character': ('characters', 'characters'),
+    'npc': ('npcs', 'npcs'),
+    'faction': ('factions', 'factions'),
+    'religion': ('religions', 'religions'),
+    'item': ('content', 'items'),
+    'arc': ('arcs', 'arcs')
+}
+
+# "character_ids" in the schemas may name a character or an NPC
+PERSON = ('character', 'npc')
+
+# Node kind -> (field spec, kinds the value may refer to, reciprocal)
+# Specs are dotted field names; 'name[]' walks every item of a list.
+# Reciprocal edges are relationships expected to be recorded on both ends.
+REFERENCES = {
+    'character': [
+        ('relationships[].character_id', PERSON, True),
+        ('currentLocation', ('location',), False)
+    ],
+    'npc': [
+        ('location', ('location',), False)
+    ],
+    'faction': [
+        ('headquarters', ('location',), False),
+        ('relationships[].faction_id', ('faction',), True),
+        ('members[]', PERSON, False)
+    ],
+    'religion': [
+        ('temples[]', ('location',), False),
+        ('relationships[].religion_id', ('religion',), True)
+    ],
+    'arc': [
+        ('mainCharacters[]', PERSON, False),
+        ('supportingCharacters[]', PERSON, False),
+        ('primaryLocations[]', ('location',), False),
+        ('factions[]', ('faction',), False),
+        ('plotBeats[].characters[]', PERSON, False),
+        ('plotBeats[].location', ('location',), False),
+        ('connections.previousArc', ('arc',), False),
+        ('connections.nextArc', ('arc',), False)
+    ]
+}
+
+# REFERENCES with the field specs split once
+_SPECS = {
+    kind: [(spec.split('.'), kinds, reciprocal) for spec, kinds, reciprocal in refs]
+    for kind, refs in REFERENCES.items()
+}
+
+# Kinds whose entities are expected to take part in at least one reference
+ORPHAN_KINDS = ('location', 'character', 'npc', 'faction', 'religion')
+
+# One reference: kind of the referencing entity, source node (None if the
+# entity has no id), path of the referencing field, kinds it may point at,
+# the referenced id and whether it should be reciprocated
+Edge = namedtuple('Edge', 'kind source path kinds target reciprocal')
+
+
+def _collect(value, parts: List[str], depth: int, path: str, out: List[Tuple[str, str]]):
+    """Append (path, id) for every non-empty string a field spec reaches"""
+    if depth == len(parts):
+        if isinstance(value, str) and value:
+            out.append((path, value))
+        return
+    if not isinstance(value, dict):
+        return
+
+    part = parts[depth]
+    if part.endswith('[]'):
+        field = part[:-2]
+        items = value.get(field)
+        if isinstance(items, list):
+            for i, item in enumerate(items):
+                _collect(item, parts, depth + 1, f'{path}/{field}/{i}', out)
+    elif part in value:
+        _collect(value[part], parts, depth + 1, f'{path}/{part}', out)
+
+
+class ReferenceGraph:
+    """
+    Every entity and arc as a node, every id reference as an edge
+
+    Built in one pass over the sections: nodes go into one hash index per
+    kind (id -> path) and references are collected as edges, then resolved
+    with one lookup each, so every check is O(V + E).
+
+    Paths name the entity by id ('characters/kael/relationships/0/character_id')
+    or, for entities without one, by position ('npcs/#3/location').
+    """
+
+    def __init__(self):
+        # kind -> {id: path of the entity}
+        self.nodes: Dict[str, Dict[str, str]] = {kind: {} for kind in KIND_SOURCES}
+        # kind -> {id: [paths of later entities reusing it]}
+        self.duplicates: Dict[str, Dict[str, List[str]]] = {kind: {} for kind in KIND_SOURCES}
+        self.names: Dict[Tuple[str, str], str] = {}
+        self.edges: List[Edge] = []
+
+    @classmethod
+    def build(cls, world: Dict[str, Dict], arcs: Optional[List[Dict]] = None) -> 'ReferenceGraph':
+        """
+        Args:
+            world: World sections by name (missing sections are treated as empty)
+            arcs: Every arc across seasons
+        """
+        graph = cls()
+        for kind, (section, list_key) in KIND_SOURCES.items():
+            if kind == 'arc':
+                entities = arcs or []
+            else:
+                entities = (world.get(section) or {}).get(list_key) or []
+            for position, entity in enumerate(entities):
+                if isinstance(entity, dict):
+                    graph._add_node(kind, section, position, entity)
+        return graph
+
+    def _add_node(self, kind: str, section: str, position: int, entity: Dict):
+        entity_id = entity.get('id')
+        has_id = isinstance(entity_id, str) and entity_id != ''
+        path = f'{section}/{entity_id}' if has_id else f'{section}/#{position}'
+
+        if has_id:
+            if entity_id in self.nodes[kind]:
+                self.duplicates[kind].setdefault(entity_id, []).append(f'{section}/#{position}')
+            else:
+                self.nodes[kind][entity_id] = path
+                self.names[(kind, entity_id)] = entity.get('name') or entity.get('title') or entity_id
+
+        source = (kind, entity_id) if has_id else None
+        found: List[Tuple[str, str]] = []
+        for parts, kinds, reciprocal in _SPECS.get(kind, []):
+            _collect(entity, parts, 0, path, found)
+            self.edges.extend(Edge(kind, source, field_path, kinds, value, reciprocal) for field_path, value in found)
+            found.clear()
+
+    def resolve(self, kinds: Tuple[str, ...], entity_id: str) -> Optional[str]:
+        """The first of kinds that has an entity with this id, or None"""
+        for kind in kinds:
+            if entity_id in self.nodes[kind]:
+                return kind
+        return None
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    def check(self, source_kinds: Optional[Tuple[str, ...]] = None) -> Dict:
+        """
+        Find duplicate ids, dangling references, one-sided relationships and
+        orphan entities
+
+        Args:
+            source_kinds: Only report dangling references made by these
+                kinds of entity (default: all). References from other kinds
+                still count towards connecting their targets.
+
+        Returns:
+            Dict with warnings and suggestions, each carrying the path of
+            the entity or field involved
+        """
+        warnings = []
+        suggestions = []
+
+        for kind, duplicates in self.duplicates.items():
+            for entity_id, paths in duplicates.items():
+                warnings.append({
+                    'type': 'duplicate_id',
+                    'severity': 'high',
+                    'message': f'Duplicate {kind} ID: {entity_id} ({len(paths) + 1} entries)',
+                    'path': self.nodes[kind][entity_id],
+                    'duplicates': paths,
+                    'suggestion': f'Give each {kind} a unique ID'
+                })
+
+        referenced = set()
+        relations = set()
+        resolved = []
+
+        for edge in self.edges:
+            target_kind = self.resolve(edge.kinds, edge.target)
+            if target_kind is None:
+                if source_kinds is None or edge.kind in source_kinds:
+                    warnings.append(self._dangling(edge))
+                continue
+
+            target = (target_kind, edge.target)
+            referenced.add(target)
+            if edge.source is not None:
+                referenced.add(edge.source)
+                if edge.reciprocal:
+                    relations.add((edge.source, target))
+                    resolved.append((edge, target))
+
+        for edge, target in resolved:
+            # Only entities of the same kind keep relationship lists
+            if target[0] == edge.source[0] and (target, edge.source) not in relations and target != edge.source:
+                warnings.append({
+                    'type': 'one_sided_relationship',
+                    'severity': 'low',
+                    'message': (
+                        f'{self._label(edge.source)} lists a relationship with '
+                        f'{self._label(target)}, which does not list one back'
+                    ),
+                    'path': edge.path,
+                    'suggestion': f'Add the matching relationship to {self.nodes[target[0]][target[1]]}'
+                })
+
+        for kind in ORPHAN_KINDS:
+            for entity_id, path in self.nodes[kind].items():
+                if (kind, entity_id) not in referenced:
+                    suggestions.append({
+                        'type': 'orphan_entity',
+                        'message': f'{self._label((kind, entity_id))} is not connected to anything',
+                        'path': path,
+                        'suggestion': f'Reference this {kind} from an arc, faction or character, or remove it'
+                    })
+
+        return {'warnings': warnings, 'suggestions': suggestions}
+
+    def check_references(self, kinds: Tuple[str, ...]) -> List[Dict]:
+        """Dangling and wrong-kind references made by entities of the given kinds"""
+        return [
+            self._dangling(edge) for edge in self.edges
+            if edge.kind in kinds and self.resolve(edge.kinds, edge.target) is None
+        ]
+
+    def _dangling(self, edge: Edge) -> Dict:
+        source = self._label(edge.source) if edge.source is not None else '/'.join(edge.path.split('/')[:2])
+        expected = '/'.join(edge.kinds)
+        other = self.resolve(tuple(k for k in KIND_SOURCES if k not in edge.kinds), edge.target)
+
+        if other is not None:
+            return {
+                'type': 'wrong_reference_kind',
+                'severity': 'medium',
+                'message': f'{source} refers to {other} {edge.target} where a {expected} is expected',
+                'path': edge.path,
+                'suggestion': f'Point this field at a {expected} ID'
+            }
+        return {
+            'type': 'dangling_reference',
+            'severity': 'medium',
+            'message': f'{source} refers to non-existent {expected} ID: {edge.target}',
+            'path': edge.path,
+            'suggestion': f'Remove the reference or create the {expected}'
+        }
+
+    def _label(self, node: Tuple[str, str]) -> str:
+        kind, entity_id = node
+        return f'{kind.capitalize()} "{self.names.get(node, entity_id)}"'
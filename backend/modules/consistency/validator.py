@@ -3,13 +3,53 @@ Consistency Validator Module
 Validates logical consistency in world building and stories
 """
 
-import json
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..storage import JsonStorage, StorageBackend
+from .episode_timeline import EpisodeTimeline
+from .reference_graph import KIND_SOURCES, ReferenceGraph
 
 
 class ConsistencyValidator:
-    """Validates consistency across project data"""
+    """
+    Validates consistency across project data
+    
+    Each check declares the sections it reads. Its result is cached per
+    project together with those sections' version tokens, so a validation
+    only re-runs checks whose sections changed since the last one and
+    reuses every other result without reading anything.
+    """
+    
+    # Check name -> (method name, sections it reads), in report order;
+    # 'arcs' stands for every season's arcs
+    WORLD_CHECKS = {
+        'world_overview': ('_check_world_overview', ('world_overview',)),
+        'locations': ('_check_locations', ('locations',)),
+        'references': ('_check_references', tuple(section for section, _ in KIND_SOURCES.values()))
+    }
+    
+    EPISODE_CHECKS = {
+        'timeline': ('_check_timeline', ('arcs',)),
+        'arc_references': ('_check_arc_references', tuple(section for section, _ in KIND_SOURCES.values()))
+    }
+    
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        """
+        Args:
+            storage: Storage backend (defaults to JSON files under projects_dir)
+        """
+        self.storage = storage
+        self._lock = threading.Lock()
+        # (projects_dir, project_id) -> {check: (versions, result)}
+        self._results: Dict[Tuple[str, str], Dict[str, Tuple[Tuple, Dict]]] = {}
+    
+    def forget(self, project_id: str):
+        """Drop cached results for a project (e.g. after deletion)"""
+        with self._lock:
+            for key in [k for k in self._results if k[1] == project_id]:
+                del self._results[key]
     
     def validate(self, 
                 projects_dir: Path, 
@@ -21,7 +61,7 @@ class ConsistencyValidator:
         Args:
             projects_dir: Base projects directory
             project_id: Project to validate
-            scope: 'world' or 'episode' (Phase 2)
+            scope: 'world' or 'episode' (arcs and their episodes)
         
         Returns:
             Validation results with warnings and suggestions
@@ -34,58 +74,42 @@ class ConsistencyValidator:
                 'error': 'Project not found'
             }
         
+        storage = self.storage or JsonStorage(projects_dir)
+        
         if scope == 'world':
-            return self._validate_world(project_path)
+            return self._validate_world(storage, project_id)
         elif scope == 'episode':
-            return {
-                'success': False,
-                'message': 'Episode validation available in Phase 3'
-            }
+            return self._validate_episodes(storage, project_id)
         
         return {
             'success': False,
             'error': 'Invalid scope'
         }
     
-    def _validate_world(self, project_path: Path) -> Dict:
+    def _validate_world(self, storage: StorageBackend, project_id: str) -> Dict:
         """Validate world building consistency"""
+        return self._report(storage, project_id, self.WORLD_CHECKS, 'world')
+    
+    def _validate_episodes(self, storage: StorageBackend, project_id: str) -> Dict:
+        """Validate arcs against each other, their episodes and the world"""
+        return self._report(storage, project_id, self.EPISODE_CHECKS, 'episode')
+    
+    def _report(self, storage: StorageBackend, project_id: str, checks: Dict, what: str) -> Dict:
+        """Run checks and merge their findings into one validation result"""
         warnings = []
         suggestions = []
         
-        world_dir = project_path / 'world'
-        
-        # Load all world data
         try:
-            world_data = self._load_world_data(world_dir)
+            results = self._run_checks(storage, project_id, checks)
         except Exception as e:
             return {
                 'success': False,
-                'error': f'Failed to load world data: {str(e)}'
+                'error': f'Failed to load {what} data: {str(e)}'
             }
         
-        # Check world overview completeness
-        overview_checks = self._check_world_overview(world_data.get('world_overview', {}))
-        warnings.extend(overview_checks['warnings'])
-        suggestions.extend(overview_checks['suggestions'])
-        
-        # Check locations consistency
-        location_checks = self._check_locations(world_data.get('locations', {}))
-        warnings.extend(location_checks['warnings'])
-        suggestions.extend(location_checks['suggestions'])
-        
-        # Check characters
-        character_checks = self._check_characters(
-            world_data.get('characters', {}),
-            world_data.get('locations', {}),
-            world_data.get('factions', {})
-        )
-        warnings.extend(character_checks['warnings'])
-        suggestions.extend(character_checks['suggestions'])
-        
-        # Check factions
-        faction_checks = self._check_factions(world_data.get('factions', {}))
-        warnings.extend(faction_checks['warnings'])
-        suggestions.extend(faction_checks['suggestions'])
+        for result in results:
+            warnings.extend(result['warnings'])
+            suggestions.extend(result['suggestions'])
         
         return {
             'success': True,
@@ -98,29 +122,64 @@ class ConsistencyValidator:
             }
         }
     
-    def _load_world_data(self, world_dir: Path) -> Dict:
-        """Load all world JSON files"""
-        data = {}
-        
-        files = [
-            'world_overview.json',
-            'locations.json',
-            'characters.json',
-            'npcs.json',
-            'factions.json',
-            'religions.json',
-            'glossary.json',
-            'content.json'
-        ]
-        
-        for file_name in files:
-            file_path = world_dir / file_name
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    key = file_name.replace('.json', '')
-                    data[key] = json.load(f)
-        
-        return data
+    def _run_checks(self, storage: StorageBackend, project_id: str, checks: Dict) -> List[Dict]:
+        """
+        Results of the given checks, re-running only those whose sections
+        changed since they were cached
+        
+        Version tokens are taken before any section is read, so a write
+        racing with a check can only make the cached tokens look older
+        than the result, which just means one extra re-run later.
+        """
+        key = (str(storage.projects_dir), project_id)
+        with self._lock:
+            cached = dict(self._results.get(key, {}))
+        
+        tokens: Dict[str, Any] = {}
+        loaded: Dict[str, Dict] = {}
+        results = []
+        fresh = {}
+        
+        for name, (method, sections) in checks.items():
+            for section in sections:
+                if section not in tokens:
+                    tokens[section] = self._version(storage, project_id, section)
+            versions = tuple(tokens[section] for section in sections)
+            
+            hit = cached.get(name)
+            if hit is not None and hit[0] == versions:
+                results.append(hit[1])
+                continue
+            
+            for section in sections:
+                if section not in loaded:
+                    loaded[section] = self._load_section(storage, project_id, section)
+            result = getattr(self, method)(*(loaded[section] for section in sections))
+            fresh[name] = (versions, result)
+            results.append(result)
+        
+        if fresh:
+            with self._lock:
+                self._results.setdefault(key, {}).update(fresh)
+        return results
+    
+    def _version(self, storage: StorageBackend, project_id: str, section: str) -> Any:
+        """Version token of a section (None for one served from its template)"""
+        if section == 'arcs':
+            return storage.arcs_version(project_id)
+        return storage.section_version(project_id, section)
+    
+    def _load_section(self, storage: StorageBackend, project_id: str, section: str) -> Dict:
+        """
+        One world section as checks see it: its template if never written
+        
+        'arcs' loads as {'arcs': every arc in season order, 'seasons': {season: arcs}}
+        """
+        if section == 'arcs':
+            seasons = {season: data.get('arcs', []) for season, data in sorted(storage.read_seasons(project_id).items())}
+            return {'arcs': [arc for arcs in seasons.values() for arc in arcs], 'seasons': seasons}
+        data = storage.read_section_or_default(project_id, section)
+        return data if data is not None else {}
     
     def _check_world_overview(self, overview: Dict) -> Dict:
         """Check world overview completeness"""
@@ -147,17 +206,7 @@ class ConsistencyValidator:
         
         places = locations.get('places', [])
         
-        # Check for duplicate location IDs
-        location_ids = [p.get('id') for p in places if p.get('id')]
-        if len(location_ids) != len(set(location_ids)):
-            warnings.append({
-                'type': 'duplicate_location_ids',
-                'severity': 'high',
-                'message': 'Duplicate location IDs detected',
-                'suggestion': 'Ensure each location has a unique ID'
-            })
-        
-        # Check for missing required fields
+        # Check for missing required fields (ids are checked by _check_references)
         for place in places:
             if not place.get('name'):
                 warnings.append({
@@ -176,69 +225,48 @@ class ConsistencyValidator:
         
         return {'warnings': warnings, 'suggestions': suggestions}
     
-    def _check_characters(self, 
-                         characters: Dict,
-                         locations: Dict,
-                         factions: Dict) -> Dict:
-        """Check character consistency"""
-        warnings = []
-        suggestions = []
-        
-        char_list = characters.get('characters', [])
-        place_ids = {p.get('id') for p in locations.get('places', [])}
-        faction_ids = {f.get('id') for f in factions.get('factions', [])}
-        
-        # Check for duplicate character IDs
-        char_ids = [c.get('id') for c in char_list if c.get('id')]
-        if len(char_ids) != len(set(char_ids)):
-            warnings.append({
-                'type': 'duplicate_character_ids',
-                'severity': 'high',
-                'message': 'Duplicate character IDs detected',
-                'suggestion': 'Ensure each character has a unique ID'
-            })
-        
-        # Check character relationships reference valid characters
-        char_ids_set = set(char_ids)
-        for character in char_list:
-            relationships = character.get('relationships', [])
-            for rel in relationships:
-                related_id = rel.get('character_id')
-                if related_id and related_id not in char_ids_set:
-                    warnings.append({
-                        'type': 'invalid_relationship',
-                        'severity': 'medium',
-                        'message': f'Character {character.get("name")} has relationship with non-existent character ID: {related_id}',
-                        'suggestion': 'Remove relationship or create the referenced character'
-                    })
-            
-            # Check currentLocation references valid location
-            current_loc = character.get('currentLocation')
-            if current_loc and current_loc not in place_ids:
-                warnings.append({
-                    'type': 'invalid_location',
-                    'severity': 'medium',
-                    'message': f'Character {character.get("name")} is at non-existent location: {current_loc}',
-                    'suggestion': 'Update currentLocation to valid location ID or create the location'
-                })
-        
-        return {'warnings': warnings, 'suggestions': suggestions}
+    def _check_references(self,
+                          locations: Dict,
+                          characters: Dict,
+                          npcs: Dict,
+                          factions: Dict,
+                          religions: Dict,
+                          content: Dict,
+                          arcs: Dict) -> Dict:
+        """Check ids and every reference between entities and arcs"""
+        world = {
+            'locations': locations,
+            'characters': characters,
+            'npcs': npcs,
+            'factions': factions,
+            'religions': religions,
+            'content': content
+        }
+        # Arcs are built in so they connect the entities they use, but their
+        # own broken references belong to the episode scope's arc_references
+        world_kinds = tuple(kind for kind in KIND_SOURCES if kind != 'arc')
+        return ReferenceGraph.build(world, arcs.get('arcs', [])).check(source_kinds=world_kinds)
     
-    def _check_factions(self, factions: Dict) -> Dict:
-        """Check faction consistency"""
-        warnings = []
-        suggestions = []
-        
-        faction_list = factions.get('factions', [])
-        
-        # Check for duplicate faction IDs
-        faction_ids = [f.get('id') for f in faction_list if f.get('id')]
-        if len(faction_ids) != len(set(faction_ids)):
-            warnings.append({
-                'type': 'duplicate_faction_ids',
-                'severity': 'high',
-                'message': 'Duplicate faction IDs detected',
-                'suggestion': 'Ensure each faction has a unique ID'
-            })
-        
-        return {'warnings': warnings, 'suggestions': suggestions}
\ No newline at end of file
+    def _check_timeline(self, arcs: Dict) -> Dict:
+        """Check episode ranges, plot beats, arc chains and character whereabouts"""
+        return EpisodeTimeline(arcs.get('seasons', {})).check()
+    
+    def _check_arc_references(self,
+                              locations: Dict,
+                              characters: Dict,
+                              npcs: Dict,
+                              factions: Dict,
+                              religions: Dict,
+                              content: Dict,
+                              arcs: Dict) -> Dict:
+        """Check that arcs only refer to world entities and arcs that exist"""
+        world = {
+            'locations': locations,
+            'characters': characters,
+            'npcs': npcs,
+            'factions': factions,
+            'religions': religions,
+            'content': content
+        }
+        graph = ReferenceGraph.build(world, arcs.get('arcs', []))
+        return {'warnings': graph.check_references(('arc',)), 'suggestions': []}
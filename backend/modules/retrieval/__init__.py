@@ -0,0 +1,23 @@
+"""
+Retrieval Module
+Lexical (BM25), full-text and semantic (embedding) retrieval of world entities and arcs
+"""
+
+from .tokenizer import tokenize, estimate_tokens
+from .bm25 import BM25Index
+from .world_index import WorldIndex
+from .embeddings import EmbeddingIndex, EmbeddingStore
+from .search_index import InvertedIndex, SearchIndex, SEARCH_TYPES, parse_query
+
+__all__ = [
+    'tokenize',
+    'estimate_tokens',
+    'BM25Index',
+    'WorldIndex',
+    'EmbeddingIndex',
+    'EmbeddingStore',
+    'InvertedIndex',
+    'SearchIndex',
+    'SEARCH_TYPES',
+    'parse_query'
+]
@@ -0,0 +1,91 @@
+"""
+BM25 Index
+Okapi BM25 over an incrementally updated inverted index
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class BM25Index:
+    """
+    Inverted index scored with Okapi BM25
+
+    Documents can be added and removed one at a time; postings, document
+    lengths and the running total length are updated in place, so keeping
+    the index current costs time proportional to the documents that changed.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        # Distinct terms of each document, so removal only touches its postings
+        self._doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: Hashable, terms: Iterable[str]):
+        """Index a document, replacing any previous version"""
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+
+        counts = Counter(terms)
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        length = sum(counts.values())
+        self._doc_terms[doc_id] = tuple(counts)
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: Hashable):
+        """Drop a document"""
+        if doc_id not in self._lengths:
+            return
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def search(self,
+               terms: Iterable[str],
+               k: int = 10,
+               accept: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Top-k (doc_id, score) for a query, best first
+
+        Args:
+            terms: Query terms
+            k: Number of results
+            accept: Only documents this returns True for are ranked, so
+                filtered-out documents never take a top-k slot
+        """
+        if not self._lengths:
+            return []
+
+        n = len(self._lengths)
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[Hashable, float] = {}
+
+        for term, query_count in Counter(terms).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if accept is not None and not accept(doc_id):
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + query_count * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,293 @@
+"""
+Embeddings
+Semantic similarity search over world entities and arcs using Ollama embeddings
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # similarity search is unavailable without numpy
+    np = None
+
+from ..ai_integration.context_renderer import render_entity
+from ..storage import ENTITY_LISTS
+
+
+# Sources embedded per project: world list sections plus story arcs
+ARC_SOURCE = 'arcs'
+EMBEDDED_SOURCES = tuple(ENTITY_LISTS) + (ARC_SOURCE,)
+
+# Entity text sent to the model is cut here to stay inside its context window
+MAX_TEXT_CHARS = 4000
+
+
+def content_key(model: str, text: str) -> str:
+    """Cache key for the embedding of a text by a model"""
+    return hashlib.sha1(f'{model}\0{text}'.encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Content-addressed vector cache for one model, persisted in SQLite
+
+    Vectors are stored unit-normalised as float32 blobs, one row per content
+    key. A put inserts only the new rows in one transaction, so its cost
+    depends on the batch rather than the size of the cache, and concurrent
+    writers from other processes are serialised by SQLite instead of
+    overwriting each other's saves. Rows are never changed once written (the
+    key is a hash of model and text), so vectors read once are kept in memory.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS vectors (
+        key TEXT PRIMARY KEY,
+        vector BLOB NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    # Keys per SELECT, below SQLite's bound-parameter limit
+    QUERY_CHUNK = 500
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._vectors: Dict[str, 'np.ndarray'] = {}
+        self._lock = threading.Lock()
+        # sqlite3 connections must stay on the thread that created them
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, 'np.ndarray']:
+        """Cached vectors for the keys that have one"""
+        with self._lock:
+            missing = [key for key in dict.fromkeys(keys) if key not in self._vectors]
+            if missing:
+                conn = self._connect()
+                for start in range(0, len(missing), self.QUERY_CHUNK):
+                    chunk = missing[start:start + self.QUERY_CHUNK]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    for key, blob in rows:
+                        self._vectors[key] = np.frombuffer(blob, dtype=np.float32)
+            return {key: self._vectors[key] for key in keys if key in self._vectors}
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Normalise, cache and persist new vectors"""
+        rows = []
+        for key, vector in vectors.items():
+            array = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(array)
+            array = array / norm if norm else array
+            rows.append((key, array.tobytes()))
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany('INSERT OR IGNORE INTO vectors VALUES (?, ?)', rows)
+            for key, blob in rows:
+                self._vectors[key] = np.frombuffer(blob, dtype=np.float32)
+
+
+class _ProjectVectors:
+    """Embedded documents of one project and the search matrix built from them"""
+
+    def __init__(self):
+        self.versions: Dict[str, object] = {}
+        # (source, id) -> (content key, name)
+        self.docs: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+        self.row_ids: List[Tuple[str, str]] = []
+        self.matrix = None
+        self.stale = True
+        self.lock = threading.Lock()
+
+
+class EmbeddingIndex:
+    """
+    Cosine-similarity search over a project's world entities and arcs
+
+    Each query checks the storage version token of every source (list
+    sections and arcs). Changed sources are re-read and their entities
+    keyed by a hash of the text that would be embedded; only keys missing
+    from the EmbeddingStore are sent to Ollama, in batches. The vectors of
+    a project are stacked into one matrix so a query is a single
+    matrix-vector product plus a partial sort.
+    """
+
+    def __init__(self, storage, client, cache_dir: Path, model: Optional[str] = None):
+        self.storage = storage
+        self.client = client
+        self.model = model or client.default_embed_model
+        safe_model = re.sub(r'[^A-Za-z0-9_.-]', '_', self.model)
+        self.store = EmbeddingStore(cache_dir / f'{safe_model}.db')
+        self._projects: Dict[str, _ProjectVectors] = {}
+        self._lock = threading.Lock()
+
+    def forget(self, project_id: str):
+        """Drop a project's in-memory matrix (cached vectors stay on disk)"""
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+    def _project(self, project_id: str) -> _ProjectVectors:
+        with self._lock:
+            if project_id not in self._projects:
+                self._projects[project_id] = _ProjectVectors()
+            return self._projects[project_id]
+
+    # ------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------
+
+    def _source_version(self, project_id: str, source: str):
+        if source == ARC_SOURCE:
+            return self.storage.arcs_version(project_id)
+        return self.storage.section_version(project_id, source)
+
+    def _source_documents(self, project_id: str, source: str) -> Dict[Tuple[str, str], Tuple[str, Optional[str]]]:
+        """(source, id) -> (text, name) for every entity of a source"""
+        if source == ARC_SOURCE:
+            entities = [
+                arc
+                for season in self.storage.read_seasons(project_id).values()
+                for arc in season.get('arcs', [])
+            ]
+            id_field = 'id'
+        else:
+            list_key, id_field = ENTITY_LISTS[source]
+            entities = (self.storage.read_section(project_id, source) or {}).get(list_key, [])
+
+        docs = {}
+        for entity in entities:
+            if isinstance(entity, dict) and entity.get(id_field):
+                name = entity.get('name') or entity.get('title') or entity.get('term')
+                docs[(source, str(entity[id_field]))] = (render_entity(entity, 'full')[:MAX_TEXT_CHARS], name)
+        return docs
+
+    def refresh(self, project_id: str) -> Optional[str]:
+        """
+        Bring a project's vectors up to date
+
+        Returns:
+            An error message if embedding failed, otherwise None
+        """
+        state = self._project(project_id)
+        with state.lock:
+            changed = {}
+            for source in EMBEDDED_SOURCES:
+                # Version first: a concurrent write can only cause an extra refresh
+                version = self._source_version(project_id, source)
+                if source not in state.versions or state.versions[source] != version:
+                    changed[source] = (version, self._source_documents(project_id, source))
+
+            # One batched embedding run for everything new across changed sources
+            texts = {}
+            for _, docs in changed.values():
+                for text, _ in docs.values():
+                    texts[content_key(self.model, text)] = text
+            missing = sorted(set(texts) - set(self.store.get_many(list(texts))))
+            if missing:
+                result = self.client.embed([texts[key] for key in missing], model=self.model)
+                if not result['success']:
+                    return result['error']
+                self.store.put_many(dict(zip(missing, result['embeddings'])))
+
+            for source, (version, docs) in changed.items():
+                for doc_id in [d for d in state.docs if d[0] == source and d not in docs]:
+                    del state.docs[doc_id]
+                for doc_id, (text, name) in docs.items():
+                    state.docs[doc_id] = (content_key(self.model, text), name)
+                state.versions[source] = version
+                state.stale = True
+
+            if state.stale:
+                state.row_ids = list(state.docs)
+                vectors = self.store.get_many([state.docs[d][0] for d in state.row_ids])
+                # Rows whose vector is missing (cache database lost) are dropped until re-embedded
+                state.row_ids = [d for d in state.row_ids if state.docs[d][0] in vectors]
+                state.matrix = (
+                    np.stack([vectors[state.docs[d][0]] for d in state.row_ids])
+                    if state.row_ids else None
+                )
+                state.stale = False
+        return None
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def similar(self,
+                project_id: str,
+                query: str,
+                k: int = 10,
+                sources: Optional[List[str]] = None) -> Dict:
+        """
+        Entities and arcs most similar in meaning to a query
+
+        Args:
+            project_id: Project ID
+            query: Free text, e.g. "the disgraced knight"
+            k: Number of results
+            sources: Limit to these sources (section names or 'arcs')
+
+        Returns:
+            {"success": bool, "results": [{source, id, name, score}], "error": str or None}
+        """
+        if np is None:
+            return {'success': False, 'results': [], 'error': 'numpy is required for similarity search'}
+
+        error = self.refresh(project_id)
+        if error:
+            return {'success': False, 'results': [], 'error': f'Embedding failed: {error}'}
+
+        result = self.client.embed([query], model=self.model)
+        if not result['success']:
+            return {'success': False, 'results': [], 'error': f"Embedding failed: {result['error']}"}
+        q = np.asarray(result['embeddings'][0], dtype=np.float32)
+        norm = np.linalg.norm(q)
+        q = q / norm if norm else q
+
+        state = self._project(project_id)
+        with state.lock:
+            matrix, row_ids, docs = state.matrix, state.row_ids, dict(state.docs)
+        if matrix is None:
+            return {'success': True, 'results': [], 'error': None}
+        if matrix.shape[1] != q.shape[0]:
+            return {'success': False, 'results': [], 'error': 'Query and index embeddings have different sizes'}
+
+        scores = matrix @ q
+        if sources:
+            allowed = np.array([row[0] in sources for row in row_ids])
+            scores = np.where(allowed, scores, -np.inf)
+
+        k = min(k, len(row_ids))
+        top = np.argpartition(-scores, k - 1)[:k] if k else []
+        top = sorted(top, key=lambda i: -scores[i])
+
+        return {
+            'success': True,
+            'results': [
+                {
+                    'source': row_ids[i][0],
+                    'id': row_ids[i][1],
+                    'name': docs[row_ids[i]][1],
+                    'score': round(float(scores[i]), 4)
+                }
+                for i in top
+                if np.isfinite(scores[i])
+            ],
+            'error': None
+        }
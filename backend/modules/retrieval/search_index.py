@@ -0,0 +1,437 @@
+"""
+Search Index
+Positional full-text index over world sections, arcs and plot beats
+"""
+
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from ..storage import ENTITY_LISTS, content_hash
+
+
+# Document types: world list sections plus these
+OVERVIEW_TYPE = 'world_overview'
+ARC_TYPE = 'arc'
+BEAT_TYPE = 'beat'
+SEARCH_TYPES = (OVERVIEW_TYPE,) + tuple(ENTITY_LISTS) + (ARC_TYPE, BEAT_TYPE)
+
+# Storage sources kept in step: every world section plus the arcs
+ARC_SOURCE = 'arcs'
+
+# Characters of context kept either side of the first match in a snippet
+SNIPPET_CONTEXT = 60
+SNIPPET_LENGTH = 180
+
+# Letters and digits in any script; underscores split ids into their words
+_WORD = re.compile(r'[^\W_]+')
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+DocKey = Tuple[str, ...]
+
+
+def _words(text: str) -> List[Tuple[str, int, int]]:
+    """(term, start, end) for every word in a text; terms are casefolded"""
+    return [(m.group().casefold(), m.start(), m.end()) for m in _WORD.finditer(text)]
+
+
+def _fields(value, path: str = '') -> List[Tuple[str, str]]:
+    """(field path, text) for every string or number inside a value"""
+    if isinstance(value, str):
+        return [(path, value)] if value.strip() else []
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [(path, str(value))]
+    if isinstance(value, list):
+        return [f for v in value for f in _fields(v, path)]
+    if isinstance(value, dict):
+        return [f for k, v in value.items() for f in _fields(v, f'{path}.{k}' if path else k)]
+    return []
+
+
+def parse_query(query: str) -> List[Tuple[str, List[str]]]:
+    """
+    Split a query into clauses, all of which must match
+
+        word      -> ('term', [word])
+        wor*      -> ('prefix', [wor])
+        "a b c"   -> ('phrase', [a, b, c])
+
+    A bare chunk that tokenizes into several words (e.g. an id such as
+    char_cassian) is treated as a phrase.
+    """
+    clauses = []
+    for quoted, bare in _QUERY_PART.findall(query):
+        words = [w for w, _, _ in _words(quoted or bare)]
+        if not words:
+            continue
+        if bare and bare.endswith('*'):
+            clauses.extend(('term', [w]) for w in words[:-1])
+            clauses.append(('prefix', [words[-1]]))
+        elif len(words) > 1:
+            clauses.append(('phrase', words))
+        else:
+            clauses.append(('term', words))
+    return clauses
+
+
+class _Document:
+    """Indexed text of one entity, arc or beat"""
+
+    __slots__ = ('meta', 'digest', 'text', 'fields', 'spans')
+
+    def __init__(self, meta: Dict, digest: str, fields: List[Tuple[str, str]]):
+        self.meta = meta
+        self.digest = digest
+        # (name, start, end) of each field in the joined text
+        self.fields: List[Tuple[str, int, int]] = []
+        # Character span of each word position; a None gap between fields
+        # keeps phrases from matching across them
+        self.spans: List[Optional[Tuple[int, int]]] = []
+        offset = 0
+        for name, text in fields:
+            self.fields.append((name, offset, offset + len(text)))
+            self.spans.extend((offset + s, offset + e) for _, s, e in _words(text))
+            self.spans.append(None)
+            offset += len(text) + 1
+        self.text = '\n'.join(text for _, text in fields)
+
+    def terms(self) -> Dict[str, List[int]]:
+        """Term -> word positions"""
+        positions = defaultdict(list)
+        for position, span in enumerate(self.spans):
+            if span is not None:
+                positions[self.text[span[0]:span[1]].casefold()].append(position)
+        return positions
+
+
+class InvertedIndex:
+    """
+    Positional inverted index: term -> {document: [positions]}
+
+    The vocabulary is also kept sorted so a prefix expands to its terms
+    with two bisections. Documents are added and removed individually.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[DocKey, List[int]]] = {}
+        self.vocabulary: List[str] = []
+        self.docs: Dict[DocKey, _Document] = {}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, key: DocKey, doc: _Document):
+        """Index a document, replacing any previous one under the key"""
+        self.remove(key)
+        self.docs[key] = doc
+        for term, where in doc.terms().items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            postings[key] = where
+
+    def remove(self, key: DocKey):
+        """Drop a document from the index (no-op if absent)"""
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for term in doc.terms():
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+                i = bisect.bisect_left(self.vocabulary, term)
+                if i < len(self.vocabulary) and self.vocabulary[i] == term:
+                    del self.vocabulary[i]
+
+    def expand(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with a prefix"""
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff')
+        return self.vocabulary[lo:hi]
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self.docs) / len(self.postings[term]))
+
+    @staticmethod
+    def _postings_within(postings: Dict[DocKey, List[int]], within):
+        if within is None:
+            return postings.items()
+        return ((key, postings[key]) for key in within if key in postings)
+
+    def _match(self, kind: str, words: List[str], within=None) -> Dict[DocKey, Dict[int, float]]:
+        """
+        Documents matching one clause: doc -> {matched position: weight}
+
+        Args:
+            within: Only consider these documents (None for all)
+        """
+        if kind == 'term':
+            postings = self.postings.get(words[0], {})
+            idf = self._idf(words[0]) if postings else 0.0
+            return {key: dict.fromkeys(where, idf) for key, where in self._postings_within(postings, within)}
+
+        if kind == 'prefix':
+            matches: Dict[DocKey, Dict[int, float]] = {}
+            for term in self.expand(words[0]):
+                idf = self._idf(term)
+                for key, where in self._postings_within(self.postings[term], within):
+                    matches.setdefault(key, {}).update(dict.fromkeys(where, idf))
+            return matches
+
+        # Phrase: candidates hold every word; keep start positions where the
+        # rest follow one after another
+        lists = [self.postings.get(w) for w in words]
+        if not all(lists):
+            return {}
+        candidates = set.intersection(*(set(p) for p in sorted(lists, key=len)))
+        if within is not None:
+            candidates &= set(within)
+        idfs = [self._idf(w) for w in words]
+        matches = {}
+        for key in candidates:
+            following = [set(p[key]) for p in lists[1:]]
+            starts = [
+                start for start in lists[0][key]
+                if all(start + i + 1 in where for i, where in enumerate(following))
+            ]
+            if starts:
+                matches[key] = {start + i: idf for start in starts for i, idf in enumerate(idfs)}
+        return matches
+
+    def _cost(self, clause: Tuple[str, List[str]]) -> int:
+        """Documents a clause may touch; prefixes count as everything"""
+        kind, words = clause
+        if kind == 'prefix':
+            return len(self.docs)
+        return min(len(self.postings.get(w, ())) for w in words)
+
+    def search(self, clauses: List[Tuple[str, List[str]]], types: Optional[List[str]] = None) -> List[Tuple[DocKey, float, List[int]]]:
+        """
+        Documents matching every clause, best first
+
+        Returns:
+            (document key, score, matched positions) tuples
+        """
+        if not clauses:
+            return []
+
+        # Rarest clause first; each later clause only checks the survivors
+        found: Optional[Dict[DocKey, Dict[int, float]]] = None
+        for kind, words in sorted(clauses, key=self._cost):
+            matches = self._match(kind, words, found)
+            if found is None:
+                if types:
+                    matches = {k: v for k, v in matches.items() if k[0] in types}
+                found = matches
+            else:
+                found = {k: {**found[k], **v} for k, v in matches.items()}
+            if not found:
+                return []
+
+        hits = []
+        for key, positions in found.items():
+            doc = self.docs[key]
+            # Summed weights with a length penalty, so a short entry that
+            # mentions a term several times ranks above a long one
+            score = sum(positions.values()) / math.sqrt(1 + len(doc.spans) / 50)
+            hits.append((key, score, sorted(positions)))
+        hits.sort(key=lambda h: -h[1])
+        return hits
+
+    def snippet(self, key: DocKey, positions: List[int]) -> Dict:
+        """
+        Context around the first match, with highlight offsets
+
+        Returns:
+            {"field": str, "snippet": str, "highlights": [[start, end], ...]}
+            where offsets index into the snippet
+        """
+        doc = self.docs[key]
+        spans = [doc.spans[p] for p in positions]
+        first_start, first_end = spans[0]
+
+        field, field_start, field_end = next(f for f in doc.fields if f[1] <= first_start < f[2])
+        start = max(field_start, first_start - SNIPPET_CONTEXT)
+        if start > field_start:
+            # Begin and end on word boundaries
+            space = doc.text.find(' ', start, first_start)
+            start = space + 1 if space >= 0 else start
+        end = min(field_end, max(first_end, start + SNIPPET_LENGTH))
+        if end < field_end:
+            space = doc.text.rfind(' ', first_end, end)
+            end = space if space >= 0 else end
+
+        lead = '…' if start > field_start else ''
+        tail = '…' if end < field_end else ''
+        highlights = [
+            [s - start + len(lead), e - start + len(lead)]
+            for s, e in spans
+            if s >= start and e <= end
+        ]
+        return {
+            'field': field,
+            'snippet': lead + doc.text[start:end] + tail,
+            'highlights': highlights
+        }
+
+
+class _ProjectSearch:
+    """Search state for one project"""
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.versions: Dict[str, object] = {}
+        self.lock = threading.Lock()
+
+
+class SearchIndex:
+    """
+    Full-text search across a project's world sections, arcs and plot beats
+
+    Every query checks the storage version token of each world section and
+    of the arcs. A source whose token changed is re-read and diffed
+    document by document against content hashes, so editing one character
+    or arc only re-indexes that document (and, for an arc, its beats).
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._projects: Dict[str, _ProjectSearch] = {}
+        self._lock = threading.Lock()
+
+    def _project(self, project_id: str) -> _ProjectSearch:
+        with self._lock:
+            if project_id not in self._projects:
+                self._projects[project_id] = _ProjectSearch()
+            return self._projects[project_id]
+
+    def forget(self, project_id: str):
+        """Drop a project's index"""
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+    # ------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------
+
+    def _source_documents(self, project_id: str, source: str) -> Dict[DocKey, Tuple[Dict, object]]:
+        """Document key -> (result metadata, content) for one storage source"""
+        docs = {}
+        if source == ARC_SOURCE:
+            for season_key, season in self.storage.read_seasons(project_id).items():
+                for arc in season.get('arcs', []):
+                    if not isinstance(arc, dict) or not arc.get('id'):
+                        continue
+                    arc_id = str(arc['id'])
+                    season_number = arc.get('season', season_key)
+                    body = {k: v for k, v in arc.items() if k != 'plotBeats'}
+                    docs[(ARC_TYPE, arc_id)] = (
+                        {'type': ARC_TYPE, 'id': arc_id, 'name': arc.get('title'), 'season': season_number},
+                        body
+                    )
+                    for i, beat in enumerate(arc.get('plotBeats') or []):
+                        if isinstance(beat, dict):
+                            docs[(BEAT_TYPE, arc_id, str(i))] = (
+                                {
+                                    'type': BEAT_TYPE,
+                                    'id': f'{arc_id}#{i}',
+                                    'name': beat.get('title'),
+                                    'arc_id': arc_id,
+                                    'beat_index': i,
+                                    'episode': beat.get('episode'),
+                                    'season': season_number
+                                },
+                                beat
+                            )
+            return docs
+
+        data = self.storage.read_section(project_id, source) or {}
+        if source == OVERVIEW_TYPE:
+            if data:
+                docs[(OVERVIEW_TYPE, OVERVIEW_TYPE)] = (
+                    {'type': OVERVIEW_TYPE, 'id': OVERVIEW_TYPE, 'name': data.get('name')},
+                    data
+                )
+            return docs
+
+        list_key, id_field = ENTITY_LISTS[source]
+        for entity in data.get(list_key, []):
+            if isinstance(entity, dict) and entity.get(id_field):
+                entity_id = str(entity[id_field])
+                docs.setdefault((source, entity_id), (
+                    {'type': source, 'id': entity_id, 'name': entity.get('name') or entity.get('term')},
+                    entity
+                ))
+        return docs
+
+    def refresh(self, project_id: str) -> _ProjectSearch:
+        """Bring a project's index up to date with its sections and arcs"""
+        state = self._project(project_id)
+        with state.lock:
+            for source in (OVERVIEW_TYPE,) + tuple(ENTITY_LISTS) + (ARC_SOURCE,):
+                # Version before the read: a concurrent write can only cause an extra refresh
+                if source == ARC_SOURCE:
+                    version = self.storage.arcs_version(project_id)
+                else:
+                    version = self.storage.section_version(project_id, source)
+                if source in state.versions and state.versions[source] == version:
+                    continue
+
+                index = state.index
+                docs = self._source_documents(project_id, source)
+                for key, (meta, content) in docs.items():
+                    digest = content_hash(content)
+                    existing = index.docs.get(key)
+                    if existing is None or existing.digest != digest:
+                        index.add(key, _Document(meta, digest, _fields(content)))
+                    else:
+                        existing.meta = meta
+
+                types = (ARC_TYPE, BEAT_TYPE) if source == ARC_SOURCE else (source,)
+                for key in [k for k in index.docs if k[0] in types and k not in docs]:
+                    index.remove(key)
+                state.versions[source] = version
+        return state
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self,
+               project_id: str,
+               query: str,
+               types: Optional[List[str]] = None,
+               limit: int = 20) -> Dict:
+        """
+        Find where words, prefixes (wor*) and "quoted phrases" appear
+
+        Args:
+            project_id: Project ID
+            query: Search text; every clause must match
+            types: Limit to these document types (section names, 'arc', 'beat')
+            limit: Maximum number of results
+
+        Returns:
+            {"results": [{type, id, name, score, field, snippet, highlights, ...}],
+             "total": number of matching documents}
+        """
+        clauses = parse_query(query)
+        state = self.refresh(project_id)
+        with state.lock:
+            hits = state.index.search(clauses, types)
+            results = [
+                {
+                    **state.index.docs[key].meta,
+                    'score': round(score, 4),
+                    **state.index.snippet(key, positions)
+                }
+                for key, score, positions in hits[:limit]
+            ]
+        return {'results': results, 'total': len(hits)}
@@ -0,0 +1,41 @@
+"""
+Tokenizer
+Lowercased word tokens with stopwords removed and plurals folded
+"""
+
+import re
+from typing import List
+
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have
+he her him his how i if in into is it its me my no not of on or our s she so t
+than that the their them then there these they this to too us was we were what
+when where which who why will with would you your
+""".split())
+
+
+def _fold(word: str) -> str:
+    """Fold simple English plurals so 'relics' matches 'relic'"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms
+
+    Ids such as char_cassian_mire split on the underscores, so they match
+    the names they are built from.
+    """
+    return [_fold(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English)"""
+    return (len(text) + 3) // 4
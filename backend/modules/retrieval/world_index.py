@@ -0,0 +1,201 @@
+"""
+World Index
+Per-project BM25 index over world entities, kept in step with section changes
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ..ai_integration.context_renderer import SECTION_LAYOUT, render_entity
+from ..storage import ENTITY_LISTS, content_hash
+from .bm25 import BM25Index
+from .tokenizer import estimate_tokens, tokenize
+
+
+# Sections searched, in the order results are grouped in the rendered context
+INDEXED_SECTIONS = ('characters', 'locations', 'factions', 'religions', 'npcs', 'glossary', 'content')
+
+# Identifying fields are indexed this many times so a direct mention ranks first
+NAME_BOOST = 3
+NAME_FIELDS = ('id', 'term', 'name')
+
+# Detail levels tried, in order, when fitting an entity into the token budget
+FIT_LEVELS = ('full', 'brief', 'names')
+
+
+def _strings(value) -> List[str]:
+    """Every string (and number) inside a value, depth first"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [str(value)]
+    if isinstance(value, list):
+        return [s for v in value for s in _strings(v)]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _strings(v)]
+    return []
+
+
+def entity_terms(entity: Dict) -> List[str]:
+    """Index terms for an entity: names boosted, then every text field"""
+    terms = []
+    for field in NAME_FIELDS:
+        if isinstance(entity.get(field), str):
+            terms.extend(tokenize(entity[field]) * NAME_BOOST)
+    for key, value in entity.items():
+        if key not in NAME_FIELDS:
+            for text in _strings(value):
+                terms.extend(tokenize(text))
+    return terms
+
+
+class _ProjectIndex:
+    """Index state for one project"""
+
+    def __init__(self):
+        self.bm25 = BM25Index()
+        self.versions: Dict[str, object] = {}
+        self.hashes: Dict[Tuple[str, str], str] = {}
+        self.entities: Dict[Tuple[str, str], Dict] = {}
+        self.lock = threading.Lock()
+
+
+class WorldIndex:
+    """
+    BM25 retrieval over a project's world entities
+
+    Each indexed section's storage version token is checked on every
+    query. Sections whose token changed are re-read and diffed entity by
+    entity against content hashes, and only added, changed or removed
+    entities touch the index.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._projects: Dict[str, _ProjectIndex] = {}
+        self._lock = threading.Lock()
+
+    def _project(self, project_id: str) -> _ProjectIndex:
+        with self._lock:
+            if project_id not in self._projects:
+                self._projects[project_id] = _ProjectIndex()
+            return self._projects[project_id]
+
+    def forget(self, project_id: str):
+        """Drop a project's index"""
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+    def refresh(self, project_id: str) -> _ProjectIndex:
+        """Bring a project's index up to date with its sections"""
+        state = self._project(project_id)
+        with state.lock:
+            for section in INDEXED_SECTIONS:
+                self._refresh_section(project_id, section, state)
+        return state
+
+    def _refresh_section(self, project_id: str, section: str, state: _ProjectIndex):
+        # Version before the read: a concurrent write can only cause an extra refresh
+        version = self.storage.section_version(project_id, section)
+        if section in state.versions and state.versions[section] == version:
+            return
+
+        list_key, id_field = ENTITY_LISTS[section]
+        data = self.storage.read_section(project_id, section) or {}
+        seen = set()
+
+        for entity in data.get(list_key, []):
+            if not isinstance(entity, dict) or not entity.get(id_field):
+                continue
+            doc_id = (section, str(entity[id_field]))
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+
+            digest = content_hash(entity)
+            if state.hashes.get(doc_id) != digest:
+                state.bm25.add(doc_id, entity_terms(entity))
+                state.hashes[doc_id] = digest
+            state.entities[doc_id] = entity
+
+        for doc_id in [d for d in state.hashes if d[0] == section and d not in seen]:
+            state.bm25.remove(doc_id)
+            del state.hashes[doc_id]
+            del state.entities[doc_id]
+
+        state.versions[section] = version
+
+    def retrieve(self,
+                 project_id: str,
+                 query: str,
+                 k: int = 8,
+                 token_budget: int = 1000,
+                 sections: Optional[List[str]] = None) -> Dict:
+        """
+        Pick the entities most relevant to a query within a token budget
+
+        Entities are taken in score order; one that doesn't fit at full
+        detail is tried at brief and then names-only detail before being
+        skipped.
+
+        Args:
+            project_id: Project ID
+            query: Free text, e.g. the current conversation turn
+            k: Maximum number of entities
+            token_budget: Maximum estimated tokens of rendered context
+            sections: Limit results to these sections
+
+        Returns:
+            Dict with the rendered context, the chosen entities and the
+            estimated token count
+        """
+        state = self.refresh(project_id)
+        terms = tokenize(query)
+
+        with state.lock:
+            accept = (lambda doc_id: doc_id[0] in sections) if sections else None
+            hits = state.bm25.search(terms, max(k * 4, 50), accept)
+            entities = dict(state.entities)
+
+        chosen = []
+        used = 0
+        for (section, entity_id), score in hits:
+            if len(chosen) >= k:
+                break
+            entity = entities.get((section, entity_id))
+            if entity is None:
+                continue
+
+            for level in FIT_LEVELS:
+                text = render_entity(entity, level)
+                cost = estimate_tokens(text)
+                if used + cost <= token_budget:
+                    break
+            else:
+                continue
+
+            used += cost
+            chosen.append({
+                'section': section,
+                'id': entity_id,
+                'name': entity.get('name') or entity.get('term'),
+                'score': round(score, 4),
+                'detail': level,
+                'tokens': cost,
+                'text': text
+            })
+
+        return {
+            'context': self._render(chosen),
+            'entities': chosen,
+            'tokens': used
+        }
+
+    def _render(self, chosen: List[Dict]) -> str:
+        """Group chosen entities under their section headings"""
+        blocks = []
+        for section in INDEXED_SECTIONS:
+            lines = [c['text'] for c in chosen if c['section'] == section]
+            if lines:
+                blocks.append(f'{SECTION_LAYOUT[section][0]}:\n' + '\n'.join(lines))
+        return '\n\n'.join(blocks)
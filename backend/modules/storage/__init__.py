@@ -0,0 +1,69 @@
+"""
+Storage Module
+Pluggable persistence for world sections and story arcs
+"""
+
+from pathlib import Path
+
+from .base import StorageBackend, ENTITY_LISTS, WORLD_SECTIONS
+from .entity_index import EntityIndex
+from .fileio import atomic_write_bytes, atomic_write_json, atomic_write_many
+from .locking import ProjectLocks
+from .project_catalogue import ProjectCatalogue
+from .project_metadata import ProjectMetadata
+from .section_cache import SectionCache, file_signature
+from .serialization import FORMATS, DecodeError, content_hash, dumps, load_file, loads, set_default_format
+from .templates import SECTION_TEMPLATES, section_template
+from .trash import ProjectTrash
+from .json_storage import JsonStorage
+from .sqlite_storage import SQLiteStorage
+from .migrator import migrate_project, migrate_all
+from .archive import ArchiveError, export_archive, import_archive
+from .snapshots import SnapshotStore
+
+BACKENDS = {
+    'json': JsonStorage,
+    'sqlite': SQLiteStorage
+}
+
+
+def create_storage(kind: str, projects_dir: Path) -> StorageBackend:
+    """Create a storage backend by name ('json' or 'sqlite')"""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    return BACKENDS[kind](projects_dir)
+
+
+__all__ = [
+    'StorageBackend',
+    'JsonStorage',
+    'SQLiteStorage',
+    'ENTITY_LISTS',
+    'WORLD_SECTIONS',
+    'SECTION_TEMPLATES',
+    'section_template',
+    'ProjectLocks',
+    'ProjectMetadata',
+    'ProjectCatalogue',
+    'ProjectTrash',
+    'SectionCache',
+    'EntityIndex',
+    'file_signature',
+    'atomic_write_bytes',
+    'atomic_write_json',
+    'atomic_write_many',
+    'FORMATS',
+    'DecodeError',
+    'content_hash',
+    'dumps',
+    'loads',
+    'load_file',
+    'set_default_format',
+    'create_storage',
+    'migrate_project',
+    'migrate_all',
+    'ArchiveError',
+    'export_archive',
+    'import_archive',
+    'SnapshotStore'
+]
@@ -0,0 +1,350 @@
+"""
+Arc Journal Module
+Append-only log of arc mutations with background compaction into season files
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .locking import ProjectLocks
+from .serialization import DecodeError, dumps_text, loads
+
+
+class ArcJournal:
+    """
+    Per-project journal of arc mutations
+
+    Every add/update/delete is appended as one JSON line and fsynced, then
+    applied to an in-memory materialised copy of the project's seasons.
+    Reads are served from that copy. A background thread periodically folds
+    the journal back into the season files and truncates it.
+
+    Replaying the journal is idempotent (puts are upserts, deletes ignore
+    missing arcs), so a crash between writing season files and truncating
+    the journal only replays operations that are already applied.
+
+    Several processes may share a project. Each time the state is used it
+    is checked against disk: new journal lines written by another process
+    are replayed, and a changed season signature (another process compacted
+    or replaced a season) forces a reload. Callers must hold the project
+    lock; the compactor takes the write lock itself.
+    """
+
+    JOURNAL_FILE = 'arc_journal.jsonl'
+
+    # Compact once this many operations are pending for a project...
+    COMPACT_THRESHOLD = 50
+    # ...or after this many seconds, whichever comes first
+    COMPACT_INTERVAL = 5.0
+
+    def __init__(self,
+                 projects_dir: Path,
+                 read_seasons: Callable[[str], Dict[int, Dict]],
+                 write_season: Callable[[str, int, Dict], None],
+                 signature: Callable[[str], Any],
+                 locks: ProjectLocks):
+        """
+        Args:
+            projects_dir: Base projects directory
+            read_seasons: Loads {season: season_data} from the season files
+            write_season: Writes one season's data back to its season file
+            signature: Token that changes whenever any season file is written
+            locks: Project locks shared with the owning storage backend
+        """
+        self.projects_dir = projects_dir
+        self._read_seasons = read_seasons
+        self._write_season = write_season
+        self._signature = signature
+        self.locks = locks
+
+        self._lock = threading.RLock()
+        self._states: Dict[str, Dict] = {}
+        self._wake = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        atexit.register(self.flush_all)
+
+    def journal_path(self, project_id: str) -> Path:
+        """Get path to a project's journal file"""
+        return self.projects_dir / project_id / 'story' / self.JOURNAL_FILE
+
+    # ------------------------------------------------------------------
+    # Materialised state
+    # ------------------------------------------------------------------
+
+    def get_state(self, project_id: str) -> Dict:
+        """
+        Get the materialised arc state for a project, loading it on first use
+
+        State layout:
+            seasons:   {season: {'arcs': [...], 'metadata': {...}}}
+            locations: {arc_id: season}
+            dirty:     seasons changed since the last compaction
+            pending:   journal entries not yet compacted
+            offset:    journal bytes already applied
+            signature: season signature the state was loaded against
+        """
+        with self._lock:
+            state = self._states.get(project_id)
+            if state is None or not self._refresh(project_id, state):
+                state = self._materialise(project_id)
+                self._states[project_id] = state
+            return state
+
+    def version(self, project_id: str) -> Tuple:
+        """Token that changes whenever the project's arcs change in any process"""
+        with self._lock:
+            state = self.get_state(project_id)
+            return (state['signature'], state['offset'])
+
+    def is_loaded(self, project_id: str) -> bool:
+        """Check whether a project's state is already materialised in memory"""
+        with self._lock:
+            return project_id in self._states
+
+    def has_pending_on_disk(self, project_id: str) -> bool:
+        """Check whether a project's journal file holds uncompacted entries"""
+        journal_file = self.journal_path(project_id)
+        return journal_file.exists() and journal_file.stat().st_size > 0
+
+    def find_season(self, project_id: str, arc_id: str) -> Optional[int]:
+        """Get the season an arc lives in, or None if it does not exist"""
+        with self._lock:
+            return self.get_state(project_id)['locations'].get(arc_id)
+
+    def seed_season(self, project_id: str, season: int, season_data: Dict):
+        """Register a freshly initialised (already written) season file"""
+        with self._lock:
+            state = self.get_state(project_id)
+            state['seasons'].setdefault(season, season_data)
+
+    def _materialise(self, project_id: str) -> Dict:
+        """Load season files and replay any journal entries on top"""
+        state = {
+            'seasons': {},
+            'locations': {},
+            'dirty': set(),
+            'pending': 0,
+            'offset': 0,
+            'signature': self._signature(project_id)
+        }
+
+        for season, season_data in self._read_seasons(project_id).items():
+            state['seasons'][season] = season_data
+            for arc in season_data.get('arcs', []):
+                state['locations'][arc['id']] = season
+
+        self._replay_tail(project_id, state)
+        return state
+
+    def _refresh(self, project_id: str, state: Dict) -> bool:
+        """
+        Bring a materialised state up to date with disk
+
+        Returns False if the state must be reloaded from the season files.
+        """
+        if self._signature(project_id) != state['signature']:
+            return False
+
+        journal_file = self.journal_path(project_id)
+        size = journal_file.stat().st_size if journal_file.exists() else 0
+        if size < state['offset']:
+            return False
+        if size > state['offset']:
+            self._replay_tail(project_id, state)
+        return True
+
+    def _replay_tail(self, project_id: str, state: Dict):
+        """Apply journal lines past state['offset'], ignoring a torn final line"""
+        journal_file = self.journal_path(project_id)
+        if not journal_file.exists():
+            return
+
+        with open(journal_file, 'rb') as f:
+            f.seek(state['offset'])
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    # Partially written line: leave it for the next refresh
+                    break
+                state['offset'] += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    op = loads(line)
+                except DecodeError:
+                    print(f"Skipping corrupt journal entry in {journal_file}")
+                    continue
+                self._apply(state, op)
+                state['pending'] += 1
+
+    def _apply(self, state: Dict, op: Dict):
+        """Apply one journal operation to the materialised state"""
+        season = op['season']
+        season_data = state['seasons'].get(season)
+        if season_data is None and op['op'] == 'delete':
+            return
+        if season_data is None:
+            season_data = {
+                'arcs': [],
+                'metadata': {
+                    'season': season,
+                    'totalArcs': 0,
+                    'totalSeasons': 1
+                }
+            }
+            state['seasons'][season] = season_data
+
+        arcs = season_data['arcs']
+
+        if op['op'] == 'put':
+            arc = op['arc']
+            for i, existing in enumerate(arcs):
+                if existing['id'] == arc['id']:
+                    arcs[i] = arc
+                    break
+            else:
+                arcs.append(arc)
+            state['locations'][arc['id']] = season
+        elif op['op'] == 'delete':
+            season_data['arcs'] = [a for a in arcs if a['id'] != op['id']]
+            if state['locations'].get(op['id']) == season:
+                del state['locations'][op['id']]
+        else:
+            raise ValueError(f"Unknown journal operation: {op['op']}")
+
+        metadata = season_data.setdefault('metadata', {})
+        metadata['totalArcs'] = len(season_data['arcs'])
+        metadata['lastUpdated'] = op.get('timestamp') or datetime.utcnow().isoformat() + 'Z'
+        state['dirty'].add(season)
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def put_arc(self, project_id: str, season: int, arc: Dict):
+        """Journal an insert or replacement of an arc within a season"""
+        self._append(project_id, {'op': 'put', 'season': season, 'arc': arc})
+
+    def delete_arc(self, project_id: str, season: int, arc_id: str):
+        """Journal the removal of an arc from a season"""
+        self._append(project_id, {'op': 'delete', 'season': season, 'id': arc_id})
+
+    def replace_season(self, project_id: str, season: int, season_data: Dict):
+        """
+        Replace a whole season, bypassing the journal
+
+        Pending entries are compacted first so they cannot be replayed over
+        the new season contents later.
+        """
+        with self._lock:
+            state = self.get_state(project_id)
+            self.compact(project_id)
+
+            self._write_season(project_id, season, season_data)
+            state['signature'] = self._signature(project_id)
+
+            old = state['seasons'].get(season, {'arcs': []})
+            for arc in old['arcs']:
+                if state['locations'].get(arc['id']) == season:
+                    del state['locations'][arc['id']]
+            state['seasons'][season] = season_data
+            for arc in season_data.get('arcs', []):
+                state['locations'][arc['id']] = season
+
+    def _append(self, project_id: str, op: Dict):
+        """Durably append one operation, then apply it in memory"""
+        op['timestamp'] = datetime.utcnow().isoformat() + 'Z'
+        line = (dumps_text(op) + '\n').encode('utf-8')
+
+        with self._lock:
+            state = self.get_state(project_id)
+
+            journal_file = self.journal_path(project_id)
+            journal_file.parent.mkdir(parents=True, exist_ok=True)
+            if journal_file.exists() and journal_file.stat().st_size > state['offset']:
+                # get_state() replayed every complete line, so anything past
+                # the offset is a torn write from a crashed writer. Drop it,
+                # or the new entry would be glued onto it and lost on replay.
+                os.truncate(journal_file, state['offset'])
+            with open(journal_file, 'ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                state['offset'] = f.tell()
+
+            self._apply(state, op)
+            state['pending'] += 1
+
+            if state['pending'] >= self.COMPACT_THRESHOLD:
+                self._wake.set()
+            self._ensure_worker()
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def compact(self, project_id: str):
+        """
+        Fold a project's journal into its season files and truncate it
+
+        The caller must hold the project write lock.
+        """
+        with self._lock:
+            if project_id not in self._states:
+                return
+            state = self.get_state(project_id)
+            if not state['pending']:
+                return
+
+            for season in sorted(state['dirty']):
+                self._write_season(project_id, season, state['seasons'][season])
+
+            journal_file = self.journal_path(project_id)
+            if journal_file.exists():
+                with open(journal_file, 'wb') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            state['dirty'].clear()
+            state['pending'] = 0
+            state['offset'] = 0
+            state['signature'] = self._signature(project_id)
+
+    def flush_all(self):
+        """Compact every project with pending journal entries"""
+        with self._lock:
+            project_ids = [pid for pid, state in self._states.items() if state['pending']]
+
+        for project_id in project_ids:
+            try:
+                with self.locks.write(project_id):
+                    self.compact(project_id)
+            except Exception as e:
+                print(f"Error compacting arc journal for {project_id}: {e}")
+
+    def forget(self, project_id: str):
+        """Drop a project's materialised state (e.g. after deletion)"""
+        with self._lock:
+            self._states.pop(project_id, None)
+
+    def _ensure_worker(self):
+        """Start the background compactor on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._compact_loop,
+                name='arc-journal-compactor',
+                daemon=True
+            )
+            self._worker.start()
+
+    def _compact_loop(self):
+        """Background compaction loop"""
+        while True:
+            self._wake.wait(self.COMPACT_INTERVAL)
+            self._wake.clear()
+            self.flush_all()
@@ -0,0 +1,369 @@
+"""
+Project Archives
+Export a whole project as one .tar.gz and import it back, streaming both ways
+
+Layout (every path under a folder named after the project id):
+    manifest.json               format, version, original id and title
+    project_metadata.json
+    world/<section>.json        sections that have been written
+    story/season<N>_arcs.json   one file per season
+    state/..., exports/...      copied as-is
+
+Documents are written through the storage API in the 'pretty' format, so an
+archive is readable by hand and imports into either backend.
+"""
+
+import io
+import os
+import re
+import shutil
+import tarfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict
+
+from .base import ENTITY_LISTS, WORLD_SECTIONS, StorageBackend
+from .fileio import atomic_write_json
+from .serialization import DecodeError, dumps, load_file, loads
+
+
+ARCHIVE_FORMAT = 'story-builder-project'
+ARCHIVE_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+METADATA_FILE = 'project_metadata.json'
+# Folders copied byte for byte rather than through storage
+RAW_FOLDERS = ('state', 'exports')
+
+# Import limits: documents are decoded in memory one at a time, raw files
+# are streamed to disk
+MAX_DOCUMENT_BYTES = 256 * 1024 * 1024
+MAX_FILE_BYTES = 1024 * 1024 * 1024
+MAX_TOTAL_BYTES = 4 * 1024 * 1024 * 1024
+MAX_ENTRIES = 10_000
+
+_PROJECT_ID = re.compile(r'\w[\w-]*')
+_SEASON_FILE = re.compile(r'story/season(\d+)_arcs\.json')
+_SAFE_PART = re.compile(r'[\w][\w .-]*')
+
+_COPY_CHUNK = 1024 * 1024
+
+
+class ArchiveError(ValueError):
+    """Raised when an archive is malformed, unsafe or too large"""
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+def export_archive(storage: StorageBackend, project_id: str, fileobj: BinaryIO):
+    """
+    Write a project as a gzipped tar into fileobj
+
+    The project's read lock is held throughout, so the archive is a
+    consistent snapshot; writers wait only as long as fileobj takes to
+    absorb it (callers streaming to a slow client should spool to a
+    temporary file first). Only one document is in memory at a time.
+
+    Args:
+        storage: Backend holding the project
+        project_id: Project to export
+        fileobj: Binary file to write to (need not be seekable)
+
+    Raises:
+        FileNotFoundError: If the project does not exist
+    """
+    root = project_id
+    now = time.time()
+
+    with storage.locks.read(project_id):
+        metadata_file = storage.projects_dir / project_id / METADATA_FILE
+        if not metadata_file.exists():
+            raise FileNotFoundError(f'Project not found: {project_id}')
+        metadata = storage.metadata.apply_pending(project_id, load_file(metadata_file))
+
+        sections = [s for s in WORLD_SECTIONS if storage.section_exists(project_id, s)]
+        seasons = [s['season'] for s in storage.season_summaries(project_id)]
+
+        with tarfile.open(fileobj=fileobj, mode='w|gz') as tar:
+            _add_document(tar, f'{root}/{MANIFEST_FILE}', {
+                'format': ARCHIVE_FORMAT,
+                'version': ARCHIVE_VERSION,
+                'projectId': project_id,
+                'title': metadata.get('title', ''),
+                'exported': datetime.now().isoformat(),
+                'sections': sections,
+                'seasons': seasons
+            }, now)
+            _add_document(tar, f'{root}/{METADATA_FILE}', metadata, now)
+
+            for section in sections:
+                data = storage.read_section(project_id, section)
+                if data is not None:
+                    _add_document(tar, f'{root}/world/{section}.json', data, now)
+
+            for season in seasons:
+                season_data = storage.read_season(project_id, season)
+                if season_data is not None:
+                    _add_document(tar, f'{root}/story/season{season}_arcs.json', season_data, now)
+
+            for folder in RAW_FOLDERS:
+                _add_folder(tar, storage.projects_dir / project_id, folder, root)
+
+
+def _add_document(tar: tarfile.TarFile, name: str, data: Any, mtime: float):
+    encoded = dumps(data, 'pretty')
+    info = tarfile.TarInfo(name)
+    info.size = len(encoded)
+    info.mtime = mtime
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(encoded))
+
+
+def _add_folder(tar: tarfile.TarFile, project_path: Path, folder: str, root: str):
+    """Add the regular files under a project folder; links are skipped"""
+    base = project_path / folder
+    if not base.is_dir():
+        return
+
+    for dirpath, dirnames, filenames in os.walk(base):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            if path.is_symlink() or not path.is_file():
+                continue
+            arcname = f'{root}/{path.relative_to(project_path).as_posix()}'
+            tar.add(path, arcname=arcname, recursive=False)
+
+
+# ----------------------------------------------------------------------
+# Import
+# ----------------------------------------------------------------------
+
+def import_archive(storage: StorageBackend,
+                   fileobj: BinaryIO,
+                   new_project_id: Callable[[str], str]) -> Dict:
+    """
+    Create a project from an archive read sequentially from fileobj
+
+    Entries are validated and written one by one as they arrive, so the
+    archive is never held in memory and fileobj can be a request stream.
+    The project keeps its original id unless a project with that id exists,
+    in which case it gets a new one. Its metadata is written last, so the
+    project only shows up in listings once every entry has been imported;
+    on any error the partial project is removed.
+
+    Args:
+        storage: Backend to import into
+        fileobj: Gzipped tar stream
+        new_project_id: Makes a fresh project id from a title
+
+    Returns:
+        Dict with success status, the new project id and imported counts
+    """
+    try:
+        with tarfile.open(fileobj=fileobj, mode='r|gz') as tar:
+            members = iter(tar)
+            root, manifest = _read_manifest(tar, members)
+            project_id, project_path = _claim_project(storage, manifest, new_project_id)
+
+            with storage.locks.write(project_id):
+                try:
+                    counts = _import_entries(storage, tar, members, root, project_id, project_path)
+                except BaseException:
+                    storage.forget(project_id)
+                    shutil.rmtree(project_path, ignore_errors=True)
+                    raise
+                # The imported metadata is kept as exported rather than
+                # counting the import's own writes as edits
+                storage.metadata.forget(project_id)
+
+    except ArchiveError as e:
+        return {
+            'success': False,
+            'error': f'Invalid project archive: {e}'
+        }
+    except (tarfile.TarError, zlib.error, EOFError, OSError) as e:
+        return {
+            'success': False,
+            'error': f'Failed to read project archive: {e}'
+        }
+
+    try:
+        storage.catalogue.upsert(counts.pop('metadata'))
+    except Exception as e:
+        # The next catalogue sync picks the project up from its folder
+        print(f"Error updating project catalogue: {e}")
+
+    return {
+        'success': True,
+        'project_id': project_id,
+        'original_id': manifest['projectId'],
+        'renamed': project_id != manifest['projectId'],
+        **counts
+    }
+
+
+def _read_manifest(tar: tarfile.TarFile, members):
+    """Read the leading manifest entry, returning (root folder, manifest)"""
+    for member in members:
+        if member.isdir():
+            continue
+        root, _, rest = member.name.partition('/')
+        if rest != MANIFEST_FILE or not member.isfile():
+            raise ArchiveError(f'expected {MANIFEST_FILE} as the first entry, found {member.name}')
+
+        manifest = _read_document(tar, member)
+        if not isinstance(manifest, dict) or manifest.get('format') != ARCHIVE_FORMAT:
+            raise ArchiveError('not a story builder project archive')
+        version = manifest.get('version')
+        if not isinstance(version, int) or version > ARCHIVE_VERSION:
+            raise ArchiveError(f'unsupported archive version: {version}')
+        if not isinstance(manifest.get('projectId'), str):
+            raise ArchiveError('manifest has no projectId')
+        return root, manifest
+
+    raise ArchiveError('archive is empty')
+
+
+def _claim_project(storage: StorageBackend, manifest: Dict, new_project_id: Callable[[str], str]):
+    """Create the project's folder under its original id if free, otherwise a new one"""
+    project_id = manifest['projectId']
+    if not _PROJECT_ID.fullmatch(project_id):
+        project_id = new_project_id(manifest.get('title') or 'imported project')
+
+    storage.projects_dir.mkdir(parents=True, exist_ok=True)
+    for _ in range(10):
+        project_path = storage.projects_dir / project_id
+        try:
+            # mkdir is atomic, so concurrent imports can't claim the same id
+            project_path.mkdir()
+            return project_id, project_path
+        except FileExistsError:
+            project_id = new_project_id(manifest.get('title') or project_id)
+
+    raise ArchiveError('could not allocate a project id')
+
+
+def _import_entries(storage: StorageBackend,
+                    tar: tarfile.TarFile,
+                    members,
+                    root: str,
+                    project_id: str,
+                    project_path: Path) -> Dict:
+    """Validate and write every entry after the manifest"""
+    seen = set()
+    arc_ids = set()
+    metadata = None
+    counts = {'sections': 0, 'seasons': 0, 'arcs': 0, 'files': 0}
+    total = 0
+
+    for index, member in enumerate(members, start=2):
+        if index > MAX_ENTRIES:
+            raise ArchiveError(f'more than {MAX_ENTRIES} entries')
+        if member.isdir():
+            continue
+        if not member.isfile():
+            raise ArchiveError(f'{member.name}: only regular files are allowed')
+
+        top, _, name = member.name.partition('/')
+        if top != root or not name:
+            raise ArchiveError(f'{member.name}: outside the project folder')
+        if name in seen:
+            raise ArchiveError(f'{name}: duplicate entry')
+        seen.add(name)
+
+        total += member.size
+        if total > MAX_TOTAL_BYTES:
+            raise ArchiveError('archive expands beyond the size limit')
+
+        folder, _, rest = name.partition('/')
+        season_match = _SEASON_FILE.fullmatch(name)
+
+        if name == METADATA_FILE:
+            metadata = _read_document(tar, member)
+            if not isinstance(metadata, dict) or not isinstance(metadata.get('title'), str):
+                raise ArchiveError(f'{name}: metadata must be an object with a title')
+
+        elif folder == 'world' and rest.endswith('.json') and rest[:-5] in WORLD_SECTIONS:
+            section = rest[:-5]
+            data = _read_document(tar, member)
+            _check_section(name, section, data)
+            storage.write_section(project_id, section, data)
+            counts['sections'] += 1
+
+        elif season_match:
+            season = int(season_match.group(1))
+            season_data = _read_document(tar, member)
+            _check_season(name, season_data, arc_ids)
+            storage.write_season(project_id, season, season_data)
+            counts['seasons'] += 1
+            counts['arcs'] += len(season_data.get('arcs', []))
+
+        elif folder in RAW_FOLDERS and rest:
+            parts = rest.split('/')
+            if not all(_SAFE_PART.fullmatch(part) for part in parts):
+                raise ArchiveError(f'{name}: unsafe path')
+            if member.size > MAX_FILE_BYTES:
+                raise ArchiveError(f'{name}: file is too large')
+            _copy_member(tar, member, project_path.joinpath(folder, *parts))
+            counts['files'] += 1
+
+        else:
+            raise ArchiveError(f'{name}: unexpected entry')
+
+    if metadata is None:
+        raise ArchiveError(f'{METADATA_FILE} is missing')
+
+    metadata = dict(metadata, id=project_id)
+    metadata.setdefault('created', datetime.now().isoformat())
+    metadata.setdefault('lastModified', metadata['created'])
+    atomic_write_json(project_path / METADATA_FILE, metadata)
+
+    counts['metadata'] = metadata
+    return counts
+
+
+def _read_document(tar: tarfile.TarFile, member: tarfile.TarInfo) -> Any:
+    if member.size > MAX_DOCUMENT_BYTES:
+        raise ArchiveError(f'{member.name}: document is too large')
+    try:
+        return loads(tar.extractfile(member).read())
+    except DecodeError as e:
+        raise ArchiveError(f'{member.name}: {e}') from e
+
+
+def _check_section(name: str, section: str, data: Any):
+    if not isinstance(data, dict):
+        raise ArchiveError(f'{name}: section must be an object')
+    if section in ENTITY_LISTS:
+        list_key, _ = ENTITY_LISTS[section]
+        entities = data.get(list_key, [])
+        if not isinstance(entities, list) or not all(isinstance(e, dict) for e in entities):
+            raise ArchiveError(f'{name}: "{list_key}" must be a list of objects')
+
+
+def _check_season(name: str, season_data: Any, arc_ids: set):
+    if not isinstance(season_data, dict):
+        raise ArchiveError(f'{name}: season must be an object')
+    arcs = season_data.get('arcs', [])
+    if not isinstance(arcs, list):
+        raise ArchiveError(f'{name}: "arcs" must be a list')
+
+    for arc in arcs:
+        arc_id = arc.get('id') if isinstance(arc, dict) else None
+        if not isinstance(arc_id, str) or not arc_id:
+            raise ArchiveError(f'{name}: every arc needs a string id')
+        if arc_id in arc_ids:
+            raise ArchiveError(f'{name}: duplicate arc id {arc_id}')
+        arc_ids.add(arc_id)
+
+
+def _copy_member(tar: tarfile.TarFile, member: tarfile.TarInfo, target: Path):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    source = tar.extractfile(member)
+    with open(target, 'wb') as f:
+        shutil.copyfileobj(source, f, _COPY_CHUNK)
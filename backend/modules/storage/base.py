@@ -0,0 +1,313 @@
+"""
+Storage Backend Interface
+Common contract for persisting world sections and story arcs
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .entity_index import EntityIndex
+from .locking import ProjectLocks
+from .project_catalogue import ProjectCatalogue
+from .project_metadata import ProjectMetadata
+from .serialization import content_hash
+from .templates import SECTION_TEMPLATES, section_template
+from .trash import ProjectTrash
+
+
+# World sections that hold a list of entities: section -> (list key, id field)
+ENTITY_LISTS = {
+    'locations': ('places', 'id'),
+    'characters': ('characters', 'id'),
+    'npcs': ('npcs', 'id'),
+    'factions': ('factions', 'id'),
+    'religions': ('religions', 'id'),
+    'glossary': ('terms', 'term'),
+    'content': ('items', 'id')
+}
+
+WORLD_SECTIONS = [
+    'world_overview',
+    'locations',
+    'characters',
+    'npcs',
+    'factions',
+    'religions',
+    'glossary',
+    'content'
+]
+
+
+class StorageBackend:
+    """
+    Base class for project storage
+
+    Subclasses must implement the section and season primitives. The entity
+    helpers below are generic fallbacks built on whole-section reads and
+    writes; backends with row-level storage override them.
+
+    `locks` provides per-project reader/writer locks. Callers doing a
+    read-modify-write across several calls should hold `locks.write()` for
+    the whole sequence; the locks are reentrant, so primitives that lock
+    internally can be called while it is held.
+
+    `entity_index` keeps id -> position maps so entity lookups on backends
+    that store whole sections don't scan the list.
+
+    `metadata` is told about every successful write (by section, or 'arcs')
+    and keeps project_metadata.json's lastModified and update counters
+    current in debounced batches, mirroring each flush into `catalogue`,
+    the index projects are listed from.
+
+    `trash` holds deleted projects until their undo window runs out.
+
+    Arc ids are unique within a project, not just within a season:
+    put_arc refuses an id that lives in another season, and write_season
+    moves the arcs it lists out of any other season.
+    """
+
+    def __init__(self, projects_dir: Path):
+        self.projects_dir = projects_dir
+        self.locks = ProjectLocks(projects_dir)
+        self.entity_index = EntityIndex()
+        self.catalogue = ProjectCatalogue(projects_dir)
+        self.metadata = ProjectMetadata(projects_dir, self.locks, self.catalogue)
+        self.trash = ProjectTrash(projects_dir)
+
+    # ------------------------------------------------------------------
+    # World sections
+    # ------------------------------------------------------------------
+
+    def read_section(self, project_id: str, section: str) -> Optional[Dict]:
+        """
+        Read a world section, or None if it has never been written
+
+        The result may be shared with a cache: copy it before modifying.
+        """
+        raise NotImplementedError
+
+    def write_section(self, project_id: str, section: str, data: Dict):
+        """Replace a world section"""
+        raise NotImplementedError
+
+    def write_sections(self, project_id: str, sections: Dict[str, Dict]):
+        """Replace several world sections together"""
+        raise NotImplementedError
+
+    def section_exists(self, project_id: str, section: str) -> bool:
+        """Check whether a world section has been written"""
+        return self.read_section(project_id, section) is not None
+
+    def project_exists(self, project_id: str) -> bool:
+        """Check whether a project has been created"""
+        return (self.projects_dir / project_id / 'project_metadata.json').exists()
+
+    def read_section_or_default(self, project_id: str, section: str) -> Optional[Dict]:
+        """
+        Read a world section, falling back to its template if the project
+        exists but has never written it
+
+        New projects start with no section files; this serves their empty
+        defaults until the first write materialises them.
+
+        Returns:
+            Section data, or None if the project or section is unknown
+        """
+        data = self.read_section(project_id, section)
+        if data is None and section in SECTION_TEMPLATES and self.project_exists(project_id):
+            return section_template(section)
+        return data
+
+    def section_available(self, project_id: str, section: str) -> bool:
+        """Check whether a section can be read: written, or served from its template"""
+        if self.section_exists(project_id, section):
+            return True
+        return section in SECTION_TEMPLATES and self.project_exists(project_id)
+
+    def section_version(self, project_id: str, section: str) -> Any:
+        """
+        Token that changes whenever a world section changes, or None if the
+        section doesn't exist
+
+        This fallback hashes the content; backends override it with
+        something that doesn't need the section to be read.
+        """
+        data = self.read_section(project_id, section)
+        if data is None:
+            return None
+        return content_hash(data)
+
+    # ------------------------------------------------------------------
+    # World entities
+    # ------------------------------------------------------------------
+
+    def get_entity(self, project_id: str, section: str, entity_id: str) -> Optional[Dict]:
+        """Get one entity from a list section by id"""
+        return self.get_entities(project_id, section, [entity_id]).get(entity_id)
+
+    def get_entities(self, project_id: str, section: str, entity_ids: List[str]) -> Dict[str, Dict]:
+        """Get entities of a list section by id; ids that don't exist are left out"""
+        list_key, id_field = ENTITY_LISTS[section]
+        data = self.read_section(project_id, section) or {}
+        entities = data.get(list_key, [])
+        positions = self.entity_index.positions(project_id, section, entities, id_field)
+        return {
+            entity_id: entities[positions[entity_id]]
+            for entity_id in entity_ids
+            if entity_id in positions
+        }
+
+    def put_entities(self, project_id: str, section: str, entities: List[Dict]):
+        """Insert or replace entities in a list section, matched by id"""
+        self.update_entities(project_id, section, entities, [])
+
+    def delete_entities(self, project_id: str, section: str, entity_ids: List[str]) -> int:
+        """Delete entities from a list section by id, returning how many were removed"""
+        list_key, id_field = ENTITY_LISTS[section]
+        with self.locks.write(project_id):
+            data = dict(self.read_section(project_id, section) or {})
+            current = data.get(list_key, [])
+            doomed = set(entity_ids)
+
+            kept = [e for e in current if e.get(id_field) not in doomed]
+            removed = len(current) - len(kept)
+            if removed:
+                data[list_key] = kept
+                self.write_section(project_id, section, data)
+            return removed
+
+    def update_entities(self, project_id: str,
+                        section: str,
+                        entities: List[Dict],
+                        entity_ids: List[str]) -> int:
+        """
+        Delete entity_ids, then insert or replace entities, as one write
+
+        This default reads and rewrites the whole section document, so its
+        cost grows with the section rather than the edit. JsonStorage keeps
+        it (a section is one file); SQLiteStorage overrides the entity
+        methods to touch only the affected rows.
+
+        Returns:
+            Number of entities removed
+        """
+        list_key, id_field = ENTITY_LISTS[section]
+        with self.locks.write(project_id):
+            data = dict(self.read_section(project_id, section) or {})
+            doomed = set(entity_ids)
+            current = [e for e in data.get(list_key, []) if e.get(id_field) not in doomed]
+            removed = len(data.get(list_key, [])) - len(current)
+            positions = {}
+            for i, e in enumerate(current):
+                # First occurrence wins, matching get_entities
+                if e.get(id_field):
+                    positions.setdefault(e.get(id_field), i)
+
+            for entity in entities:
+                entity_id = entity.get(id_field)
+                if entity_id in positions:
+                    current[positions[entity_id]] = entity
+                else:
+                    if entity_id:
+                        positions[entity_id] = len(current)
+                    current.append(entity)
+
+            data[list_key] = current
+            self.write_section(project_id, section, data)
+            return removed
+
+    def find_entity(self, project_id: str, entity_id: str) -> List[Tuple[str, Dict]]:
+        """Find every (section, entity) with the given id across list sections"""
+        matches = []
+        for section in ENTITY_LISTS:
+            entity = self.get_entity(project_id, section, entity_id)
+            if entity is not None:
+                matches.append((section, entity))
+        return matches
+
+    # ------------------------------------------------------------------
+    # Story arcs
+    # ------------------------------------------------------------------
+
+    def read_seasons(self, project_id: str) -> Dict[int, Dict]:
+        """Read every season as {season: {'arcs': [...], 'metadata': {...}}}"""
+        raise NotImplementedError
+
+    def read_season(self, project_id: str, season: int) -> Optional[Dict]:
+        """Read one season, or None if it does not exist"""
+        return self.read_seasons(project_id).get(season)
+
+    def write_season(self, project_id: str, season: int, season_data: Dict):
+        """
+        Replace a whole season
+
+        Arcs it lists that live in another season are removed from there
+        (and that season's totals updated), so ids stay unique per project.
+
+        Raises:
+            ValueError: If an arc id appears more than once in season_data
+        """
+        raise NotImplementedError
+
+    def season_summaries(self, project_id: str) -> List[Dict]:
+        """List seasons with arc counts and last update, sorted by season"""
+        summaries = []
+        for season, season_data in sorted(self.read_seasons(project_id).items()):
+            summaries.append({
+                'season': season,
+                'arcCount': len(season_data.get('arcs', [])),
+                'lastUpdated': season_data.get('metadata', {}).get('lastUpdated')
+            })
+        return summaries
+
+    def arcs_version(self, project_id: str) -> Any:
+        """Token that changes whenever a project's arcs change, in any process"""
+        raise NotImplementedError
+
+    def arc_season(self, project_id: str, arc_id: str) -> Optional[int]:
+        """Get the season an arc lives in, or None if it does not exist"""
+        raise NotImplementedError
+
+    def get_arc(self, project_id: str, arc_id: str) -> Optional[Dict]:
+        """Get one arc by id from any season"""
+        raise NotImplementedError
+
+    def put_arc(self, project_id: str, season: int, arc: Dict):
+        """
+        Insert or replace one arc within a season
+
+        Raises:
+            ValueError: If an arc with this id lives in another season
+        """
+        raise NotImplementedError
+
+    def delete_arc(self, project_id: str, season: int, arc_id: str):
+        """Remove one arc from a season"""
+        raise NotImplementedError
+
+    def _check_season_ids(self, season: int, season_data: Dict) -> List[str]:
+        """Ids of a season's arcs, raising ValueError if any repeats"""
+        arc_ids = [arc['id'] for arc in season_data.get('arcs', [])]
+        if len(set(arc_ids)) != len(arc_ids):
+            seen = set()
+            repeated = sorted({arc_id for arc_id in arc_ids if arc_id in seen or seen.add(arc_id)})
+            raise ValueError(f"Duplicate arc IDs in season {season}: {', '.join(repeated)}")
+        return arc_ids
+
+    def _arc_conflict(self, arc_id: str, season: int, other: Optional[int]):
+        """Raise ValueError if an arc id already lives in a season other than this one"""
+        if other is not None and other != season:
+            raise ValueError(f"Arc with ID '{arc_id}' already exists in season {other}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def flush(self, project_id: Optional[str] = None):
+        """Push any buffered writes to their final location"""
+        self.metadata.flush(project_id)
+
+    def forget(self, project_id: str):
+        """Drop in-memory state and open handles for a project"""
+        self.entity_index.forget(project_id)
+        self.metadata.forget(project_id)
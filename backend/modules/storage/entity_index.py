@@ -0,0 +1,59 @@
+"""
+Entity Index
+id -> position maps for the entity lists of world sections
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+class EntityIndex:
+    """
+    LRU cache of id -> position maps keyed by (project, section)
+
+    Each map is tied to the list object it was built from rather than to a
+    version token: section documents served from the SectionCache are the
+    same object until the section changes, so while the section is unchanged
+    every lookup is O(1), and any write (or a cache eviction) hands out a new
+    list and the map is rebuilt on the next lookup.
+
+    When an id appears more than once the first occurrence wins, matching a
+    linear scan.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        # (project_id, section) -> (entity list, id -> position map)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def positions(self, project_id: str, section: str, entities: List, id_field: str) -> Dict[Any, int]:
+        """Get the id -> position map for this exact entity list (read-only)"""
+        key = (project_id, section)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is entities:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        positions = {}
+        for i, entity in enumerate(entities):
+            entity_id = entity.get(id_field) if isinstance(entity, dict) else None
+            if entity_id and entity_id not in positions:
+                positions[entity_id] = i
+
+        with self._lock:
+            self._entries[key] = (entities, positions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return positions
+
+    def forget(self, project_id: str):
+        """Drop every map for a project"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == project_id]:
+                del self._entries[key]
@@ -0,0 +1,74 @@
+"""
+File I/O Helpers
+Crash-safe writes: write to a temp file, fsync, then rename over the target
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional, Tuple
+
+from .serialization import dumps
+
+
+def _tmp_path(path: Path) -> Path:
+    """Temp file next to the target, unique per process and thread"""
+    return path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+
+def _write_tmp(path: Path, data: Any, fmt: Optional[str]) -> Path:
+    # Encode before creating the temp file so a bad document leaves nothing behind
+    return _write_tmp_raw(path, dumps(data, fmt))
+
+
+def _write_tmp_raw(path: Path, raw: bytes) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp
+
+
+def atomic_write_json(path: Path, data: Any, fmt: Optional[str] = None):
+    """
+    Replace a stored document atomically
+
+    Readers see either the old or the new document, never a partial one,
+    even if the process dies mid-write.
+
+    Args:
+        path: Target file
+        data: Document to store
+        fmt: Serialization format (defaults to the configured one)
+    """
+    os.replace(_write_tmp(path, data, fmt), path)
+
+
+def atomic_write_bytes(path: Path, raw: bytes):
+    """Replace a file with already-encoded bytes atomically"""
+    os.replace(_write_tmp_raw(path, raw), path)
+
+
+def atomic_write_many(items: Iterable[Tuple[Path, Any]], fmt: Optional[str] = None):
+    """
+    Replace several JSON files, staging all of them before renaming any
+
+    A failure while serialising leaves every target untouched.
+    """
+    staged = []
+    try:
+        for path, data in items:
+            staged.append((_write_tmp(path, data, fmt), path))
+    except Exception:
+        for tmp, _ in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+
+    for tmp, path in staged:
+        os.replace(tmp, path)
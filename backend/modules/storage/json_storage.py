@@ -0,0 +1,368 @@
+"""
+JSON File Storage
+The original on-disk layout: one JSON document per world section and per season
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .arc_journal import ArcJournal
+from .base import StorageBackend
+from .fileio import atomic_write_json, atomic_write_many
+from .serialization import get_default_format, loads, load_file, sniff_format
+from .section_cache import SectionCache, file_signature
+
+
+class JsonStorage(StorageBackend):
+    """
+    Stores each world section as world/<section>.json and each season as
+    story/season<N>_arcs.json. Arc mutations go through an ArcJournal so a
+    single-arc edit is one small append rather than a season rewrite.
+
+    A season catalogue (story/seasons_index.json) records each season's arc
+    count, last update and file stat, so season listings only read that
+    sidecar plus a directory listing instead of decoding every season.
+
+    Every primitive takes the project's read or write lock, and every file
+    is replaced atomically (temp file + rename), so concurrent threads and
+    worker processes never see torn documents or lose updates.
+
+    Parsed world sections are kept in a SectionCache shared by everything
+    using this storage. Reads are validated against the file's stat and
+    writes go through the cache, so repeated context assembly never touches
+    the disk. Section documents returned by read_section are shared and
+    must not be mutated.
+
+    Entity edits still read and rewrite their whole section file, so very
+    large lists (thousands of NPCs) are better served by SQLiteStorage.
+    """
+
+    CATALOGUE_FILE = 'seasons_index.json'
+    # Upper bound on threads used to decode season files in parallel
+    MAX_READ_WORKERS = 8
+    # Memory budget for cached world sections (estimated in-memory size)
+    SECTION_CACHE_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, projects_dir: Path):
+        super().__init__(projects_dir)
+        self.sections = SectionCache(self.SECTION_CACHE_BYTES)
+        self._journal: Optional[ArcJournal] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def journal(self) -> ArcJournal:
+        """Arc journal, created on first arc access"""
+        if self._journal is None:
+            self._journal = ArcJournal(
+                self.projects_dir,
+                self._read_season_files,
+                self._write_season_file,
+                self._season_signature,
+                self.locks
+            )
+        return self._journal
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+
+    def section_path(self, project_id: str, section: str) -> Path:
+        """Get path to a world section file"""
+        return self.projects_dir / project_id / 'world' / f'{section}.json'
+
+    def season_path(self, project_id: str, season: int) -> Path:
+        """Get path to a season arcs file"""
+        return self.projects_dir / project_id / 'story' / f'season{season}_arcs.json'
+
+    def catalogue_path(self, project_id: str) -> Path:
+        """Get path to a project's season catalogue"""
+        return self.projects_dir / project_id / 'story' / self.CATALOGUE_FILE
+
+    # ------------------------------------------------------------------
+    # World sections
+    # ------------------------------------------------------------------
+
+    def read_section(self, project_id: str, section: str) -> Optional[Dict]:
+        section_file = self.section_path(project_id, section)
+        with self.locks.read(project_id):
+            signature, data = self.sections.get(project_id, section, section_file)
+            if data is not None:
+                return data
+            if signature is None:
+                return None
+
+            with open(section_file, 'rb') as f:
+                # Signature of the exact file parsed, in case it was replaced since
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+                data = loads(raw)
+            self.sections.put(project_id, section, (stat.st_ino, stat.st_mtime_ns, stat.st_size),
+                              data, sniff_format(raw))
+            return data
+
+    def write_section(self, project_id: str, section: str, data: Dict):
+        self.write_sections(project_id, {section: data})
+
+    def write_sections(self, project_id: str, sections: Dict[str, Dict]):
+        """Stage every section in a temp file first, then rename them into place"""
+        with self.locks.write(project_id):
+            try:
+                atomic_write_many(
+                    (self.section_path(project_id, section), data)
+                    for section, data in sections.items()
+                )
+            except Exception:
+                for section in sections:
+                    self.sections.discard(project_id, section)
+                raise
+
+            # Written in the default format; the file size is the payload length
+            fmt = get_default_format()
+            for section, data in sections.items():
+                self.sections.put(project_id, section, file_signature(self.section_path(project_id, section)),
+                                  data, fmt)
+                self.metadata.touch(project_id, section)
+
+    def section_exists(self, project_id: str, section: str) -> bool:
+        return self.section_path(project_id, section).exists()
+
+    def section_version(self, project_id: str, section: str):
+        return file_signature(self.section_path(project_id, section))
+
+    # ------------------------------------------------------------------
+    # Season files (used by the journal)
+    # ------------------------------------------------------------------
+
+    def _read_season_files(self, project_id: str) -> Dict[int, Dict]:
+        """Read every season file for a project in parallel, keyed by season number"""
+        story_dir = self.projects_dir / project_id / 'story'
+        seasons = {}
+
+        if not story_dir.exists():
+            return seasons
+
+        season_files = list(story_dir.glob('season*_arcs.json'))
+        for season_file, season_data in zip(season_files, self._map_files(self._read_season_file, season_files)):
+            if season_data is not None:
+                seasons[self._season_number(season_file, season_data)] = season_data
+
+        return seasons
+
+    def _read_season_file(self, season_file: Path) -> Optional[Dict]:
+        """Read one season file, or None if it can't be read"""
+        try:
+            return load_file(season_file)
+        except Exception as e:
+            print(f"Error loading {season_file}: {e}")
+            return None
+
+    def _map_files(self, func, paths: List[Path]) -> List:
+        """Apply func to each path, fanning out across the read pool"""
+        if len(paths) <= 1:
+            return [func(p) for p in paths]
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.MAX_READ_WORKERS,
+                thread_name_prefix='season-reader'
+            )
+        return list(self._pool.map(func, paths))
+
+    def _write_season_file(self, project_id: str, season: int, season_data: Dict):
+        """Write one season's data to its season file and record it in the catalogue"""
+        season_file = self.season_path(project_id, season)
+        atomic_write_json(season_file, season_data)
+
+        catalogue = self._read_catalogue_file(project_id)
+        catalogue[season] = self._catalogue_entry(season, season_file, season_data)
+        self._write_catalogue_file(project_id, catalogue)
+
+    # ------------------------------------------------------------------
+    # Season catalogue
+    # ------------------------------------------------------------------
+
+    def _catalogue_entry(self, season: int, season_file: Path, season_data: Dict) -> Dict:
+        """Catalogue record for one season file"""
+        stat = season_file.stat()
+        return {
+            'season': season,
+            'file': season_file.name,
+            'totalArcs': len(season_data.get('arcs', [])),
+            'lastUpdated': season_data.get('metadata', {}).get('lastUpdated'),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+
+    def _read_catalogue_file(self, project_id: str) -> Dict[int, Dict]:
+        """Read the catalogue as stored, without checking it against the season files"""
+        catalogue_file = self.catalogue_path(project_id)
+        try:
+            stored = load_file(catalogue_file)
+            return {int(season): entry for season, entry in stored.get('seasons', {}).items()}
+        except (FileNotFoundError, ValueError, AttributeError):
+            return {}
+
+    def _write_catalogue_file(self, project_id: str, catalogue: Dict[int, Dict]):
+        """Atomically replace the catalogue"""
+        atomic_write_json(
+            self.catalogue_path(project_id),
+            {'seasons': {str(k): v for k, v in sorted(catalogue.items())}}
+        )
+
+    def _season_signature(self, project_id: str):
+        """
+        Token that changes on every season write in any process
+
+        Every season write atomically replaces the catalogue, which gives it
+        a new inode and mtime.
+        """
+        try:
+            stat = self.catalogue_path(project_id).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load_catalogue(self, project_id: str) -> Dict[int, Dict]:
+        """
+        Get the season catalogue, repairing it if it has drifted
+
+        Each season file is only stat()ed; files whose size or mtime no
+        longer match their entry (edited by hand, written by an older
+        version, or missing from the catalogue) are re-read and recorded.
+        """
+        story_dir = self.projects_dir / project_id / 'story'
+        if not story_dir.exists():
+            return {}
+
+        stored = self._read_catalogue_file(project_id)
+        by_file = {entry['file']: entry for entry in stored.values()}
+
+        catalogue = {}
+        stale = []
+        for season_file in story_dir.glob('season*_arcs.json'):
+            entry = by_file.get(season_file.name)
+            stat = season_file.stat()
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                catalogue[entry['season']] = entry
+            else:
+                stale.append(season_file)
+
+        for season_file, season_data in zip(stale, self._map_files(self._read_season_file, stale)):
+            if season_data is not None:
+                season = self._season_number(season_file, season_data)
+                catalogue[season] = self._catalogue_entry(season, season_file, season_data)
+
+        if catalogue != stored:
+            self._write_catalogue_file(project_id, catalogue)
+
+        return catalogue
+
+    def _season_number(self, season_file: Path, season_data: Dict) -> int:
+        """Get season from metadata or fallback to filename parsing"""
+        season_num = season_data.get('metadata', {}).get('season')
+        if not season_num:
+            # Extract from filename: season1_arcs.json -> 1
+            match = re.search(r'season(\d+)_arcs\.json', str(season_file))
+            season_num = int(match.group(1)) if match else 1
+        return season_num
+
+    # ------------------------------------------------------------------
+    # Story arcs
+    # ------------------------------------------------------------------
+
+    def read_seasons(self, project_id: str) -> Dict[int, Dict]:
+        with self.locks.read(project_id):
+            state = self.journal.get_state(project_id)
+            return {season: self._copy_season(data) for season, data in state['seasons'].items()}
+
+    def read_season(self, project_id: str, season: int) -> Optional[Dict]:
+        with self.locks.read(project_id):
+            state = self.journal.get_state(project_id)
+            season_data = state['seasons'].get(season)
+            return self._copy_season(season_data) if season_data is not None else None
+
+    def write_season(self, project_id: str, season: int, season_data: Dict):
+        with self.locks.write(project_id):
+            arc_ids = self._check_season_ids(season, season_data)
+            for arc_id in arc_ids:
+                other = self.journal.find_season(project_id, arc_id)
+                if other is not None and other != season:
+                    # Folded into the other season's file by replace_season's compaction
+                    self.journal.delete_arc(project_id, other, arc_id)
+            self.journal.replace_season(project_id, season, season_data)
+        self.metadata.touch(project_id, 'arcs')
+
+    def season_summaries(self, project_id: str) -> List[Dict]:
+        with self.locks.read(project_id):
+            # Journaled changes not yet compacted are only visible in memory
+            if self.journal.is_loaded(project_id) or self.journal.has_pending_on_disk(project_id):
+                return super().season_summaries(project_id)
+
+            return [
+                {
+                    'season': season,
+                    'arcCount': entry['totalArcs'],
+                    'lastUpdated': entry['lastUpdated']
+                }
+                for season, entry in sorted(self.load_catalogue(project_id).items())
+            ]
+
+    def arcs_version(self, project_id: str):
+        with self.locks.read(project_id):
+            return self.journal.version(project_id)
+
+    def arc_season(self, project_id: str, arc_id: str) -> Optional[int]:
+        with self.locks.read(project_id):
+            return self.journal.find_season(project_id, arc_id)
+
+    def get_arc(self, project_id: str, arc_id: str) -> Optional[Dict]:
+        with self.locks.read(project_id):
+            state = self.journal.get_state(project_id)
+            season = state['locations'].get(arc_id)
+            if season is None:
+                return None
+
+            for arc in state['seasons'][season].get('arcs', []):
+                if arc['id'] == arc_id:
+                    return arc
+            return None
+
+    def put_arc(self, project_id: str, season: int, arc: Dict):
+        with self.locks.write(project_id):
+            self._arc_conflict(arc['id'], season, self.journal.find_season(project_id, arc['id']))
+            self.journal.put_arc(project_id, season, arc)
+        self.metadata.touch(project_id, 'arcs')
+
+    def delete_arc(self, project_id: str, season: int, arc_id: str):
+        with self.locks.write(project_id):
+            self.journal.delete_arc(project_id, season, arc_id)
+        self.metadata.touch(project_id, 'arcs')
+
+    def _copy_season(self, season_data: Dict) -> Dict:
+        """Shallow copy so callers can't reorder the materialised arc lists"""
+        return {
+            'arcs': list(season_data.get('arcs', [])),
+            'metadata': dict(season_data.get('metadata', {}))
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def flush(self, project_id: Optional[str] = None):
+        if self._journal is not None:
+            if project_id is None:
+                self._journal.flush_all()
+            else:
+                with self.locks.write(project_id):
+                    self._journal.compact(project_id)
+        super().flush(project_id)
+
+    def forget(self, project_id: str):
+        super().forget(project_id)
+        self.sections.forget(project_id)
+        if self._journal is not None:
+            self._journal.forget(project_id)
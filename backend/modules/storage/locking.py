@@ -0,0 +1,178 @@
+"""
+Project Locking
+Per-project reader/writer locks that hold across threads and processes
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+class ReadWriteLock:
+    """
+    Reentrant reader/writer lock
+
+    Any number of threads may read at once; a writer excludes everyone else.
+    A thread holding the write lock may also take the read lock (and nest
+    either). Upgrading a read lock to a write lock is not allowed because two
+    upgrading readers would deadlock; take the write lock up front instead.
+    Waiting writers block new readers so writers cannot starve.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            self._readers[me] -= 1
+            if not self._readers[me]:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError('Cannot upgrade a read lock to a write lock')
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+
+class ProjectLock:
+    """
+    Reader/writer lock for one project
+
+    In-process exclusion comes from a ReadWriteLock. Cross-process exclusion
+    comes from flock() on a lock file: the first in-process holder takes a
+    shared (read) or exclusive (write) file lock and the last one releases it.
+    """
+
+    def __init__(self, lock_file: Path):
+        self.lock_file = lock_file
+        self._rw = ReadWriteLock()
+        self._file_mutex = threading.Lock()
+        self._fd: Optional[int] = None
+        self._holders = 0
+
+    def _enter_file(self, exclusive: bool):
+        with self._file_mutex:
+            if self._holders == 0 and fcntl is not None:
+                self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                except Exception:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise
+            self._holders += 1
+
+    def _exit_file(self):
+        with self._file_mutex:
+            self._holders -= 1
+            if self._holders == 0 and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+
+    @contextmanager
+    def read(self):
+        """Hold the project for reading (shared)"""
+        self._rw.acquire_read()
+        try:
+            self._enter_file(exclusive=False)
+            try:
+                yield
+            finally:
+                self._exit_file()
+        finally:
+            self._rw.release_read()
+
+    @contextmanager
+    def write(self):
+        """Hold the project for writing (exclusive)"""
+        self._rw.acquire_write()
+        try:
+            self._enter_file(exclusive=True)
+            try:
+                yield
+            finally:
+                self._exit_file()
+        finally:
+            self._rw.release_write()
+
+
+# One ProjectLock per lock file per process. flock() treats two descriptors
+# of the same file as separate owners, so two storage objects in the same
+# process (e.g. the migrator's source and target) must share a lock.
+_project_locks: Dict[str, ProjectLock] = {}
+_project_locks_mutex = threading.Lock()
+
+
+class ProjectLocks:
+    """
+    Per-project locks for a projects directory
+
+    Lock files live in <projects_dir>/.locks so that taking a read lock on a
+    project that doesn't exist never creates its directory.
+    """
+
+    LOCK_DIR = '.locks'
+
+    def __init__(self, projects_dir: Path):
+        self.lock_dir = Path(projects_dir).resolve() / self.LOCK_DIR
+
+    def get(self, project_id: str) -> ProjectLock:
+        lock_file = self.lock_dir / f'{project_id}.lock'
+        with _project_locks_mutex:
+            lock = _project_locks.get(str(lock_file))
+            if lock is None:
+                lock = ProjectLock(lock_file)
+                _project_locks[str(lock_file)] = lock
+            return lock
+
+    def read(self, project_id: str):
+        """Context manager: shared lock on a project"""
+        return self.get(project_id).read()
+
+    def write(self, project_id: str):
+        """Context manager: exclusive lock on a project"""
+        return self.get(project_id).write()
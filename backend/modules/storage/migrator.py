@@ -0,0 +1,121 @@
+"""
+Storage Migrator
+Copies projects from one storage backend to another (e.g. JSON files -> SQLite)
+
+Usage (from the backend directory):
+    python -m modules.storage.migrator ../projects [project_id ...]
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from .base import WORLD_SECTIONS, StorageBackend
+from .json_storage import JsonStorage
+
+
+def migrate_project(projects_dir: Path,
+                    project_id: str,
+                    target: StorageBackend,
+                    source: Optional[StorageBackend] = None) -> Dict:
+    """
+    Copy one project's world sections and seasons into another backend
+
+    World sections are written in a single multi-section write so the
+    target sees either all of them or none of them.
+
+    Args:
+        projects_dir: Base projects directory
+        project_id: Project to migrate
+        target: Backend to copy into
+        source: Backend to copy from (defaults to the JSON file layout)
+
+    Returns:
+        Dict with success status and migrated counts
+    """
+    source = source or JsonStorage(projects_dir)
+
+    sections = {}
+    for section in WORLD_SECTIONS:
+        data = source.read_section(project_id, section)
+        if data is not None:
+            sections[section] = data
+
+    if sections:
+        target.write_sections(project_id, sections)
+
+    seasons = source.read_seasons(project_id)
+    _check_arc_ids(seasons)
+    arc_count = 0
+    for season, season_data in sorted(seasons.items()):
+        target.write_season(project_id, season, season_data)
+        arc_count += len(season_data.get('arcs', []))
+
+    return {
+        'success': True,
+        'project_id': project_id,
+        'sections': len(sections),
+        'seasons': len(seasons),
+        'arcs': arc_count
+    }
+
+
+def _check_arc_ids(seasons: Dict[int, Dict]):
+    """
+    Refuse to migrate arcs whose ids repeat across seasons
+
+    The JSON layout tolerates them, but arc ids are unique per project and
+    writing the later season would move the arc out of the earlier one.
+    """
+    first_season = {}
+    repeated = []
+    for season, season_data in sorted(seasons.items()):
+        for arc in season_data.get('arcs', []):
+            if arc['id'] in first_season and first_season[arc['id']] != season:
+                repeated.append(f"{arc['id']} (seasons {first_season[arc['id']]} and {season})")
+            first_season.setdefault(arc['id'], season)
+    if repeated:
+        raise ValueError(f"Arc IDs used in more than one season: {', '.join(repeated)}; rename them before migrating")
+
+
+def migrate_all(projects_dir: Path, target: StorageBackend) -> Dict:
+    """Migrate every project under projects_dir"""
+    results = []
+    for project_path in sorted(projects_dir.iterdir()):
+        if project_path.is_dir() and (project_path / 'project_metadata.json').exists():
+            try:
+                results.append(migrate_project(projects_dir, project_path.name, target))
+            except Exception as e:
+                results.append({
+                    'success': False,
+                    'project_id': project_path.name,
+                    'error': str(e)
+                })
+
+    return {
+        'success': all(r['success'] for r in results),
+        'projects': results
+    }
+
+
+if __name__ == '__main__':
+    from .sqlite_storage import SQLiteStorage
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    base_dir = Path(sys.argv[1])
+    sqlite_storage = SQLiteStorage(base_dir)
+
+    if len(sys.argv) > 2:
+        outcome = [migrate_project(base_dir, pid, sqlite_storage) for pid in sys.argv[2:]]
+    else:
+        outcome = migrate_all(base_dir, sqlite_storage)['projects']
+
+    for entry in outcome:
+        if entry['success']:
+            print(f"✓ {entry['project_id']}: {entry['sections']} sections, "
+                  f"{entry['seasons']} seasons, {entry['arcs']} arcs")
+        else:
+            print(f"✗ {entry['project_id']}: {entry['error']}")
@@ -0,0 +1,299 @@
+"""
+Project Catalogue
+SQLite index of project metadata for listing, sorting, search and pagination
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .serialization import load_file
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    genre TEXT NOT NULL DEFAULT 'General',
+    created TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_last_modified ON projects (last_modified, id);
+CREATE INDEX IF NOT EXISTS projects_created ON projects (created, id);
+CREATE INDEX IF NOT EXISTS projects_title ON projects (title COLLATE NOCASE, id);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+METADATA_FILE = 'project_metadata.json'
+
+# Sort name -> (column expression, default order)
+SORTS = {
+    'lastModified': ('last_modified', 'desc'),
+    'created': ('created', 'desc'),
+    'title': ('title COLLATE NOCASE', 'asc')
+}
+
+
+def _signature(path: Path) -> Optional[str]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def _like(text: str) -> str:
+    """LIKE pattern matching text anywhere, with wildcards escaped"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+class ProjectCatalogue:
+    """
+    One row per project, kept in step with project_metadata.json files
+
+    Creating and deleting projects and flushing metadata update the
+    catalogue directly. Changes made behind its back are caught by
+    reconciliation:
+        - if the projects directory's mtime changed (a project folder was
+          added or removed), folder names are diffed against the rows
+        - every VERIFY_INTERVAL seconds, or on request, every metadata
+          file is stat()ed and rows whose file changed are re-read
+
+    The database sits in its own folder so its WAL files never touch the
+    projects directory's mtime.
+    """
+
+    DB_DIR = '.catalogue'
+    DB_FILE = 'projects.db'
+
+    # Seconds between full stat() passes over every metadata file
+    VERIFY_INTERVAL = 300.0
+    # A directory mtime this recent may hide a second change in the same tick
+    MTIME_SETTLE_NS = 2_000_000_000
+
+    def __init__(self, projects_dir: Path):
+        self.projects_dir = projects_dir
+        # sqlite3 connections must stay on the thread that created them
+        self._local = threading.local()
+        self._last_verified = 0.0
+
+    def db_path(self) -> Path:
+        return self.projects_dir / self.DB_DIR / self.DB_FILE
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            db_file = self.db_path()
+            db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(db_file, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def upsert(self, metadata: Dict):
+        """Record a project from its metadata"""
+        self._upsert_rows(self._connect(), [metadata])
+
+    def remove(self, project_id: str):
+        """Drop a project"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+
+    def _upsert_rows(self, conn: sqlite3.Connection, rows: List[Dict]):
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        m['id'],
+                        m['title'],
+                        m.get('description', ''),
+                        m.get('genre', 'General'),
+                        m['created'],
+                        m.get('lastModified', m['created']),
+                        _signature(self.projects_dir / m['id'] / METADATA_FILE)
+                    )
+                    for m in rows
+                ]
+            )
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def sync(self, verify: bool = False):
+        """
+        Reconcile the catalogue with the projects directory
+
+        Args:
+            verify: Also stat() every metadata file (done anyway every
+                VERIFY_INTERVAL seconds)
+        """
+        conn = self._connect()
+        verify = verify or time.monotonic() - self._last_verified >= self.VERIFY_INTERVAL
+
+        try:
+            dir_mtime = self.projects_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        row = conn.execute("SELECT value FROM state WHERE key = 'dir_mtime'").fetchone()
+        if not verify and row is not None and row[0] == dir_mtime:
+            return
+
+        known = dict(conn.execute('SELECT id, signature FROM projects'))
+        present = self._project_folders()
+
+        stale = [pid for pid in present if pid not in known]
+        if verify:
+            stale += [
+                pid for pid in present
+                if pid in known and known[pid] != _signature(self.projects_dir / pid / METADATA_FILE)
+            ]
+
+        fresh = []
+        for project_id in stale:
+            try:
+                metadata = load_file(self.projects_dir / project_id / METADATA_FILE)
+                if metadata.get('id') == project_id:
+                    fresh.append(metadata)
+            except Exception:
+                # Corrupted metadata: leave the project out, as listing always has
+                pass
+
+        with conn:
+            gone = [(pid,) for pid in known if pid not in present]
+            conn.executemany('DELETE FROM projects WHERE id = ?', gone)
+        self._upsert_rows(conn, fresh)
+
+        settled = dir_mtime is not None and time.time_ns() - dir_mtime > self.MTIME_SETTLE_NS
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state VALUES ('dir_mtime', ?)",
+                (dir_mtime if settled else None,)
+            )
+        if verify:
+            self._last_verified = time.monotonic()
+
+    def _project_folders(self) -> set:
+        """Names of folders that hold a project_metadata.json"""
+        if not self.projects_dir.exists():
+            return set()
+        return {
+            entry.name
+            for entry in os.scandir(self.projects_dir)
+            if entry.is_dir() and not entry.name.startswith('.')
+            and os.path.exists(os.path.join(entry.path, METADATA_FILE))
+        }
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self,
+              search: Optional[str] = None,
+              genre: Optional[str] = None,
+              sort: str = 'lastModified',
+              order: Optional[str] = None,
+              cursor: Optional[str] = None,
+              limit: Optional[int] = None) -> Dict:
+        """
+        One page of projects
+
+        Args:
+            search: Case-insensitive substring of the title or genre
+            genre: Exact genre (case-insensitive)
+            sort: 'lastModified', 'created' or 'title'
+            order: 'asc' or 'desc' (default depends on sort)
+            cursor: next_cursor from the previous page
+            limit: Page size (None = no limit)
+
+        Returns:
+            Dict with the page of projects, total matches and next_cursor
+
+        Raises:
+            ValueError: On an unknown sort or order, or a malformed cursor
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort: {sort} (expected one of {', '.join(SORTS)})")
+        column, default_order = SORTS[sort]
+        order = order or default_order
+        if order not in ('asc', 'desc'):
+            raise ValueError(f'Unknown order: {order}')
+
+        where, params = [], []
+        if search:
+            where.append("(title LIKE ? ESCAPE '\\' OR genre LIKE ? ESCAPE '\\')")
+            params += [_like(search), _like(search)]
+        if genre:
+            where.append('genre = ? COLLATE NOCASE')
+            params.append(genre)
+
+        conn = self._connect()
+        condition = f"WHERE {' AND '.join(where)}" if where else ''
+        total = conn.execute(f'SELECT COUNT(*) FROM projects {condition}', params).fetchone()[0]
+
+        if cursor:
+            value, last_id = self._decode_cursor(cursor)
+            op = '<' if order == 'desc' else '>'
+            where.append(f'({column} {op} ? OR ({column} = ? AND id {op} ?))')
+            params += [value, value, last_id]
+            condition = f"WHERE {' AND '.join(where)}"
+
+        sql = (
+            'SELECT id, title, description, genre, created, last_modified FROM projects '
+            f'{condition} ORDER BY {column} {order}, id {order}'
+        )
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit + 1)
+        rows = conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            key = {'lastModified': last[5], 'created': last[4], 'title': last[1]}[sort]
+            next_cursor = self._encode_cursor(key, last[0])
+
+        return {
+            'projects': [
+                {
+                    'id': r[0],
+                    'title': r[1],
+                    'description': r[2],
+                    'genre': r[3],
+                    'created': r[4],
+                    'lastModified': r[5]
+                }
+                for r in rows
+            ],
+            'total': total,
+            'next_cursor': next_cursor
+        }
+
+    @staticmethod
+    def _encode_cursor(value: str, project_id: str) -> str:
+        """'id:value' (project ids never contain ':', sort values may)"""
+        return f'{project_id}:{value}'
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        project_id, sep, value = cursor.partition(':')
+        if not sep or not project_id:
+            raise ValueError(f'Invalid cursor: {cursor}')
+        return value, project_id
@@ -0,0 +1,177 @@
+"""
+Project Metadata
+Debounced lastModified and per-section update counters for project_metadata.json
+"""
+
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from .fileio import atomic_write_json
+from .locking import ProjectLocks
+from .project_catalogue import ProjectCatalogue
+from .serialization import load_file
+
+
+class ProjectMetadata:
+    """
+    Records which projects changed and folds that into their metadata files
+    in the background
+
+    Storage writes call touch(), which only updates an in-memory entry.
+    A project is flushed once it has been quiet for DEBOUNCE seconds, or
+    MAX_DELAY seconds after its first pending change if edits keep coming,
+    so a burst of saves costs one metadata write. Each flush re-reads the
+    file under the project's write lock and adds its counts to the stored
+    ones, so several processes can share a project without losing updates.
+    """
+
+    METADATA_FILE = 'project_metadata.json'
+
+    # Flush after this many seconds without a change...
+    DEBOUNCE = 1.0
+    # ...but never later than this after the first pending change
+    MAX_DELAY = 10.0
+
+    def __init__(self, projects_dir: Path, locks: ProjectLocks, catalogue: Optional[ProjectCatalogue] = None):
+        self.projects_dir = projects_dir
+        self.locks = locks
+        self.catalogue = catalogue
+        self._lock = threading.Lock()
+        # project_id -> {'first': monotonic, 'last': monotonic, 'lastModified': iso, 'counts': Counter}
+        self._pending: Dict[str, Dict] = {}
+        self._wake = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        atexit.register(self.flush)
+
+    def metadata_path(self, project_id: str) -> Path:
+        return self.projects_dir / project_id / self.METADATA_FILE
+
+    def touch(self, project_id: str, section: str):
+        """
+        Record a change to a project
+
+        Args:
+            project_id: Project ID
+            section: What changed: a world section name or 'arcs'
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(project_id)
+            if entry is None:
+                entry = self._pending[project_id] = {'first': now, 'counts': Counter()}
+                self._wake.set()
+            entry['last'] = now
+            entry['lastModified'] = datetime.now().isoformat()
+            entry['counts'][section] += 1
+        self._ensure_worker()
+
+    def apply_pending(self, project_id: str, metadata: Dict) -> Dict:
+        """Metadata as it will read once pending changes are flushed"""
+        with self._lock:
+            entry = self._pending.get(project_id)
+            if entry is None:
+                return metadata
+            metadata = dict(metadata, lastModified=entry['lastModified'])
+            counts = Counter(metadata.get('sectionUpdates', {}))
+            counts.update(entry['counts'])
+        metadata['sectionUpdates'] = dict(counts)
+        return metadata
+
+    def flush(self, project_id: Optional[str] = None, due_only: bool = False):
+        """
+        Write pending changes to the metadata files
+
+        Args:
+            project_id: Only this project (default: every project)
+            due_only: Skip projects still inside their debounce window
+        """
+        now = time.monotonic()
+        with self._lock:
+            project_ids = [
+                pid for pid, entry in self._pending.items()
+                if (project_id is None or pid == project_id)
+                and (not due_only or self._due_at(entry) <= now)
+            ]
+
+        for pid in project_ids:
+            try:
+                self._flush_project(pid)
+            except Exception as e:
+                print(f"Error updating metadata for {pid}: {e}")
+
+    def forget(self, project_id: str):
+        """Drop a project's pending changes (e.g. after deletion)"""
+        with self._lock:
+            self._pending.pop(project_id, None)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def _due_at(self, entry: Dict) -> float:
+        return min(entry['last'] + self.DEBOUNCE, entry['first'] + self.MAX_DELAY)
+
+    def _flush_project(self, project_id: str):
+        with self.locks.write(project_id):
+            with self._lock:
+                entry = self._pending.pop(project_id, None)
+            if entry is None:
+                return
+
+            metadata_file = self.metadata_path(project_id)
+            if not metadata_file.exists():
+                # Deleted (or never created): nothing to record into
+                return
+
+            try:
+                metadata = load_file(metadata_file)
+                metadata['lastModified'] = entry['lastModified']
+                counts = Counter(metadata.get('sectionUpdates', {}))
+                counts.update(entry['counts'])
+                metadata['sectionUpdates'] = dict(counts)
+                atomic_write_json(metadata_file, metadata)
+            except Exception:
+                self._requeue(project_id, entry)
+                raise
+
+            if self.catalogue is not None:
+                self.catalogue.upsert(metadata)
+
+    def _requeue(self, project_id: str, entry: Dict):
+        """Merge a failed flush back into whatever was recorded since"""
+        with self._lock:
+            current = self._pending.get(project_id)
+            if current is None:
+                # Retry after a fresh debounce window rather than immediately
+                entry['first'] = entry['last'] = time.monotonic()
+                self._pending[project_id] = entry
+            else:
+                current['counts'].update(entry['counts'])
+
+    def _ensure_worker(self):
+        """Start the background flusher on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._flush_loop,
+                        name='project-metadata-flusher',
+                        daemon=True
+                    )
+                    self._worker.start()
+
+    def _flush_loop(self):
+        """Sleep until the earliest project is due, flush what is due, repeat"""
+        while True:
+            with self._lock:
+                due = [self._due_at(entry) for entry in self._pending.values()]
+            timeout = max(0.0, min(due) - time.monotonic()) if due else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            self.flush(due_only=True)
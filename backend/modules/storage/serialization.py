@@ -0,0 +1,150 @@
+"""
+Serialization
+One encoder/decoder for every stored document, with a choice of on-disk format
+
+Formats:
+    pretty  - indented JSON, for hand editing and exports
+    compact - JSON without whitespace (default)
+    msgpack - MessagePack binary (requires the msgpack package)
+
+orjson is used for JSON when installed, falling back to the standard
+library. Readers detect the format from the first byte, so files written
+in different formats can sit side by side and switching format never
+requires a migration.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # standard library json is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # the msgpack format is unavailable without it
+    msgpack = None
+
+
+FORMATS = ('pretty', 'compact', 'msgpack')
+DEFAULT_FORMAT = 'compact'
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+_default_format = DEFAULT_FORMAT
+
+
+class DecodeError(ValueError):
+    """Stored bytes could not be decoded"""
+
+
+def check_format(fmt: str) -> str:
+    """Validate a format name, raising ValueError if unknown or unavailable"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if fmt == 'msgpack' and msgpack is None:
+        raise ValueError('The msgpack storage format requires the msgpack package')
+    return fmt
+
+
+def set_default_format(fmt: str):
+    """Set the format used when a writer doesn't ask for one"""
+    global _default_format
+    _default_format = check_format(fmt)
+
+
+def get_default_format() -> str:
+    return _default_format
+
+
+def _json_bytes(data: Any, pretty: bool) -> bytes:
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(data, option=options)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the standard library copes
+    if pretty:
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return text.encode('utf-8')
+
+
+def dumps(data: Any, fmt: Optional[str] = None) -> bytes:
+    """
+    Encode a document
+
+    Args:
+        data: JSON-compatible value
+        fmt: 'pretty', 'compact' or 'msgpack' (defaults to the configured format)
+    """
+    fmt = check_format(fmt or _default_format)
+    if fmt == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True)
+    return _json_bytes(data, pretty=fmt == 'pretty')
+
+
+def dumps_text(data: Any) -> str:
+    """Compact JSON text, for values that must stay JSON (SQLite rows, journal lines)"""
+    return _json_bytes(data, pretty=False).decode('utf-8')
+
+
+def loads(raw) -> Any:
+    """
+    Decode a document in any supported format
+
+    Raises:
+        DecodeError: If the bytes are not valid JSON or MessagePack
+    """
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    if raw.startswith(_UTF8_BOM):
+        raw = raw[len(_UTF8_BOM):]
+
+    # JSON text always starts with an ASCII byte; MessagePack maps and arrays never do
+    if raw[:1] and raw[0] >= 0x80:
+        if msgpack is None:
+            raise DecodeError('Document is MessagePack but the msgpack package is not installed')
+        try:
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+        except Exception as e:
+            raise DecodeError(f'Invalid MessagePack: {e}') from e
+
+    try:
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError as e:
+        raise DecodeError(f'Invalid JSON: {e}') from e
+
+
+def sniff_format(raw: bytes) -> str:
+    """
+    Guess which format encoded bytes were written in
+
+    A heuristic for estimates only: JSON whose first value is followed by a
+    line break is taken to be pretty-printed.
+    """
+    if raw.startswith(_UTF8_BOM):
+        raw = raw[len(_UTF8_BOM):]
+    if raw[:1] and raw[0] >= 0x80:
+        return 'msgpack'
+    return 'pretty' if raw[1:2] in (b'\n', b'\r') else 'compact'
+
+
+def content_hash(data: Any) -> str:
+    """
+    Stable digest of a JSON-compatible value, for change detection
+
+    Keys are sorted and the standard library encoder is always used, so the
+    digest doesn't depend on key order or on whether orjson is installed.
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_file(path: Path) -> Any:
+    """Read and decode a stored document"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
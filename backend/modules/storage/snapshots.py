@@ -0,0 +1,384 @@
+"""
+Project Snapshots
+Content-addressed history of a project's world sections and seasons
+"""
+
+import hashlib
+import os
+import re
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .base import ENTITY_LISTS, WORLD_SECTIONS, StorageBackend
+from .fileio import atomic_write_bytes, atomic_write_json
+from .serialization import DecodeError, dumps, load_file, loads
+from .templates import section_template
+
+
+_SNAPSHOT_ID = re.compile(r'\d{8}T\d{12}-[0-9a-f]{8}')
+
+
+class SnapshotStore:
+    """
+    Snapshots stored under <project>/.history
+
+    Every document (a world section, or one season's arcs) is stored once
+    as a zlib-compressed blob named by the SHA-256 of its encoding, in
+    objects/<2 hex>/<rest>. A snapshot is a small manifest mapping
+    document paths ('world/characters', 'story/season2') to blob hashes,
+    so snapshots share every document they have in common and comparing
+    two snapshots only loads the documents whose hashes differ.
+
+    Each manifest also records the storage version tokens its documents
+    were read at. The next snapshot reuses the hash of any document whose
+    token hasn't moved, without reading it, so snapshotting an unchanged
+    project reads no documents and writes nothing.
+
+    Sections still at their template and seasons without arcs count as
+    absent, so a project restored to a point before they existed compares
+    equal to that point.
+    """
+
+    HISTORY_DIR = '.history'
+
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+
+    def history_path(self, project_id: str):
+        return self.storage.projects_dir / project_id / self.HISTORY_DIR
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def snapshot(self, project_id: str, label: str = '', reason: str = 'manual') -> Dict:
+        """
+        Record the project's current world and arcs
+
+        Args:
+            project_id: Project ID
+            label: Optional note shown in the history
+            reason: What triggered it ('manual', 'build-from-summary', ...)
+
+        Returns:
+            Dict with success status, the snapshot summary and whether a new
+            snapshot was created (False if nothing changed since the latest)
+        """
+        if not self.storage.project_exists(project_id):
+            return {
+                'success': False,
+                'error': 'Project not found'
+            }
+
+        with self.storage.locks.read(project_id):
+            base = self._latest(project_id)
+            entries, versions, blobs = self._collect(project_id, base)
+
+        if base is not None and entries == base['entries']:
+            return {
+                'success': True,
+                'created': False,
+                'snapshot': self._summary(base)
+            }
+
+        for digest, raw in blobs.items():
+            self._write_blob(project_id, digest, raw)
+
+        now = datetime.utcnow()
+        fingerprint = hashlib.sha256(dumps(sorted(entries.items()), 'compact')).hexdigest()
+        manifest = {
+            'id': f"{now.strftime('%Y%m%dT%H%M%S%f')}-{fingerprint[:8]}",
+            'created': now.isoformat() + 'Z',
+            'label': label,
+            'reason': reason,
+            'parent': base['id'] if base is not None else None,
+            'entries': entries,
+            'versions': versions
+        }
+        atomic_write_json(self.history_path(project_id) / 'snapshots' / f"{manifest['id']}.json", manifest)
+
+        return {
+            'success': True,
+            'created': True,
+            'snapshot': self._summary(manifest)
+        }
+
+    def list_snapshots(self, project_id: str) -> List[Dict]:
+        """Snapshot summaries, newest first"""
+        return [
+            self._summary(manifest)
+            for manifest in (self._read_manifest(project_id, sid) for sid in reversed(self._ids(project_id)))
+            if manifest is not None
+        ]
+
+    def get_snapshot(self, project_id: str, snapshot_id: str) -> Optional[Dict]:
+        """A snapshot's summary and document hashes, or None if it doesn't exist"""
+        manifest = self._read_manifest(project_id, snapshot_id)
+        if manifest is None:
+            return None
+        return dict(self._summary(manifest), entries=manifest['entries'])
+
+    # ------------------------------------------------------------------
+    # Diff and restore
+    # ------------------------------------------------------------------
+
+    def diff(self, project_id: str, from_id: str, to_id: Optional[str] = None) -> Dict:
+        """
+        Compare a snapshot with another one, or with the current project
+
+        Args:
+            project_id: Project ID
+            from_id: Older snapshot
+            to_id: Newer snapshot (default: the project as it is now)
+
+        Returns:
+            Dict with one change per differing document: its path, status
+            (added/removed/modified) and, for modified documents, the
+            entity/arc ids added, removed or modified (or, for
+            world_overview, the changed fields)
+        """
+        old = self._read_manifest(project_id, from_id)
+        if old is None:
+            return {
+                'success': False,
+                'error': f'Snapshot not found: {from_id}'
+            }
+
+        if to_id is None:
+            with self.storage.locks.read(project_id):
+                new_entries, _, pending = self._collect(project_id, self._latest(project_id))
+        else:
+            new = self._read_manifest(project_id, to_id)
+            if new is None:
+                return {
+                    'success': False,
+                    'error': f'Snapshot not found: {to_id}'
+                }
+            new_entries, pending = new['entries'], {}
+
+        changes = []
+        for path in sorted(set(old['entries']) | set(new_entries)):
+            before, after = old['entries'].get(path), new_entries.get(path)
+            if before == after:
+                continue
+            if before is None:
+                changes.append({'path': path, 'status': 'added'})
+            elif after is None:
+                changes.append({'path': path, 'status': 'removed'})
+            else:
+                changes.append({
+                    'path': path,
+                    'status': 'modified',
+                    **self._diff_documents(
+                        path,
+                        self._read_blob(project_id, before),
+                        self._read_blob(project_id, after, pending)
+                    )
+                })
+
+        return {
+            'success': True,
+            'from': from_id,
+            'to': to_id or 'current',
+            'changes': changes
+        }
+
+    def restore(self, project_id: str, snapshot_id: str) -> Dict:
+        """
+        Put the project's world and arcs back as they were in a snapshot
+
+        The current state is snapshotted first (reason 'before-restore'),
+        so a restore can itself be undone. Only documents that differ are
+        written. Seasons the snapshot doesn't have are emptied.
+
+        Returns:
+            Dict with success status, the backup snapshot id and the
+            sections and seasons that were rewritten
+        """
+        target = self._read_manifest(project_id, snapshot_id)
+        if target is None:
+            return {
+                'success': False,
+                'error': f'Snapshot not found: {snapshot_id}'
+            }
+
+        with self.storage.locks.write(project_id):
+            backup = self.snapshot(project_id, reason='before-restore')
+            if not backup['success']:
+                return backup
+            current = self._read_manifest(project_id, backup['snapshot']['id'])['entries']
+            wanted = target['entries']
+
+            sections = {}
+            for section in WORLD_SECTIONS:
+                path = f'world/{section}'
+                if wanted.get(path) == current.get(path):
+                    continue
+                if path in wanted:
+                    sections[section] = self._read_blob(project_id, wanted[path])
+                else:
+                    sections[section] = section_template(section)
+            if sections:
+                self.storage.write_sections(project_id, sections)
+
+            seasons = []
+            story_paths = {p for p in set(wanted) | set(current) if p.startswith('story/')}
+            for path in sorted(story_paths, key=self._season_of):
+                if wanted.get(path) == current.get(path):
+                    continue
+                season = self._season_of(path)
+                if path in wanted:
+                    season_data = self._read_blob(project_id, wanted[path])
+                else:
+                    season_data = {
+                        'arcs': [],
+                        'metadata': {'season': season, 'totalArcs': 0, 'totalSeasons': 1}
+                    }
+                self.storage.write_season(project_id, season, season_data)
+                seasons.append(season)
+
+        return {
+            'success': True,
+            'restored': snapshot_id,
+            'backup': backup['snapshot']['id'],
+            'sections': sorted(sections),
+            'seasons': seasons
+        }
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+
+    def _collect(self, project_id: str, base: Optional[Dict]) -> Tuple[Dict, Dict, Dict]:
+        """
+        Hash the current documents, reusing base's hashes where the
+        version token hasn't moved
+
+        Must be called under the project's read lock. Each version is
+        taken before its document is read, so a concurrent write can only
+        make the recorded token older than the content, never newer.
+
+        Returns:
+            (entries, versions, {hash: encoded document} for documents read)
+        """
+        base_entries = base['entries'] if base is not None else {}
+        base_versions = base.get('versions', {}) if base is not None else {}
+        entries, versions, blobs = {}, {}, {}
+
+        for section in WORLD_SECTIONS:
+            path = f'world/{section}'
+            versions[path] = repr(self.storage.section_version(project_id, section))
+            if versions[path] == base_versions.get(path):
+                if path in base_entries:
+                    entries[path] = base_entries[path]
+                continue
+            data = self.storage.read_section(project_id, section)
+            if data is not None and data != section_template(section):
+                self._add(entries, blobs, path, data)
+
+        versions['story'] = repr(self.storage.arcs_version(project_id))
+        if versions['story'] == base_versions.get('story'):
+            entries.update((p, d) for p, d in base_entries.items() if p.startswith('story/'))
+        else:
+            for summary in self.storage.season_summaries(project_id):
+                season_data = self.storage.read_season(project_id, summary['season'])
+                if season_data and season_data.get('arcs'):
+                    self._add(entries, blobs, f"story/season{summary['season']}", season_data)
+
+        return entries, versions, blobs
+
+    def _add(self, entries: Dict, blobs: Dict, path: str, data: Dict):
+        raw = dumps(data, 'compact')
+        digest = hashlib.sha256(raw).hexdigest()
+        entries[path] = digest
+        blobs[digest] = raw
+
+    @staticmethod
+    def _season_of(path: str) -> int:
+        return int(path[len('story/season'):])
+
+    # ------------------------------------------------------------------
+    # Object store
+    # ------------------------------------------------------------------
+
+    def _blob_path(self, project_id: str, digest: str):
+        return self.history_path(project_id) / 'objects' / digest[:2] / digest[2:]
+
+    def _write_blob(self, project_id: str, digest: str, raw: bytes):
+        """Store a document unless a blob with its hash already exists"""
+        path = self._blob_path(project_id, digest)
+        if not path.exists():
+            atomic_write_bytes(path, zlib.compress(raw))
+
+    def _read_blob(self, project_id: str, digest: str, pending: Optional[Dict] = None):
+        if pending and digest in pending:
+            return loads(pending[digest])
+        with open(self._blob_path(project_id, digest), 'rb') as f:
+            return loads(zlib.decompress(f.read()))
+
+    # ------------------------------------------------------------------
+    # Manifests
+    # ------------------------------------------------------------------
+
+    def _ids(self, project_id: str) -> List[str]:
+        """Snapshot ids, oldest first (ids start with their UTC timestamp)"""
+        snapshots_dir = self.history_path(project_id) / 'snapshots'
+        if not snapshots_dir.is_dir():
+            return []
+        return sorted(
+            name[:-5] for name in os.listdir(snapshots_dir)
+            if name.endswith('.json') and _SNAPSHOT_ID.fullmatch(name[:-5])
+        )
+
+    def _latest(self, project_id: str) -> Optional[Dict]:
+        for snapshot_id in reversed(self._ids(project_id)):
+            manifest = self._read_manifest(project_id, snapshot_id)
+            if manifest is not None:
+                return manifest
+        return None
+
+    def _read_manifest(self, project_id: str, snapshot_id: str) -> Optional[Dict]:
+        if not _SNAPSHOT_ID.fullmatch(snapshot_id or ''):
+            return None
+        try:
+            return load_file(self.history_path(project_id) / 'snapshots' / f'{snapshot_id}.json')
+        except (FileNotFoundError, DecodeError):
+            return None
+
+    @staticmethod
+    def _summary(manifest: Dict) -> Dict:
+        return {
+            'id': manifest['id'],
+            'created': manifest['created'],
+            'label': manifest.get('label', ''),
+            'reason': manifest.get('reason', 'manual'),
+            'parent': manifest.get('parent'),
+            'documents': len(manifest['entries'])
+        }
+
+    # ------------------------------------------------------------------
+    # Document diffs
+    # ------------------------------------------------------------------
+
+    def _diff_documents(self, path: str, before: Dict, after: Dict) -> Dict:
+        if path.startswith('story/'):
+            return self._diff_items(before.get('arcs', []), after.get('arcs', []), 'id')
+
+        section = path[len('world/'):]
+        if section in ENTITY_LISTS:
+            list_key, id_field = ENTITY_LISTS[section]
+            return self._diff_items(before.get(list_key, []), after.get(list_key, []), id_field)
+
+        keys = set(before) | set(after)
+        return {'fields': sorted(k for k in keys if before.get(k) != after.get(k))}
+
+    @staticmethod
+    def _diff_items(before: List[Dict], after: List[Dict], id_field: str) -> Dict:
+        old = {item.get(id_field): item for item in before if isinstance(item, dict) and item.get(id_field)}
+        new = {item.get(id_field): item for item in after if isinstance(item, dict) and item.get(id_field)}
+        return {
+            'added': [i for i in new if i not in old],
+            'removed': [i for i in old if i not in new],
+            'modified': [i for i in new if i in old and old[i] != new[i]]
+        }
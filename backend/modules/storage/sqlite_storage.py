@@ -0,0 +1,618 @@
+"""
+SQLite Storage
+Entity-level rows in a per-project SQLite database (WAL mode)
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .base import ENTITY_LISTS, StorageBackend
+from .serialization import dumps_text, loads
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    section TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS entities (
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    entity_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (section, position)
+);
+CREATE INDEX IF NOT EXISTS idx_entities_id ON entities (entity_id);
+CREATE INDEX IF NOT EXISTS idx_entities_section_id ON entities (section, entity_id);
+
+CREATE TABLE IF NOT EXISTS seasons (
+    season INTEGER PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS arcs (
+    arc_id TEXT PRIMARY KEY,
+    season INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    arc_number INTEGER,
+    episode_start INTEGER,
+    episode_end INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_arcs_season ON arcs (season, position);
+CREATE INDEX IF NOT EXISTS idx_arcs_episodes ON arcs (episode_start, episode_end);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Bumped whenever SCHEMA changes in a way CREATE ... IF NOT EXISTS can't apply
+SCHEMA_VERSION = 2
+
+# Version 1 keyed entities by (section, entity_id), merging entities that
+# shared an id; version 2 keys them by position like the JSON layout
+UPGRADE_ENTITIES = """
+CREATE TABLE entities_v2 (
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    entity_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (section, position)
+);
+INSERT INTO entities_v2 (section, position, entity_id, data)
+    SELECT section,
+           ROW_NUMBER() OVER (PARTITION BY section ORDER BY position) - 1,
+           CASE WHEN entity_id LIKE '#%' THEN NULL ELSE entity_id END,
+           data
+    FROM entities;
+DROP TABLE entities;
+ALTER TABLE entities_v2 RENAME TO entities;
+CREATE INDEX idx_entities_id ON entities (entity_id);
+CREATE INDEX idx_entities_section_id ON entities (section, entity_id);
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Stores each project in <project>/project.db
+
+    List sections are split into one row per entity, keyed by (section,
+    position) with the id in an indexed column, and the remainder of the
+    section document kept in `sections`. Entities sharing an id are kept as
+    separate rows, as in the JSON layout; lookups by id return the first. Arcs are
+    one row each with their season and episode range broken out for indexing.
+
+    Projects that still use the JSON layout are migrated the first time
+    they are opened.
+
+    Readers take no lock: reads that need several SELECTs run them in one
+    transaction, so they see a single WAL snapshot even while another
+    connection commits. Writers hold the project's write lock so
+    read-then-write sequences inside a transaction (next position, season
+    totals) can't interleave across processes.
+
+    Connections are per thread. forget() retires every thread's connection
+    to a project, not just the caller's: each thread notices on its next use
+    and reopens. A connection whose database file has been replaced or
+    removed (e.g. by another process deleting and re-importing the
+    project) is also reopened; the old file stays open until then, so its
+    inode can't be reused by the new one.
+    """
+
+    DB_FILE = 'project.db'
+
+    def __init__(self, projects_dir: Path):
+        super().__init__(projects_dir)
+        # sqlite3 connections must stay on the thread that created them
+        self._local = threading.local()
+        # project_id -> generation, bumped by forget() to retire old connections
+        self._generations: Dict[str, int] = {}
+        self._generations_lock = threading.Lock()
+
+    def db_path(self, project_id: str) -> Path:
+        """Get path to a project's database"""
+        return self.projects_dir / project_id / self.DB_FILE
+
+    def _connect(self, project_id: str, create: bool = True) -> Optional[sqlite3.Connection]:
+        """
+        Get this thread's connection to a project database
+
+        With create=False (read paths) a project that has no database and
+        nothing to migrate returns None instead of creating an empty one.
+        """
+        # project_id -> (connection, generation, inode of the file it opened)
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        db_file = self.db_path(project_id)
+        entry = connections.get(project_id)
+        if entry is not None:
+            conn, generation, inode = entry
+            if generation == self._generations.get(project_id, 0) and (inode is None or self._inode(db_file) == inode):
+                return conn
+            del connections[project_id]
+            conn.close()
+
+        if not db_file.exists():
+            if not create and not self._has_json_layout(project_id):
+                return None
+
+            # Creating the database and migrating into it must happen once,
+            # even with several threads or processes opening the project together
+            with self.locks.write(project_id):
+                if not db_file.exists():
+                    return self._create_database(project_id, connections)
+
+        return self._register(connections, project_id, db_file)
+
+    @staticmethod
+    def _inode(db_file: Path) -> Optional[int]:
+        try:
+            return os.stat(db_file).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _register(self, connections: Dict, project_id: str, db_file: Path) -> sqlite3.Connection:
+        """Open a connection for this thread, recording what it was opened against"""
+        generation = self._generations.get(project_id, 0)
+        conn = self._open(db_file)
+        connections[project_id] = (conn, generation, self._inode(db_file))
+        return conn
+
+    def _open(self, db_file: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_file, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+            self._upgrade(conn)
+        return conn
+
+    def _upgrade(self, conn: sqlite3.Connection):
+        """Bring a database created by an older version up to SCHEMA_VERSION"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another connection may have upgraded it while we waited
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < 2:
+                for statement in UPGRADE_ENTITIES.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _create_database(self, project_id: str, connections: Dict) -> sqlite3.Connection:
+        """
+        Create a project database, migrating any JSON files into it
+
+        Migration runs against a temp database that is renamed into place
+        when complete, so other processes never open a half-migrated project.
+        """
+        db_file = self.db_path(project_id)
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._has_json_layout(project_id):
+            from .migrator import migrate_project
+            tmp_file = db_file.with_name(f'.{db_file.name}.{os.getpid()}.tmp')
+            # No inode: the temp file is deliberately not at db_path yet
+            connections[project_id] = (self._open(tmp_file), self._generations.get(project_id, 0), None)
+            try:
+                migrate_project(self.projects_dir, project_id, self)
+                # Moving to a new backend isn't an edit: keep lastModified as it was
+                self.metadata.forget(project_id)
+                connections.pop(project_id)[0].close()
+                os.replace(tmp_file, db_file)
+            except Exception:
+                # Leave no half-migrated database behind; retry on next open
+                entry = connections.pop(project_id, None)
+                if entry is not None:
+                    entry[0].close()
+                tmp_file.unlink(missing_ok=True)
+                raise
+
+        return self._register(connections, project_id, db_file)
+
+    def _has_json_layout(self, project_id: str) -> bool:
+        """Check whether a project has JSON files that predate its database"""
+        project_path = self.projects_dir / project_id
+        return (project_path / 'world').is_dir() or (project_path / 'story').is_dir()
+
+    @contextmanager
+    def _snapshot(self, conn: sqlite3.Connection):
+        """Run several SELECTs against one consistent snapshot of the database"""
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute('BEGIN')
+        try:
+            yield
+        finally:
+            conn.commit()
+
+    def _now(self) -> str:
+        return datetime.utcnow().isoformat() + 'Z'
+
+    def _bump(self, conn: sqlite3.Connection, name: str):
+        """Increment a change counter inside the caller's transaction"""
+        conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+    # ------------------------------------------------------------------
+    # World sections
+    # ------------------------------------------------------------------
+
+    def _entity_id(self, section: str, entity: Dict) -> Optional[str]:
+        """Indexed id of an entity, or None for entities without one"""
+        _, id_field = ENTITY_LISTS[section]
+        return entity.get(id_field) or None
+
+    def _write_section_rows(self, conn: sqlite3.Connection, section: str, data: Dict):
+        """Replace a section's rows inside the caller's transaction"""
+        doc = dict(data)
+        if section in ENTITY_LISTS:
+            list_key, _ = ENTITY_LISTS[section]
+            entities = doc.pop(list_key, [])
+            conn.execute('DELETE FROM entities WHERE section = ?', (section,))
+            conn.executemany(
+                'INSERT INTO entities (section, position, entity_id, data) VALUES (?, ?, ?, ?)',
+                [
+                    (section, i, self._entity_id(section, entity), dumps_text(entity))
+                    for i, entity in enumerate(entities)
+                ]
+            )
+
+        conn.execute(
+            'INSERT OR REPLACE INTO sections (section, doc, updated) VALUES (?, ?, ?)',
+            (section, dumps_text(doc), self._now())
+        )
+        self._bump(conn, f'section:{section}')
+
+    def read_section(self, project_id: str, section: str) -> Optional[Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        with self._snapshot(conn):
+            row = conn.execute('SELECT doc FROM sections WHERE section = ?', (section,)).fetchone()
+            if row is None:
+                return None
+
+            data = loads(row[0])
+            if section in ENTITY_LISTS:
+                list_key, _ = ENTITY_LISTS[section]
+                rows = conn.execute(
+                    'SELECT data FROM entities WHERE section = ? ORDER BY position',
+                    (section,)
+                ).fetchall()
+                data[list_key] = [loads(r[0]) for r in rows]
+        return data
+
+    def write_section(self, project_id: str, section: str, data: Dict):
+        self.write_sections(project_id, {section: data})
+
+    def write_sections(self, project_id: str, sections: Dict[str, Dict]):
+        conn = self._connect(project_id)
+        with self.locks.write(project_id), conn:
+            for section, data in sections.items():
+                self._write_section_rows(conn, section, data)
+        for section in sections:
+            self.metadata.touch(project_id, section)
+
+    def section_exists(self, project_id: str, section: str) -> bool:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return False
+        row = conn.execute('SELECT 1 FROM sections WHERE section = ?', (section,)).fetchone()
+        return row is not None
+
+    def section_version(self, project_id: str, section: str):
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT COALESCE(c.value, 0) FROM sections s "
+            "LEFT JOIN counters c ON c.name = 'section:' || s.section "
+            "WHERE s.section = ?",
+            (section,)
+        ).fetchone()
+        return row[0] if row else None
+
+    # ------------------------------------------------------------------
+    # World entities
+    # ------------------------------------------------------------------
+
+    def get_entity(self, project_id: str, section: str, entity_id: str) -> Optional[Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        row = conn.execute(
+            'SELECT data FROM entities WHERE section = ? AND entity_id = ? ORDER BY position LIMIT 1',
+            (section, entity_id)
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def _put_entity_rows(self, conn: sqlite3.Connection, section: str, entities: List[Dict]):
+        """
+        Upsert entity rows inside the caller's transaction
+
+        An entity replaces the first row with its id; new ids and entities
+        without an id go last.
+        """
+        next_position = conn.execute(
+            'SELECT COALESCE(MAX(position), -1) + 1 FROM entities WHERE section = ?',
+            (section,)
+        ).fetchone()[0]
+
+        for entity in entities:
+            entity_id = self._entity_id(section, entity)
+            existing = None
+            if entity_id is not None:
+                existing = conn.execute(
+                    'SELECT MIN(position) FROM entities WHERE section = ? AND entity_id = ?',
+                    (section, entity_id)
+                ).fetchone()[0]
+            if existing is not None:
+                position = existing
+            else:
+                position = next_position
+                next_position += 1
+            conn.execute(
+                'INSERT OR REPLACE INTO entities (section, position, entity_id, data) VALUES (?, ?, ?, ?)',
+                (section, position, entity_id, dumps_text(entity))
+            )
+
+    def _delete_entity_rows(self, conn: sqlite3.Connection, section: str, entity_ids: List[str]) -> int:
+        """Delete entity rows inside the caller's transaction"""
+        cursor = conn.executemany(
+            'DELETE FROM entities WHERE section = ? AND entity_id = ?',
+            [(section, entity_id) for entity_id in entity_ids]
+        )
+        return cursor.rowcount
+
+    def get_entities(self, project_id: str, section: str, entity_ids: List[str]) -> Dict[str, Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return {}
+        found = {}
+        ids = list(entity_ids)
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT entity_id, data FROM entities WHERE section = ? "
+                f"AND entity_id IN ({', '.join('?' * len(chunk))}) ORDER BY position",
+                [section, *chunk]
+            ).fetchall()
+            for entity_id, data in rows:
+                # First occurrence wins, as with the JSON backend
+                if entity_id not in found:
+                    found[entity_id] = loads(data)
+        return found
+
+    def put_entities(self, project_id: str, section: str, entities: List[Dict]):
+        self.update_entities(project_id, section, entities, [])
+
+    def delete_entities(self, project_id: str, section: str, entity_ids: List[str]) -> int:
+        return self.update_entities(project_id, section, [], entity_ids)
+
+    def update_entities(self, project_id: str, section: str, entities: List[Dict], entity_ids: List[str]) -> int:
+        conn = self._connect(project_id)
+        with self.locks.write(project_id), conn:
+            if entities and not self.section_exists(project_id, section):
+                list_key, _ = ENTITY_LISTS[section]
+                self._write_section_rows(conn, section, {list_key: []})
+
+            removed = self._delete_entity_rows(conn, section, entity_ids) if entity_ids else 0
+            self._put_entity_rows(conn, section, entities)
+
+            conn.execute('UPDATE sections SET updated = ? WHERE section = ?', (self._now(), section))
+            self._bump(conn, f'section:{section}')
+        self.metadata.touch(project_id, section)
+        return removed
+
+    def find_entity(self, project_id: str, entity_id: str) -> List[Tuple[str, Dict]]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return []
+        # With MIN(), SQLite takes the bare columns from the first row per section
+        rows = conn.execute(
+            'SELECT section, data, MIN(position) FROM entities WHERE entity_id = ? GROUP BY section',
+            (entity_id,)
+        ).fetchall()
+        order = list(ENTITY_LISTS)
+        rows.sort(key=lambda row: order.index(row[0]) if row[0] in order else len(order))
+        return [(section, loads(data)) for section, data, _ in rows]
+
+    # ------------------------------------------------------------------
+    # Story arcs
+    # ------------------------------------------------------------------
+
+    def _arc_row(self, season: int, position: int, arc: Dict) -> Tuple:
+        episodes = arc.get('episodes') or {}
+        return (
+            arc['id'],
+            season,
+            position,
+            arc.get('arcNumber'),
+            episodes.get('start'),
+            episodes.get('end'),
+            dumps_text(arc)
+        )
+
+    def _touch_season(self, conn: sqlite3.Connection, season: int):
+        """Refresh a season's metadata row after its arcs changed"""
+        row = conn.execute('SELECT metadata FROM seasons WHERE season = ?', (season,)).fetchone()
+        metadata = loads(row[0]) if row else {'season': season, 'totalSeasons': 1}
+        metadata['totalArcs'] = conn.execute(
+            'SELECT COUNT(*) FROM arcs WHERE season = ?', (season,)
+        ).fetchone()[0]
+        metadata['lastUpdated'] = self._now()
+        conn.execute(
+            'INSERT OR REPLACE INTO seasons (season, metadata) VALUES (?, ?)',
+            (season, dumps_text(metadata))
+        )
+
+    def read_seasons(self, project_id: str) -> Dict[int, Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return {}
+        with self._snapshot(conn):
+            seasons = {
+                season: {'arcs': [], 'metadata': loads(metadata)}
+                for season, metadata in conn.execute('SELECT season, metadata FROM seasons')
+            }
+            arc_rows = conn.execute('SELECT season, data FROM arcs ORDER BY season, position').fetchall()
+        for season, data in arc_rows:
+            seasons.setdefault(season, {'arcs': [], 'metadata': {'season': season}})
+            seasons[season]['arcs'].append(loads(data))
+        return seasons
+
+    def read_season(self, project_id: str, season: int) -> Optional[Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        with self._snapshot(conn):
+            row = conn.execute('SELECT metadata FROM seasons WHERE season = ?', (season,)).fetchone()
+            if row is None:
+                return None
+
+            rows = conn.execute(
+                'SELECT data FROM arcs WHERE season = ? ORDER BY position',
+                (season,)
+            ).fetchall()
+        return {
+            'arcs': [loads(r[0]) for r in rows],
+            'metadata': loads(row[0])
+        }
+
+    def write_season(self, project_id: str, season: int, season_data: Dict):
+        arc_ids = self._check_season_ids(season, season_data)
+        conn = self._connect(project_id)
+        with self.locks.write(project_id), conn:
+            # Arcs moving here from other seasons leave those seasons first
+            moved_from = set()
+            for arc_id in arc_ids:
+                row = conn.execute(
+                    'SELECT season FROM arcs WHERE arc_id = ? AND season != ?',
+                    (arc_id, season)
+                ).fetchone()
+                if row:
+                    conn.execute('DELETE FROM arcs WHERE arc_id = ?', (arc_id,))
+                    moved_from.add(row[0])
+            for other in moved_from:
+                self._touch_season(conn, other)
+
+            conn.execute('DELETE FROM arcs WHERE season = ?', (season,))
+            conn.executemany(
+                'INSERT INTO arcs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [self._arc_row(season, i, arc) for i, arc in enumerate(season_data.get('arcs', []))]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO seasons (season, metadata) VALUES (?, ?)',
+                (season, dumps_text(season_data.get('metadata', {})))
+            )
+            self._bump(conn, 'arcs')
+        self.metadata.touch(project_id, 'arcs')
+
+    def season_summaries(self, project_id: str) -> List[Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return []
+        summaries = []
+        for season, metadata in conn.execute('SELECT season, metadata FROM seasons ORDER BY season'):
+            metadata = loads(metadata)
+            summaries.append({
+                'season': season,
+                'arcCount': metadata.get('totalArcs', 0),
+                'lastUpdated': metadata.get('lastUpdated')
+            })
+        return summaries
+
+    def arcs_version(self, project_id: str):
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value FROM counters WHERE name = 'arcs'").fetchone()
+        return row[0] if row else 0
+
+    def arc_season(self, project_id: str, arc_id: str) -> Optional[int]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        row = conn.execute('SELECT season FROM arcs WHERE arc_id = ?', (arc_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_arc(self, project_id: str, arc_id: str) -> Optional[Dict]:
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return None
+        row = conn.execute('SELECT data FROM arcs WHERE arc_id = ?', (arc_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def put_arc(self, project_id: str, season: int, arc: Dict):
+        conn = self._connect(project_id)
+        with self.locks.write(project_id), conn:
+            existing = conn.execute(
+                'SELECT season, position FROM arcs WHERE arc_id = ?',
+                (arc['id'],)
+            ).fetchone()
+            self._arc_conflict(arc['id'], season, existing[0] if existing else None)
+            if existing:
+                position = existing[1]
+            else:
+                position = conn.execute(
+                    'SELECT COALESCE(MAX(position), -1) + 1 FROM arcs WHERE season = ?',
+                    (season,)
+                ).fetchone()[0]
+            conn.execute('INSERT OR REPLACE INTO arcs VALUES (?, ?, ?, ?, ?, ?, ?)', self._arc_row(season, position, arc))
+            self._touch_season(conn, season)
+            self._bump(conn, 'arcs')
+        self.metadata.touch(project_id, 'arcs')
+
+    def delete_arc(self, project_id: str, season: int, arc_id: str):
+        conn = self._connect(project_id)
+        with self.locks.write(project_id), conn:
+            conn.execute('DELETE FROM arcs WHERE arc_id = ? AND season = ?', (arc_id, season))
+            self._touch_season(conn, season)
+            self._bump(conn, 'arcs')
+        self.metadata.touch(project_id, 'arcs')
+
+    def arcs_for_episode(self, project_id: str, episode: int) -> List[Dict]:
+        """Get arcs whose episode range covers an episode (uses the episode index)"""
+        conn = self._connect(project_id, create=False)
+        if conn is None:
+            return []
+        rows = conn.execute(
+            'SELECT data FROM arcs WHERE episode_start <= ? AND episode_end >= ? ORDER BY season, position',
+            (episode, episode)
+        ).fetchall()
+        return [loads(r[0]) for r in rows]
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def forget(self, project_id: str):
+        super().forget(project_id)
+        with self._generations_lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+        # Other threads close theirs on next use; this one can close now
+        connections = getattr(self._local, 'connections', {})
+        entry = connections.pop(project_id, None)
+        if entry is not None:
+            entry[0].close()
@@ -0,0 +1,34 @@
+"""
+Section Templates
+Default content of world sections a project has never written
+"""
+
+import copy
+from typing import Dict, Optional
+
+
+# Shapes match world_schemas.json
+SECTION_TEMPLATES = {
+    'world_overview': {
+        'name': '',
+        'description': '',
+        'timePeriod': '',
+        'technologyLevel': '',
+        'magicSystem': '',
+        'history': '',
+        'rulesPhysics': ''
+    },
+    'locations': {'places': []},
+    'characters': {'characters': []},
+    'npcs': {'npcs': []},
+    'factions': {'factions': []},
+    'religions': {'religions': []},
+    'glossary': {'terms': []},
+    'content': {'items': []}
+}
+
+
+def section_template(section: str) -> Optional[Dict]:
+    """A fresh copy of a section's default content, or None if it has none"""
+    template = SECTION_TEMPLATES.get(section)
+    return copy.deepcopy(template) if template is not None else None
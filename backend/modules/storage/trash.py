@@ -0,0 +1,261 @@
+"""
+Project Trash
+Deleted projects are renamed into .trash and removed later in the background
+"""
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .serialization import load_file
+
+
+class ProjectTrash:
+    """
+    Holding area for deleted projects under <projects_dir>/.trash
+
+    Deleting a project is a single rename into the trash, so it costs the
+    same however large the project is and can be undone until the entry
+    expires RETENTION seconds later. A background collector then removes
+    expired entries file by file, pausing as needed to stay under
+    FILES_PER_SECOND and BYTES_PER_SECOND so it doesn't starve requests of
+    disk I/O.
+
+    Trash entries are named '<project_id>~<deleted, ms since epoch>'. An
+    entry being collected is first renamed to '.purge-<name>', which both
+    hides it from listings and stops two processes collecting it at once.
+    """
+
+    TRASH_DIR = '.trash'
+    METADATA_FILE = 'project_metadata.json'
+    PURGE_PREFIX = '.purge-'
+
+    # Undo window
+    RETENTION = 24 * 60 * 60.0
+    # Longest the collector sleeps between checks for expired entries
+    COLLECT_INTERVAL = 300.0
+    # Deletion rate limits
+    FILES_PER_SECOND = 2000
+    BYTES_PER_SECOND = 64 * 1024 * 1024
+
+    def __init__(self, projects_dir: Path, retention: Optional[float] = None):
+        self.projects_dir = projects_dir
+        self.retention = self.RETENTION if retention is None else retention
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def trash_path(self) -> Path:
+        return self.projects_dir / self.TRASH_DIR
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def move(self, project_id: str) -> Dict:
+        """
+        Move a project into the trash
+
+        Returns:
+            The new trash entry (see entries())
+
+        Raises:
+            FileNotFoundError: If the project folder doesn't exist
+        """
+        trash_dir = self.trash_path()
+        trash_dir.mkdir(parents=True, exist_ok=True)
+
+        deleted = int(time.time() * 1000)
+        trash_id = f'{project_id}~{deleted}'
+        os.rename(self.projects_dir / project_id, trash_dir / trash_id)
+
+        self._ensure_worker()
+        return self._entry(trash_id)
+
+    def restore(self, trash_id: str) -> str:
+        """
+        Move a trashed project back into place
+
+        Callers should hold the project's write lock.
+
+        Returns:
+            The restored project's id
+
+        Raises:
+            KeyError: If there is no such trash entry
+            FileExistsError: If a project with the same id exists again
+        """
+        project_id = self._project_id(trash_id)
+        source = self.trash_path() / trash_id
+        if project_id is None or not source.is_dir():
+            raise KeyError(trash_id)
+
+        target = self.projects_dir / project_id
+        if target.exists():
+            raise FileExistsError(f'A project with id {project_id} already exists')
+        os.rename(source, target)
+        return project_id
+
+    def purge(self, trash_id: str):
+        """
+        Hand a trash entry to the collector now instead of at expiry
+
+        Raises:
+            KeyError: If there is no such trash entry
+        """
+        if self._project_id(trash_id) is None:
+            raise KeyError(trash_id)
+        try:
+            self._claim(trash_id)
+        except FileNotFoundError:
+            raise KeyError(trash_id)
+        self._ensure_worker()
+        self._wake.set()
+
+    def entries(self) -> List[Dict]:
+        """Trashed projects, most recently deleted first"""
+        trash_dir = self.trash_path()
+        if not trash_dir.is_dir():
+            return []
+        entries = [
+            self._entry(name) for name in os.listdir(trash_dir)
+            if self._project_id(name) is not None
+        ]
+        return sorted(entries, key=lambda e: e['deletedAt'], reverse=True)
+
+    def _entry(self, trash_id: str) -> Dict:
+        project_id, _, stamp = trash_id.rpartition('~')
+        deleted = int(stamp) / 1000
+        try:
+            metadata = load_file(self.trash_path() / trash_id / self.METADATA_FILE)
+        except Exception:
+            metadata = {}
+        return {
+            'trash_id': trash_id,
+            'project_id': project_id,
+            'title': metadata.get('title', project_id),
+            'deletedAt': datetime.fromtimestamp(deleted).isoformat(),
+            'expiresAt': datetime.fromtimestamp(deleted + self.retention).isoformat()
+        }
+
+    @staticmethod
+    def _project_id(trash_id: str) -> Optional[str]:
+        """Project id from a trash entry name, or None if it isn't one"""
+        project_id, sep, stamp = trash_id.rpartition('~')
+        if not sep or not project_id or not stamp.isdigit() or project_id.startswith('.') or '/' in trash_id:
+            return None
+        return project_id
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+
+    def start_collector(self):
+        """Start collecting expired entries, including ones left by earlier runs"""
+        self._ensure_worker()
+
+    def collect(self, now: Optional[float] = None) -> int:
+        """
+        Remove expired entries and those already handed to the collector
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time() if now is None else now
+        trash_dir = self.trash_path()
+        if not trash_dir.is_dir():
+            return 0
+
+        for name in os.listdir(trash_dir):
+            if self._project_id(name) is not None and self._expires(name) <= now:
+                try:
+                    self._claim(name)
+                except FileNotFoundError:
+                    # Restored or claimed by another process meanwhile
+                    pass
+
+        removed = 0
+        for name in os.listdir(trash_dir):
+            if name.startswith(self.PURGE_PREFIX):
+                self._remove_tree(trash_dir / name)
+                removed += 1
+        return removed
+
+    def _expires(self, trash_id: str) -> float:
+        return int(trash_id.rpartition('~')[2]) / 1000 + self.retention
+
+    def _next_expiry(self) -> Optional[float]:
+        trash_dir = self.trash_path()
+        if not trash_dir.is_dir():
+            return None
+        expiries = [self._expires(n) for n in os.listdir(trash_dir) if self._project_id(n) is not None]
+        return min(expiries) if expiries else None
+
+    def _claim(self, trash_id: str):
+        trash_dir = self.trash_path()
+        os.rename(trash_dir / trash_id, trash_dir / f'{self.PURGE_PREFIX}{trash_id}')
+
+    def _remove_tree(self, path: Path):
+        """Delete a directory tree bottom-up, sleeping to stay within the rate limits"""
+        started = time.monotonic()
+        files = size = 0
+
+        for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+            for name in filenames:
+                file_path = os.path.join(dirpath, name)
+                try:
+                    size += os.lstat(file_path).st_size
+                    os.unlink(file_path)
+                except FileNotFoundError:
+                    continue
+                files += 1
+                if files % 100 == 0:
+                    budget = max(files / self.FILES_PER_SECOND, size / self.BYTES_PER_SECOND)
+                    elapsed = time.monotonic() - started
+                    if budget > elapsed:
+                        time.sleep(budget - elapsed)
+            for name in dirnames:
+                dir_path = os.path.join(dirpath, name)
+                try:
+                    # Subfolders are already empty; links to folders are unlinked
+                    if os.path.islink(dir_path):
+                        os.unlink(dir_path)
+                    else:
+                        os.rmdir(dir_path)
+                except OSError:
+                    pass
+
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _ensure_worker(self):
+        """Start the background collector on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._collect_loop,
+                        name='project-trash-collector',
+                        daemon=True
+                    )
+                    self._worker.start()
+
+    def _collect_loop(self):
+        """Collect, then sleep until the next entry expires (or a purge wakes us)"""
+        while True:
+            try:
+                self.collect()
+                next_expiry = self._next_expiry()
+            except Exception as e:
+                print(f"Error collecting project trash: {e}")
+                next_expiry = None
+
+            timeout = self.COLLECT_INTERVAL
+            if next_expiry is not None:
+                # At least a second, so an entry that can't be claimed isn't retried in a busy loop
+                timeout = min(timeout, max(1.0, next_expiry - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
@@ -0,0 +1,309 @@
+"""
+Arc Index Module - Phase 3
+In-memory secondary indexes over a project's arcs for filtered, paginated queries
+and episode lookups
+"""
+
+from bisect import bisect_right, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Sort key / cursor position: (season, arcNumber, arc id)
+ArcKey = Tuple[int, int, str]
+
+# A plot beat: (arc id, position in the arc's plotBeats)
+BeatRef = Tuple[str, int]
+
+
+def _as_int(value) -> int:
+    """Coerce season/arc numbers that may be stored as strings"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class ArcIndex:
+    """
+    Indexes one project's arcs by status, season, character and location
+
+    Arcs are kept in (season, arcNumber, id) order so a cursor is just the
+    key of the last arc on the previous page and each page is a bisect
+    into either the full ordering or the sorted set of filter matches.
+
+    Episode lookups use a stabbing index: each episode maps to the set of
+    arcs whose range covers it, maintained on add and remove, so the arcs
+    covering an episode are one dict lookup however long other arcs run.
+    Ranges longer than MAX_BUCKETED_SPAN (malformed data, typically) are
+    kept aside and checked individually rather than filling thousands of
+    buckets. Plot beats are indexed by episode, character and location.
+
+    `version` records the storage arcs_version the index reflects, so the
+    owner can tell when another process has changed the arcs underneath it.
+    """
+
+    FILTERS = ('status', 'season', 'character', 'location')
+    BEAT_FILTERS = ('episode', 'character', 'location')
+    # Longest episode range indexed episode by episode
+    MAX_BUCKETED_SPAN = 1000
+
+    def __init__(self):
+        self.arcs: Dict[str, Dict] = {}
+        self.keys: Dict[str, ArcKey] = {}
+        self.order: List[ArcKey] = []
+        self.postings: Dict[str, Dict[str, Set[str]]] = {name: {} for name in self.FILTERS}
+        self.version = None
+
+        # episode -> ids of arcs covering it; over-long ranges by arc id
+        self.covering: Dict[int, Set[str]] = {}
+        self.long_spans: Dict[str, Tuple[int, int]] = {}
+        self.beats: Dict[str, Dict[object, Set[BeatRef]]] = {name: {} for name in self.BEAT_FILTERS}
+
+    @classmethod
+    def build(cls, seasons: Dict[int, Dict]) -> 'ArcIndex':
+        """Build an index from {season: season_data}"""
+        index = cls()
+        for season, season_data in seasons.items():
+            for arc in season_data.get('arcs', []):
+                index.add(arc, season)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.arcs)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _terms(self, arc: Dict, season: int) -> Dict[str, Set[str]]:
+        """Values an arc is indexed under, per filter"""
+        characters = set(arc.get('mainCharacters') or []) | set(arc.get('supportingCharacters') or [])
+        locations = set(arc.get('primaryLocations') or [])
+        for beat in arc.get('plotBeats') or []:
+            characters.update(beat.get('characters') or [])
+            if beat.get('location'):
+                locations.add(beat['location'])
+
+        return {
+            'status': {str(arc.get('status') or '')},
+            'season': {str(season)},
+            'character': characters,
+            'location': locations
+        }
+
+    def _span(self, arc: Dict) -> Optional[Tuple[int, int, str]]:
+        """Episode range of an arc, from start/end or else the episode list"""
+        episodes = arc.get('episodes') or {}
+        start, end = episodes.get('start'), episodes.get('end')
+        if start is None or end is None:
+            listed = [_as_int(e) for e in episodes.get('list') or []]
+            if not listed:
+                return None
+            start, end = min(listed), max(listed)
+        start, end = _as_int(start), _as_int(end)
+        return (min(start, end), max(start, end), arc['id'])
+
+    def _beat_terms(self, beat: Dict) -> Dict[str, Set]:
+        """Values a plot beat is indexed under, per beat filter"""
+        terms = {
+            'episode': set(),
+            'character': set(beat.get('characters') or []),
+            'location': {beat['location']} if beat.get('location') else set()
+        }
+        if beat.get('episode') is not None:
+            terms['episode'].add(_as_int(beat['episode']))
+        return terms
+
+    def _index_episodes(self, arc: Dict, adding: bool):
+        """Add an arc's episode range and beats to the episode indexes, or remove them"""
+        arc_id = arc['id']
+        span = self._span(arc)
+        if span is not None:
+            start, end, _ = span
+            if end - start > self.MAX_BUCKETED_SPAN:
+                if adding:
+                    self.long_spans[arc_id] = (start, end)
+                else:
+                    self.long_spans.pop(arc_id, None)
+            else:
+                for episode in range(start, end + 1):
+                    if adding:
+                        self.covering.setdefault(episode, set()).add(arc_id)
+                    else:
+                        ids = self.covering.get(episode)
+                        if ids is not None:
+                            ids.discard(arc_id)
+                            if not ids:
+                                del self.covering[episode]
+
+        for i, beat in enumerate(arc.get('plotBeats') or []):
+            for name, values in self._beat_terms(beat).items():
+                postings = self.beats[name]
+                for value in values:
+                    if adding:
+                        postings.setdefault(value, set()).add((arc_id, i))
+                    else:
+                        refs = postings.get(value)
+                        if refs is not None:
+                            refs.discard((arc_id, i))
+                            if not refs:
+                                del postings[value]
+
+    def add(self, arc: Dict, season: int):
+        """Index an arc, replacing any previous version with the same id"""
+        arc_id = arc['id']
+        if arc_id in self.arcs:
+            self.remove(arc_id)
+
+        key = (_as_int(season), _as_int(arc.get('arcNumber')), arc_id)
+        self.arcs[arc_id] = arc
+        self.keys[arc_id] = key
+        insort(self.order, key)
+
+        for name, values in self._terms(arc, season).items():
+            for value in values:
+                self.postings[name].setdefault(value, set()).add(arc_id)
+        self._index_episodes(arc, adding=True)
+
+    def remove(self, arc_id: str):
+        """Drop an arc from the index (no-op if it isn't indexed)"""
+        arc = self.arcs.pop(arc_id, None)
+        if arc is None:
+            return
+
+        key = self.keys.pop(arc_id)
+        i = bisect_right(self.order, key) - 1
+        if i >= 0 and self.order[i] == key:
+            del self.order[i]
+
+        for name, values in self._terms(arc, key[0]).items():
+            for value in values:
+                ids = self.postings[name].get(value)
+                if ids is not None:
+                    ids.discard(arc_id)
+                    if not ids:
+                        del self.postings[name][value]
+        self._index_episodes(arc, adding=False)
+
+    def replace_season(self, season: int, arcs: List[Dict]):
+        """Re-index a season whose arcs were replaced wholesale"""
+        doomed = [arc_id for arc_id, key in self.keys.items() if key[0] == _as_int(season)]
+        for arc_id in doomed:
+            self.remove(arc_id)
+        for arc in arcs:
+            self.add(arc, season)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self,
+              filters: Optional[Dict[str, str]] = None,
+              cursor: Optional[ArcKey] = None,
+              limit: Optional[int] = None) -> Dict:
+        """
+        Find arcs matching every filter, one page at a time
+
+        Args:
+            filters: {filter name: value} for any of FILTERS
+            cursor: Key of the last arc on the previous page
+            limit: Page size (None = everything after the cursor)
+
+        Returns:
+            Dict with the page of arcs, total matches and the next cursor
+        """
+        candidates = None
+        for name, value in (filters or {}).items():
+            ids = self.postings[name].get(str(value), set())
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+
+        if candidates is None:
+            ordered = self.order
+        else:
+            ordered = sorted(self.keys[arc_id] for arc_id in candidates)
+
+        start = bisect_right(ordered, cursor) if cursor else 0
+        end = len(ordered) if limit is None else min(start + limit, len(ordered))
+        page = ordered[start:end]
+
+        return {
+            'arcs': [self.arcs[key[2]] for key in page],
+            'total': len(ordered),
+            'next_cursor': page[-1] if page and end < len(ordered) else None
+        }
+
+    def arcs_covering(self, episode: int, season: Optional[int] = None) -> List[Dict]:
+        """Arcs whose episode range includes an episode, in arc order"""
+        ids = list(self.covering.get(episode, ()))
+        ids.extend(arc_id for arc_id, (start, end) in self.long_spans.items() if start <= episode <= end)
+        keys = sorted(
+            self.keys[arc_id]
+            for arc_id in ids
+            if season is None or self.keys[arc_id][0] == season
+        )
+        return [self.arcs[key[2]] for key in keys]
+
+    def beats_for(self, name: str, value, season: Optional[int] = None) -> List[Dict]:
+        """
+        Plot beats matching one beat filter, ordered by episode then arc order
+
+        Args:
+            name: One of BEAT_FILTERS
+            value: Episode number, character id or location id
+            season: Only beats from arcs in this season
+
+        Returns:
+            List of {arc_id, arc_title, season, beat_index, beat}
+        """
+        refs = self.beats[name].get(value, set())
+        if season is not None:
+            refs = [ref for ref in refs if self.keys[ref[0]][0] == season]
+
+        def order(ref: BeatRef):
+            beat = self.arcs[ref[0]]['plotBeats'][ref[1]]
+            return (_as_int(beat.get('episode')), self.keys[ref[0]], ref[1])
+
+        results = []
+        for arc_id, i in sorted(refs, key=order):
+            arc = self.arcs[arc_id]
+            results.append({
+                'arc_id': arc_id,
+                'arc_title': arc.get('title'),
+                'season': self.keys[arc_id][0],
+                'beat_index': i,
+                'beat': arc['plotBeats'][i]
+            })
+        return results
+
+    def episodes_for(self, name: str, value) -> List[Dict]:
+        """Distinct (season, episode) pairs with a beat featuring a character or location"""
+        episodes = set()
+        for arc_id, i in self.beats[name].get(value, set()):
+            beat = self.arcs[arc_id]['plotBeats'][i]
+            if beat.get('episode') is not None:
+                episodes.add((self.keys[arc_id][0], _as_int(beat['episode'])))
+        return [{'season': season, 'episode': episode} for season, episode in sorted(episodes)]
+
+
+def encode_cursor(key: Optional[ArcKey]) -> Optional[str]:
+    """Encode an arc key as a 'season:arcNumber:id' cursor string"""
+    if key is None:
+        return None
+    return f'{key[0]}:{key[1]}:{key[2]}'
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[ArcKey]:
+    """Decode a cursor string; raises ValueError on malformed input"""
+    if not cursor:
+        return None
+    season, arc_number, arc_id = cursor.split(':', 2)
+    return (int(season), int(arc_number), arc_id)
+
+
+def project_fields(arc: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested top-level fields of an arc"""
+    if not fields:
+        return arc
+    return {field: arc[field] for field in fields if field in arc}
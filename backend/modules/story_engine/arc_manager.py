@@ -3,23 +3,69 @@ Arc Manager Module - Phase 3
 Handles CRUD operations for story arcs
 """
 
-import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from ..storage import JsonStorage, StorageBackend
+from .arc_index import ArcIndex, decode_cursor, encode_cursor, project_fields
+
 
 class ArcManager:
-    def __init__(self, projects_dir: Path):
+    def __init__(self, projects_dir: Path, storage: Optional[StorageBackend] = None):
         self.projects_dir = projects_dir
+        self.storage = storage or JsonStorage(projects_dir)
+        
+        # Per-project query indexes, built on first query and kept in sync by every write.
+        # Lock order: project lock first, then _index_lock.
+        self._indexes: Dict[str, ArcIndex] = {}
+        self._index_lock = threading.RLock()
+    
+    def get_index(self, project_id: str) -> ArcIndex:
+        """Get the query index for a project, (re)building it if missing or stale"""
+        # Read the version before the arcs: a write landing in between leaves
+        # the index looking stale, so it is rebuilt again rather than served wrong
+        version = self.storage.arcs_version(project_id)
+        with self._index_lock:
+            index = self._indexes.get(project_id)
+            if index is not None and index.version == version:
+                return index
+        
+        index = ArcIndex.build(self.storage.read_seasons(project_id))
+        index.version = version
+        with self._index_lock:
+            self._indexes[project_id] = index
+        return index
     
-    def get_arcs_file_path(self, project_id: str, season: int = None) -> Path:
-        """Get path to arcs file - season-specific or combined"""
-        story_dir = self.projects_dir / project_id / 'story'
-        if season is not None:
-            return story_dir / f'season{season}_arcs.json'
-        else:
-            return story_dir / 'arcs.json'  # Fallback for compatibility
+    @contextmanager
+    def _writing(self, project_id: str):
+        """
+        Hold a project's write lock for a read-modify-write of its arcs
+        
+        An index that another process has already invalidated is dropped up
+        front so the incremental updates below are never applied to it.
+        """
+        with self.storage.locks.write(project_id):
+            with self._index_lock:
+                index = self._indexes.get(project_id)
+                if index is not None and index.version != self.storage.arcs_version(project_id):
+                    del self._indexes[project_id]
+            yield
+    
+    def _update_index(self, project_id: str, update):
+        """Apply an incremental update to a project's index if one is built"""
+        with self._index_lock:
+            index = self._indexes.get(project_id)
+            if index is not None:
+                update(index)
+                index.version = self.storage.arcs_version(project_id)
+    
+    def forget_project(self, project_id: str):
+        """Drop cached query state for a project (e.g. after deletion)"""
+        with self._index_lock:
+            self._indexes.pop(project_id, None)
     
     def initialize_season_arcs_file(self, project_id: str, season: int) -> Dict:
         """Create initial season arcs file structure - matches arc_schemas.json format"""
@@ -33,55 +79,28 @@ class ArcManager:
             }
         }
         
-        # Create story directory if it doesn't exist
-        story_dir = self.projects_dir / project_id / 'story'
-        story_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Write initial file
-        arcs_file = self.get_arcs_file_path(project_id, season)
-        with open(arcs_file, 'w', encoding='utf-8') as f:
-            json.dump(arcs_data, f, indent=2, ensure_ascii=False)
+        with self._writing(project_id):
+            self.storage.write_season(project_id, season, arcs_data)
+            self._update_index(project_id, lambda index: index.replace_season(season, []))
         
         return arcs_data
     
     def load_season_arcs(self, project_id: str, season: int) -> Dict:
         """Load arcs for a specific season"""
-        arcs_file = self.get_arcs_file_path(project_id, season)
+        season_data = self.storage.read_season(project_id, season)
         
-        if not arcs_file.exists():
+        if season_data is None:
             return self.initialize_season_arcs_file(project_id, season)
         
-        with open(arcs_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return season_data
     
     def load_all_arcs(self, project_id: str) -> Dict:
         """Load all arcs from all seasons and combine them"""
-        story_dir = self.projects_dir / project_id / 'story'
-        
-        if not story_dir.exists():
-            story_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Find all season arc files
-        season_files = list(story_dir.glob('season*_arcs.json'))
+        seasons = self.storage.read_seasons(project_id)
         
         all_arcs = []
-        seasons = set()
-        
-        for season_file in season_files:
-            try:
-                with open(season_file, 'r', encoding='utf-8') as f:
-                    season_data = json.load(f)
-                    all_arcs.extend(season_data.get('arcs', []))
-                    # Get season from metadata or fallback to filename parsing
-                    season_num = season_data.get('metadata', {}).get('season')
-                    if not season_num:
-                        # Extract from filename: season1_arcs.json -> 1
-                        import re
-                        match = re.search(r'season(\d+)_arcs\.json', str(season_file))
-                        season_num = int(match.group(1)) if match else 1
-                    seasons.add(season_num)
-            except Exception as e:
-                print(f"Error loading {season_file}: {e}")
+        for season in sorted(seasons):
+            all_arcs.extend(seasons[season].get('arcs', []))
         
         return {
             'arcs': all_arcs,
@@ -92,6 +111,10 @@ class ArcManager:
             }
         }
     
+    def get_available_seasons(self, project_id: str) -> List[Dict]:
+        """Get list of available seasons with arc counts"""
+        return self.storage.season_summaries(project_id)
+    
     def save_season_arcs(self, project_id: str, season: int, arcs_data: Dict) -> bool:
         """Save arcs data for a specific season"""
         try:
@@ -101,10 +124,9 @@ class ArcManager:
             arcs_data['metadata']['totalSeasons'] = 1  # This file represents one season
             arcs_data['metadata']['lastUpdated'] = datetime.utcnow().isoformat() + 'Z'
             
-            # Write to season-specific file
-            arcs_file = self.get_arcs_file_path(project_id, season)
-            with open(arcs_file, 'w', encoding='utf-8') as f:
-                json.dump(arcs_data, f, indent=2, ensure_ascii=False)
+            with self._writing(project_id):
+                self.storage.write_season(project_id, season, arcs_data)
+                self._update_index(project_id, lambda index: index.replace_season(season, arcs_data.get('arcs', [])))
             
             return True
         except Exception as e:
@@ -142,170 +164,366 @@ class ArcManager:
             print(f"Error saving arcs by season: {e}")
             return False
     
-    def add_arc(self, project_id: str, arc_data: Dict) -> Dict:
-        """Add a new arc to the appropriate season file"""
-        season = arc_data.get('season', 1)
-        season_arcs_data = self.load_season_arcs(project_id, season)
+    def bulk_apply(self, project_id: str, operations: List[Dict]) -> Dict:
+        """
+        Apply a batch of arc creates, updates, upserts and deletes
         
-        # Check if ID already exists in this season
-        existing_ids = [arc['id'] for arc in season_arcs_data['arcs']]
-        if arc_data['id'] in existing_ids:
-            return {
-                'success': False,
-                'error': f"Arc with ID '{arc_data['id']}' already exists in season {season}"
-            }
+        Operations are resolved to a season in order (so later operations see
+        the effect of earlier ones), then grouped so each touched season is
+        read once and written once.
         
-        season_arcs_data['arcs'].append(arc_data)
+        Args:
+            project_id: Project ID
+            operations: List of {"op": "create"|"update"|"upsert"|"delete",
+                                 "arc": {...}, "id": str (update/delete)}
         
-        if self.save_season_arcs(project_id, season, season_arcs_data):
+        Returns:
+            Dict with per-operation results, the seasons written and the
+            seasons that failed to save (seasons_failed)
+        """
+        with self._writing(project_id):
+            results = []
+            by_season: Dict[int, List[Dict]] = {}
+            # arc_id -> season (None = deleted earlier in this batch)
+            overlay: Dict[str, Optional[int]] = {}
+            
+            def current_season(arc_id: str) -> Optional[int]:
+                if arc_id in overlay:
+                    return overlay[arc_id]
+                return self.storage.arc_season(project_id, arc_id)
+            
+            for index, operation in enumerate(operations):
+                op = operation.get('op')
+                arc = operation.get('arc') or {}
+                arc_id = operation.get('id') or arc.get('id')
+                result = {'index': index, 'op': op, 'id': arc_id}
+                results.append(result)
+                
+                if op not in ('create', 'update', 'upsert', 'delete'):
+                    result.update(success=False, error=f"Unknown operation: {op}")
+                    continue
+                if not arc_id:
+                    result.update(success=False, error='Arc ID is required')
+                    continue
+                if op != 'delete' and not arc:
+                    result.update(success=False, error='No arc data provided')
+                    continue
+                
+                season = current_season(arc_id)
+                if op == 'upsert':
+                    op = 'update' if season is not None else 'create'
+                
+                if op == 'create':
+                    if season is not None:
+                        result.update(success=False, error=f"Arc with ID '{arc_id}' already exists in season {season}")
+                        continue
+                    arc.setdefault('id', arc_id)
+                    season = arc.get('season', 1)
+                    overlay[arc_id] = season
+                elif season is None:
+                    result.update(success=False, error=f"Arc '{arc_id}' not found in any season")
+                    continue
+                elif op == 'update':
+                    arc.setdefault('id', arc_id)
+                    if arc['id'] != arc_id:
+                        if current_season(arc['id']) is not None:
+                            result.update(success=False, error=f"Arc with ID '{arc['id']}' already exists")
+                            continue
+                        overlay[arc_id] = None
+                    overlay[arc['id']] = season
+                else:
+                    overlay[arc_id] = None
+                
+                result['season'] = season
+                by_season.setdefault(season, []).append({'op': op, 'id': arc_id, 'arc': arc, 'result': result})
+            
+            def frees_ids(season: int) -> bool:
+                return any(item['op'] == 'delete' or item['arc'].get('id') != item['id']
+                           for item in by_season[season])
+            
+            # Seasons that delete or rename arcs are written first, so an id
+            # released in one season is gone before another season reuses it
+            seasons_written = []
+            seasons_failed = []
+            for season in sorted(by_season, key=lambda s: (not frees_ids(s), s)):
+                season_data = self.storage.read_season(project_id, season) or {
+                    'arcs': [],
+                    'metadata': {'season': season}
+                }
+                arcs = season_data['arcs']
+                positions = {a['id']: i for i, a in enumerate(arcs)}
+                
+                for item in by_season[season]:
+                    if item['op'] == 'create':
+                        positions[item['id']] = len(arcs)
+                        arcs.append(item['arc'])
+                    elif item['op'] == 'update':
+                        i = positions.pop(item['id'], None)
+                        if i is None:
+                            # Moved out by an earlier season write in this batch
+                            i = len(arcs)
+                            arcs.append(None)
+                        arcs[i] = item['arc']
+                        positions[item['arc']['id']] = i
+                    else:
+                        i = positions.pop(item['id'], None)
+                        if i is not None:
+                            arcs[i] = None
+                
+                season_data['arcs'] = [a for a in arcs if a is not None]
+                saved = self.save_season_arcs(project_id, season, season_data)
+                
+                for item in by_season[season]:
+                    if saved:
+                        item['result']['success'] = True
+                    else:
+                        item['result'].update(success=False, error=f'Failed to save season {season}')
+                if saved:
+                    seasons_written.append(season)
+                else:
+                    seasons_failed.append(season)
+            
+            failed = sum(1 for r in results if not r['success'])
+            return {
+                'success': failed == 0,
+                'results': results,
+                'applied': len(results) - failed,
+                'failed': failed,
+                'seasons_written': seasons_written,
+                'seasons_failed': seasons_failed
+            }
+    
+    def add_arc(self, project_id: str, arc_data: Dict) -> Dict:
+        """Add a new arc to the appropriate season"""
+        with self._writing(project_id):
+            season = arc_data.get('season', 1)
+            
+            # Arc IDs are unique across the whole project, not just the season
+            existing_season = self.storage.arc_season(project_id, arc_data['id'])
+            if existing_season is not None:
+                return {
+                    'success': False,
+                    'error': f"Arc with ID '{arc_data['id']}' already exists in season {existing_season}",
+                    'conflict': True
+                }
+            
+            try:
+                self.storage.put_arc(project_id, season, arc_data)
+            except Exception as e:
+                print(f"Error saving arc {arc_data['id']}: {e}")
+                return {
+                    'success': False,
+                    'error': 'Failed to save arc'
+                }
+            
+            self._update_index(project_id, lambda index: index.add(arc_data, season))
+            
             return {
                 'success': True,
                 'arc': arc_data,
                 'message': f"Arc '{arc_data['title']}' added successfully to season {season}"
             }
-        else:
+    
+    def update_arc(self, project_id: str, arc_id: str, arc_data: Dict) -> Dict:
+        """Update an existing arc in place within its season"""
+        with self._writing(project_id):
+            arc_season = self.storage.arc_season(project_id, arc_id)
+            
+            if not arc_season:
+                return {
+                    'success': False,
+                    'error': f"Arc '{arc_id}' not found in any season"
+                }
+            
+            arc_data.setdefault('id', arc_id)
+            if arc_data['id'] != arc_id:
+                if self.storage.arc_season(project_id, arc_data['id']) is not None:
+                    return {
+                        'success': False,
+                        'error': f"Arc with ID '{arc_data['id']}' already exists",
+                        'conflict': True
+                    }
+                
+                # Renamed arc: the old entry must go before the new one is added
+                try:
+                    self.storage.delete_arc(project_id, arc_season, arc_id)
+                except Exception as e:
+                    print(f"Error saving arc {arc_id}: {e}")
+                    return {
+                        'success': False,
+                        'error': 'Failed to save arc'
+                    }
+            
+            try:
+                self.storage.put_arc(project_id, arc_season, arc_data)
+            except Exception as e:
+                print(f"Error saving arc {arc_id}: {e}")
+                return {
+                    'success': False,
+                    'error': 'Failed to save arc'
+                }
+            
+            def reindex(index: ArcIndex):
+                index.remove(arc_id)
+                index.add(arc_data, arc_season)
+            self._update_index(project_id, reindex)
+            
             return {
-                'success': False,
-                'error': 'Failed to save arc'
+                'success': True,
+                'arc': arc_data,
+                'message': f"Arc '{arc_data['title']}' updated successfully"
             }
     
-    def update_arc(self, project_id: str, arc_id: str, arc_data: Dict) -> Dict:
-        """Update an existing arc"""
-        # First, find which season the arc is in
-        arc_season = None
-        story_dir = self.projects_dir / project_id / 'story'
-        season_files = list(story_dir.glob('season*_arcs.json'))
-        
-        for season_file in season_files:
+    def delete_arc(self, project_id: str, arc_id: str) -> Dict:
+        """Delete an arc from its season"""
+        with self._writing(project_id):
+            arc_season = self.storage.arc_season(project_id, arc_id)
+            
+            if not arc_season:
+                return {
+                    'success': False,
+                    'error': f"Arc '{arc_id}' not found in any season"
+                }
+            
             try:
-                with open(season_file, 'r', encoding='utf-8') as f:
-                    season_data = json.load(f)
-                    for arc in season_data.get('arcs', []):
-                        if arc['id'] == arc_id:
-                            # Get season from metadata or filename
-                            arc_season = season_data.get('metadata', {}).get('season')
-                            if not arc_season:
-                                import re
-                                match = re.search(r'season(\d+)_arcs\.json', str(season_file))
-                                arc_season = int(match.group(1)) if match else 1
-                            break
-                if arc_season:
-                    break
-            except Exception:
-                continue
+                self.storage.delete_arc(project_id, arc_season, arc_id)
+            except Exception as e:
+                print(f"Error deleting arc {arc_id}: {e}")
+                return {
+                    'success': False,
+                    'error': 'Failed to save after deletion'
+                }
+            
+            self._update_index(project_id, lambda index: index.remove(arc_id))
+            
+            return {
+                'success': True,
+                'message': f"Arc '{arc_id}' deleted successfully from season {arc_season}"
+            }
+    
+    def get_arc(self, project_id: str, arc_id: str) -> Dict:
+        """Get a specific arc from any season"""
+        arc = self.storage.get_arc(project_id, arc_id)
         
-        if not arc_season:
+        if arc is not None:
             return {
-                'success': False,
-                'error': f"Arc '{arc_id}' not found in any season"
+                'success': True,
+                'arc': arc
             }
         
-        # Load the season data and update the arc
-        season_arcs_data = self.load_season_arcs(project_id, arc_season)
+        return {
+            'success': False,
+            'error': f"Arc '{arc_id}' not found"
+        }
+    
+    def get_arcs_by_season(self, project_id: str, season: int) -> List[Dict]:
+        """Get all arcs for a specific season"""
+        season_arcs_data = self.load_season_arcs(project_id, season)
+        return season_arcs_data.get('arcs', [])
+    
+    def query_arcs(self,
+                   project_id: str,
+                   filters: Optional[Dict[str, str]] = None,
+                   fields: Optional[List[str]] = None,
+                   cursor: Optional[str] = None,
+                   limit: Optional[int] = None) -> Dict:
+        """
+        Filtered, paginated and field-projected arc listing
         
-        found = False
-        for i, arc in enumerate(season_arcs_data['arcs']):
-            if arc['id'] == arc_id:
-                season_arcs_data['arcs'][i] = arc_data
-                found = True
-                break
+        Args:
+            project_id: Project ID
+            filters: Any of status, season, character, location
+            fields: Top-level arc fields to return (None = whole arcs)
+            cursor: next_cursor from the previous page
+            limit: Page size (None = no limit)
         
-        if not found:
+        Returns:
+            Dict with the page of arcs, total matches and next_cursor
+        """
+        unknown = set(filters or {}) - set(ArcIndex.FILTERS)
+        if unknown:
             return {
                 'success': False,
-                'error': f"Arc '{arc_id}' not found"
+                'error': f"Unknown filter(s): {', '.join(sorted(unknown))}"
             }
         
-        if self.save_season_arcs(project_id, arc_season, season_arcs_data):
-            return {
-                'success': True,
-                'arc': arc_data,
-                'message': f"Arc '{arc_data['title']}' updated successfully"
-            }
-        else:
+        try:
+            cursor_key = decode_cursor(cursor)
+        except ValueError:
             return {
                 'success': False,
-                'error': 'Failed to save arc'
+                'error': f"Invalid cursor: {cursor}"
             }
-    
-    def delete_arc(self, project_id: str, arc_id: str) -> Dict:
-        """Delete an arc from its season file"""
-        # First, find which season the arc is in
-        arc_season = None
-        story_dir = self.projects_dir / project_id / 'story'
-        season_files = list(story_dir.glob('season*_arcs.json'))
         
-        for season_file in season_files:
-            try:
-                with open(season_file, 'r', encoding='utf-8') as f:
-                    season_data = json.load(f)
-                    for arc in season_data.get('arcs', []):
-                        if arc['id'] == arc_id:
-                            # Get season from metadata or filename
-                            arc_season = season_data.get('metadata', {}).get('season')
-                            if not arc_season:
-                                import re
-                                match = re.search(r'season(\d+)_arcs\.json', str(season_file))
-                                arc_season = int(match.group(1)) if match else 1
-                            break
-                if arc_season:
-                    break
-            except Exception:
-                continue
+        index = self.get_index(project_id)
+        with self._index_lock:
+            page = index.query(filters, cursor_key, limit)
+            seasons = len(index.postings['season'])
+            total_arcs = len(index)
         
-        if not arc_season:
-            return {
-                'success': False,
-                'error': f"Arc '{arc_id}' not found in any season"
+        return {
+            'success': True,
+            'arcs': [project_fields(arc, fields) for arc in page['arcs']],
+            'total': page['total'],
+            'next_cursor': encode_cursor(page['next_cursor']),
+            'metadata': {
+                'totalArcs': total_arcs,
+                'totalSeasons': seasons,
+                'lastUpdated': datetime.utcnow().isoformat() + 'Z'
             }
+        }
+    
+    def get_episode(self, project_id: str, episode: int, season: Optional[int] = None) -> Dict:
+        """
+        Get the arcs and plot beats that cover an episode
         
-        # Load the season data and remove the arc
-        season_arcs_data = self.load_season_arcs(project_id, arc_season)
+        Args:
+            project_id: Project ID
+            episode: Episode number
+            season: Only consider arcs in this season
         
-        original_count = len(season_arcs_data['arcs'])
-        season_arcs_data['arcs'] = [arc for arc in season_arcs_data['arcs'] if arc['id'] != arc_id]
+        Returns:
+            Dict with covering arcs and the beats set in that episode
+        """
+        index = self.get_index(project_id)
+        with self._index_lock:
+            arcs = index.arcs_covering(episode, season)
+            beats = index.beats_for('episode', episode, season)
         
-        if len(season_arcs_data['arcs']) == original_count:
-            return {
-                'success': False,
-                'error': f"Arc '{arc_id}' not found"
-            }
+        return {
+            'success': True,
+            'episode': episode,
+            'season': season,
+            'arcs': arcs,
+            'beats': beats
+        }
+    
+    def get_entity_episodes(self, project_id: str, kind: str, entity_id: str) -> Dict:
+        """
+        Get the episodes and plot beats featuring a character or location
         
-        if self.save_season_arcs(project_id, arc_season, season_arcs_data):
-            return {
-                'success': True,
-                'message': f"Arc '{arc_id}' deleted successfully from season {arc_season}"
-            }
-        else:
+        Args:
+            project_id: Project ID
+            kind: 'character' or 'location'
+            entity_id: Character or location ID
+        
+        Returns:
+            Dict with (season, episode) pairs and the matching beats
+        """
+        if kind not in ('character', 'location'):
             return {
                 'success': False,
-                'error': 'Failed to save after deletion'
+                'error': f'Invalid entity kind: {kind}'
             }
-    
-    def get_arc(self, project_id: str, arc_id: str) -> Dict:
-        """Get a specific arc from any season"""
-        story_dir = self.projects_dir / project_id / 'story'
-        season_files = list(story_dir.glob('season*_arcs.json'))
         
-        for season_file in season_files:
-            try:
-                with open(season_file, 'r', encoding='utf-8') as f:
-                    season_data = json.load(f)
-                    for arc in season_data.get('arcs', []):
-                        if arc['id'] == arc_id:
-                            return {
-                                'success': True,
-                                'arc': arc
-                            }
-            except Exception:
-                continue
+        index = self.get_index(project_id)
+        with self._index_lock:
+            episodes = index.episodes_for(kind, entity_id)
+            beats = index.beats_for(kind, entity_id)
         
         return {
-            'success': False,
-            'error': f"Arc '{arc_id}' not found"
+            'success': True,
+            kind: entity_id,
+            'episodes': episodes,
+            'beats': beats
         }
-    
-    def get_arcs_by_season(self, project_id: str, season: int) -> List[Dict]:
-        """Get all arcs for a specific season"""
-        season_arcs_data = self.load_season_arcs(project_id, season)
-        return season_arcs_data.get('arcs', [])
\ No newline at end of file
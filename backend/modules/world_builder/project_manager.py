@@ -3,17 +3,37 @@ Project Manager Module
 Handles project creation, loading, deletion, and listing
 """
 
-import json
 import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import uuid
 
+from ..storage import ProjectCatalogue, ProjectMetadata, ProjectTrash, atomic_write_json, load_file
+
 
 class ProjectManager:
     """Manages story builder projects"""
     
+    def __init__(self,
+                 metadata: Optional[ProjectMetadata] = None,
+                 catalogue: Optional[ProjectCatalogue] = None,
+                 trash: Optional[ProjectTrash] = None):
+        """
+        Args:
+            metadata: Storage's metadata service, so listings include edits
+                whose lastModified hasn't been flushed to disk yet
+            catalogue: Project index to list from and keep up to date
+                (one per projects directory is created if not given)
+            trash: Where deleted projects wait out their undo window
+                (one per projects directory is created if not given)
+        """
+        self.metadata = metadata
+        self.catalogue = catalogue
+        self.trash = trash
+        self._catalogues: Dict[Path, ProjectCatalogue] = {}
+        self._trashes: Dict[Path, ProjectTrash] = {}
+    
     def create_project(self, 
                       projects_dir: Path, 
                       title: str,
@@ -38,7 +58,7 @@ class ProjectManager:
             }
         
         # Generate unique project ID
-        project_id = self._generate_project_id(title)
+        project_id = self.generate_project_id(title)
         project_path = projects_dir / project_id
         
         # Check if project already exists
@@ -49,27 +69,27 @@ class ProjectManager:
             }
         
         try:
-            # Create directory structure
-            self._create_project_structure(project_path)
+            # Only the metadata is written: world sections are served from
+            # their templates until first saved, and every other folder is
+            # created by the first write into it
+            project_path.mkdir(parents=True, exist_ok=True)
             
             # Create project metadata
+            now = datetime.now().isoformat()
             metadata = {
                 'id': project_id,
                 'title': title,
                 'description': description,
                 'genre': genre,
-                'created': datetime.now().isoformat(),
-                'lastModified': datetime.now().isoformat(),
+                'created': now,
+                'lastModified': now,
                 'version': '1.0'
             }
             
             # Save metadata
-            metadata_file = project_path / 'project_metadata.json'
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            atomic_write_json(project_path / 'project_metadata.json', metadata)
             
-            # Initialize empty world files
-            self._initialize_world_files(project_path)
+            self._update_catalogue(projects_dir, lambda catalogue: catalogue.upsert(metadata))
             
             return {
                 'success': True,
@@ -87,47 +107,49 @@ class ProjectManager:
                 'error': f'Failed to create project: {str(e)}'
             }
     
-    def list_projects(self, projects_dir: Path) -> Dict:
+    def list_projects(self,
+                      projects_dir: Path,
+                      search: Optional[str] = None,
+                      genre: Optional[str] = None,
+                      sort: str = 'lastModified',
+                      order: Optional[str] = None,
+                      cursor: Optional[str] = None,
+                      limit: Optional[int] = None,
+                      refresh: bool = False) -> Dict:
         """
-        Get list of all projects
+        Get a page of projects from the catalogue
+        
+        Args:
+            projects_dir: Base projects directory
+            search: Case-insensitive substring of the title or genre
+            genre: Exact genre
+            sort: 'lastModified' (default, newest first), 'created' or 'title'
+            order: 'asc' or 'desc' to override the sort's default
+            cursor: next_cursor from the previous page
+            limit: Page size (None = every project)
+            refresh: Re-check every project's metadata file first
         
         Returns:
-            Dict with list of projects and their metadata
+            Dict with the projects, total matches and next_cursor
         """
-        if not projects_dir.exists():
-            return {
-                'success': True,
-                'projects': []
-            }
-        
-        projects = []
+        catalogue = self._get_catalogue(projects_dir)
         
-        for project_path in projects_dir.iterdir():
-            if project_path.is_dir():
-                metadata_file = project_path / 'project_metadata.json'
-                
-                if metadata_file.exists():
-                    try:
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                            projects.append({
-                                'id': metadata['id'],
-                                'title': metadata['title'],
-                                'description': metadata.get('description', ''),
-                                'genre': metadata.get('genre', 'General'),
-                                'created': metadata['created'],
-                                'lastModified': metadata.get('lastModified', metadata['created'])
-                            })
-                    except Exception:
-                        # Skip corrupted projects
-                        continue
+        # Write pending timestamps so the catalogue's order is current
+        if self.metadata is not None:
+            self.metadata.flush()
         
-        # Sort by last modified (newest first)
-        projects.sort(key=lambda x: x['lastModified'], reverse=True)
+        try:
+            catalogue.sync(verify=refresh)
+            page = catalogue.query(search, genre, sort, order, cursor, limit)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         
         return {
             'success': True,
-            'projects': projects
+            **page
         }
     
     def load_project(self, projects_dir: Path, project_id: str) -> Optional[Dict]:
@@ -152,8 +174,7 @@ class ProjectManager:
             return None
         
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            metadata = self._with_pending(project_id, load_file(metadata_file))
             
             return {
                 'success': True,
@@ -167,7 +188,12 @@ class ProjectManager:
             }
     
     def delete_project(self, projects_dir: Path, project_id: str) -> Dict:
-        """Delete a project"""
+        """
+        Delete a project by moving it to the trash
+        
+        The folder is renamed, not removed, so this returns immediately;
+        the project can be restored until its trash entry expires.
+        """
         project_path = projects_dir / project_id
         
         if not project_path.exists():
@@ -177,10 +203,12 @@ class ProjectManager:
             }
         
         try:
-            shutil.rmtree(project_path)
+            entry = self._get_trash(projects_dir).move(project_id)
+            self._update_catalogue(projects_dir, lambda catalogue: catalogue.remove(project_id))
             return {
                 'success': True,
-                'message': f'Project deleted successfully'
+                'message': f'Project deleted successfully',
+                'trash': entry
             }
         except Exception as e:
             return {
@@ -188,7 +216,91 @@ class ProjectManager:
                 'error': f'Failed to delete project: {str(e)}'
             }
     
-    def _generate_project_id(self, title: str) -> str:
+    def list_trash(self, projects_dir: Path) -> List[Dict]:
+        """Deleted projects that can still be restored, most recent first"""
+        return self._get_trash(projects_dir).entries()
+    
+    def restore_project(self, projects_dir: Path, trash_id: str) -> Dict:
+        """
+        Undo a deletion
+        
+        Args:
+            projects_dir: Base projects directory
+            trash_id: Trash entry from delete_project or list_trash
+        
+        Returns:
+            Dict with success status and the restored project_id;
+            'conflict' is set if a project with that id exists again
+        """
+        try:
+            project_id = self._get_trash(projects_dir).restore(trash_id)
+        except KeyError:
+            return {
+                'success': False,
+                'error': 'Deleted project not found (it may have expired)'
+            }
+        except FileExistsError as e:
+            return {
+                'success': False,
+                'conflict': True,
+                'error': str(e)
+            }
+        
+        try:
+            metadata = load_file(projects_dir / project_id / 'project_metadata.json')
+            self._update_catalogue(projects_dir, lambda catalogue: catalogue.upsert(metadata))
+        except Exception as e:
+            # The next catalogue sync picks the folder up
+            print(f"Error reading restored project metadata: {e}")
+        
+        return {
+            'success': True,
+            'project_id': project_id,
+            'message': 'Project restored successfully'
+        }
+    
+    def purge_project(self, projects_dir: Path, trash_id: str) -> Dict:
+        """Permanently delete a trashed project now (space is reclaimed in the background)"""
+        try:
+            self._get_trash(projects_dir).purge(trash_id)
+        except KeyError:
+            return {
+                'success': False,
+                'error': 'Deleted project not found'
+            }
+        return {
+            'success': True,
+            'message': 'Project permanently deleted'
+        }
+    
+    def _get_catalogue(self, projects_dir: Path) -> ProjectCatalogue:
+        if self.catalogue is not None and self.catalogue.projects_dir == projects_dir:
+            return self.catalogue
+        if projects_dir not in self._catalogues:
+            self._catalogues[projects_dir] = ProjectCatalogue(projects_dir)
+        return self._catalogues[projects_dir]
+    
+    def _get_trash(self, projects_dir: Path) -> ProjectTrash:
+        if self.trash is not None and self.trash.projects_dir == projects_dir:
+            return self.trash
+        if projects_dir not in self._trashes:
+            self._trashes[projects_dir] = ProjectTrash(projects_dir)
+        return self._trashes[projects_dir]
+    
+    def _update_catalogue(self, projects_dir: Path, update):
+        """Apply an update to the catalogue; on failure the next sync repairs it"""
+        try:
+            update(self._get_catalogue(projects_dir))
+        except Exception as e:
+            print(f"Error updating project catalogue: {e}")
+    
+    def _with_pending(self, project_id: str, metadata: Dict) -> Dict:
+        """Overlay changes the metadata service hasn't written yet"""
+        if self.metadata is None:
+            return metadata
+        return self.metadata.apply_pending(project_id, metadata)
+    
+    def generate_project_id(self, title: str) -> str:
         """Generate unique project ID from title"""
         # Clean title for filesystem
         clean_title = "".join(c if c.isalnum() or c in (' ', '_') else '' for c in title)
@@ -197,76 +309,4 @@ class ProjectManager:
         # Add short UUID for uniqueness
         unique_id = str(uuid.uuid4())[:8]
         
-        return f"{clean_title}_{unique_id}"
-    
-    def _create_project_structure(self, project_path: Path):
-        """Create directory structure for new project"""
-        # Main directories
-        (project_path / 'world').mkdir(parents=True, exist_ok=True)
-        (project_path / 'story' / 'seasons').mkdir(parents=True, exist_ok=True)
-        (project_path / 'state').mkdir(parents=True, exist_ok=True)
-        (project_path / 'exports' / 'tts_scripts').mkdir(parents=True, exist_ok=True)
-    
-    def _initialize_world_files(self, project_path: Path):
-        """Create empty world data files"""
-        world_dir = project_path / 'world'
-        
-        # World overview (match world_schemas.json)
-        with open(world_dir / 'world_overview.json', 'w', encoding='utf-8') as f:
-            json.dump({
-                'name': '',
-                'description': '',
-                'timePeriod': '',
-                'technologyLevel': '',
-                'magicSystem': '',
-                'history': '',
-                'rulesPhysics': ''
-            }, f, indent=2)
-        
-        # Locations (match world_schemas.json)
-        with open(world_dir / 'locations.json', 'w', encoding='utf-8') as f:
-            json.dump({
-                'places': []
-            }, f, indent=2)
-        
-        # Characters
-        with open(world_dir / 'characters.json', 'w', encoding='utf-8') as f:
-            json.dump({'characters': []}, f, indent=2)
-        
-        # NPCs
-        with open(world_dir / 'npcs.json', 'w', encoding='utf-8') as f:
-            json.dump({'npcs': []}, f, indent=2)
-        
-        # Factions
-        with open(world_dir / 'factions.json', 'w', encoding='utf-8') as f:
-            json.dump({'factions': []}, f, indent=2)
-        
-        # Religions
-        with open(world_dir / 'religions.json', 'w', encoding='utf-8') as f:
-            json.dump({'religions': []}, f, indent=2)
-        
-        # Glossary
-        with open(world_dir / 'glossary.json', 'w', encoding='utf-8') as f:
-            json.dump({'terms': []}, f, indent=2)
-        
-        # Content (items)
-        with open(world_dir / 'content.json', 'w', encoding='utf-8') as f:
-            json.dump({
-                'items': []
-            }, f, indent=2)
-        
-        # Initialize state files
-        state_dir = project_path / 'state'
-        
-        with open(state_dir / 'current_state.json', 'w', encoding='utf-8') as f:
-            json.dump({
-                'lastUpdated': datetime.now().isoformat(),
-                'currentDate': '',
-                'characterPositions': {},
-                'relationships': {},
-                'resources': {},
-                'knownInformation': []
-            }, f, indent=2)
-        
-        with open(state_dir / 'timeline.json', 'w', encoding='utf-8') as f:
-            json.dump({'events': []}, f, indent=2)
\ No newline at end of file
+        return f"{clean_title}_{unique_id}"
\ No newline at end of file
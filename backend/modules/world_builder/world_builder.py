@@ -3,29 +3,22 @@ World Builder Module
 Handles world building data management and context building
 """
 
-import json
 from pathlib import Path
-from typing import Dict, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..storage import ENTITY_LISTS, JsonStorage, StorageBackend, WORLD_SECTIONS
+from .world_patch import PatchConflict, PatchError, apply_json_patch, apply_merge_patch, merge_entities
 
 
 class WorldBuilder:
     """Manages world building data"""
     
-    VALID_SECTIONS = [
-        'world_overview',
-        'locations',
-        'characters',
-        'npcs',
-        'factions',
-        'religions',
-        'glossary',
-        'content'
-    ]
-    
-    def __init__(self, projects_dir: Path):
-        """Initialize WorldBuilder with projects directory"""
+    VALID_SECTIONS = WORLD_SECTIONS
+    
+    def __init__(self, projects_dir: Path, storage: Optional[StorageBackend] = None):
+        """Initialize WorldBuilder with projects directory and storage backend"""
         self.projects_dir = projects_dir
+        self.storage = storage or JsonStorage(projects_dir)
 
     def load_world_section(self, project_id: str, section: str) -> Dict:
         """
@@ -39,14 +32,7 @@ class WorldBuilder:
             Dict with section data or empty dict if not found
         """
         try:
-            world_dir = self.projects_dir / project_id / 'world'
-            file_path = world_dir / f'{section}.json'
-            
-            if not file_path.exists():
-                return {}
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.storage.read_section_or_default(project_id, section) or {}
         except Exception as e:
             print(f"Error loading section {section}: {e}")
             return {}
@@ -59,14 +45,10 @@ class WorldBuilder:
         if section not in self.VALID_SECTIONS:
             return None
         
-        section_file = projects_dir / project_id / 'world' / f'{section}.json'
-        
-        if not section_file.exists():
-            return {'error': f'Section {section} not found'}
-        
         try:
-            with open(section_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self.storage.read_section_or_default(project_id, section)
+            if data is None:
+                return {'error': f'Section {section} not found'}
             return {
                 'success': True,
                 'section': section,
@@ -90,21 +72,16 @@ class WorldBuilder:
                 'error': f'Invalid section: {section}'
             }
         
-        section_file = projects_dir / project_id / 'world' / f'{section}.json'
-        
-        if not section_file.exists():
+        if not self.storage.section_available(project_id, section):
             return {
                 'success': False,
                 'error': f'Section file not found: {section}'
             }
         
         try:
-            # Write updated data
-            with open(section_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            # Update project's last modified timestamp
-            self._update_project_timestamp(projects_dir, project_id)
+            with self.storage.locks.write(project_id):
+                # Write updated data (storage records the project's lastModified)
+                self.storage.write_section(project_id, section, data)
             
             return {
                 'success': True,
@@ -116,114 +93,360 @@ class WorldBuilder:
                 'error': f'Failed to update section: {str(e)}'
             }
     
+    def patch_section(self,
+                     projects_dir: Path,
+                     project_id: str,
+                     section: str,
+                     patch: Union[List, Dict]) -> Dict:
+        """
+        Apply a partial update to a world section
+        
+        Args:
+            patch: One of
+                - a list: RFC 6902 JSON Patch against the section document
+                - {"entities": [...], "delete": [...]}: merge patches for
+                  list-section entities keyed by id, plus ids to remove
+                - any other object: RFC 7396 merge patch of the whole section
+        
+        Returns:
+            Dict with the ids written and deleted; 'conflict' is set when a
+            JSON Patch 'test' operation failed
+        """
+        if section not in self.VALID_SECTIONS:
+            return {
+                'success': False,
+                'error': f'Invalid section: {section}'
+            }
+        
+        try:
+            with self.storage.locks.write(project_id):
+                current = self.storage.read_section_or_default(project_id, section)
+                if current is None:
+                    return {
+                        'success': False,
+                        'error': f'Section file not found: {section}'
+                    }
+                
+                patched = self._apply_patch(section, current, patch)
+                if not isinstance(patched, dict):
+                    raise PatchError('Patched section must be an object')
+                
+                changes = self._entity_changes(section, current, patched)
+                if changes is None:
+                    self.storage.write_section(project_id, section, patched)
+                    written, deleted = None, []
+                else:
+                    put, deleted = changes
+                    if put or deleted:
+                        self.storage.update_entities(project_id, section, put, deleted)
+                    _, id_field = ENTITY_LISTS[section]
+                    written = [e[id_field] for e in put]
+            
+            return {
+                'success': True,
+                'message': f'Section {section} patched successfully',
+                'updated': written,
+                'deleted': deleted
+            }
+        except PatchConflict as e:
+            return {
+                'success': False,
+                'conflict': True,
+                'error': str(e)
+            }
+        except PatchError as e:
+            return {
+                'success': False,
+                'error': f'Invalid patch: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to patch section: {str(e)}'
+            }
+    
+    def _apply_patch(self, section: str, current: Dict, patch: Union[List, Dict]) -> Dict:
+        """Dispatch on the patch format; the current document is left untouched"""
+        if isinstance(patch, list):
+            return apply_json_patch(current, patch)
+        if not isinstance(patch, dict):
+            raise PatchError('Patch must be a JSON Patch list or an object')
+        
+        if section in ENTITY_LISTS and set(patch) and set(patch) <= {'entities', 'delete'}:
+            list_key, id_field = ENTITY_LISTS[section]
+            return merge_entities(current, list_key, id_field,
+                                  patch.get('entities', []), patch.get('delete', []))
+        return apply_merge_patch(current, patch)
+    
+    def _entity_changes(self, section: str, old: Dict, new: Dict) -> Optional[Tuple[List[Dict], List[str]]]:
+        """
+        Express a patched section as entity upserts and deletes
+        
+        Only possible when nothing but the entity list changed, every entity
+        has a unique id and surviving entities keep their order with new
+        ones appended. Patches are copy-on-write, so an entity object that is
+        still the same object was not touched.
+        
+        Returns:
+            (entities to write, ids to delete), or None if the section has
+            to be rewritten as a whole
+        """
+        if section not in ENTITY_LISTS:
+            return None
+        list_key, id_field = ENTITY_LISTS[section]
+        
+        if {k: v for k, v in old.items() if k != list_key} != {k: v for k, v in new.items() if k != list_key}:
+            return None
+        
+        old_list = old.get(list_key, [])
+        new_list = new.get(list_key, [])
+        if not isinstance(new_list, list) or not all(isinstance(e, dict) for e in new_list):
+            return None
+        
+        old_ids = [e.get(id_field) for e in old_list]
+        new_ids = [e.get(id_field) for e in new_list]
+        for ids in (old_ids, new_ids):
+            if not all(ids) or len(set(ids)) != len(ids):
+                return None
+        
+        new_set = set(new_ids)
+        old_set = set(old_ids)
+        kept = [i for i in old_ids if i in new_set]
+        if new_ids != kept + [i for i in new_ids if i not in old_set]:
+            return None
+        
+        old_by_id = dict(zip(old_ids, old_list))
+        put = [e for e in new_list if old_by_id.get(e[id_field]) is not e]
+        deleted = [i for i in old_ids if i not in new_set]
+        return put, deleted
+    
     def build_context(self, projects_dir: Path, project_id: str) -> Dict:
         """
         Build AI context from world data
         
         This gathers all world information to provide context for AI generation
         """
-        project_path = projects_dir / project_id
-        world_dir = project_path / 'world'
-        
-        if not world_dir.exists():
-            return {}
-        
         context = {}
         
         # Load all world sections
         for section in self.VALID_SECTIONS:
-            section_file = world_dir / f'{section}.json'
-            if section_file.exists():
-                try:
-                    with open(section_file, 'r', encoding='utf-8') as f:
-                        context[section] = json.load(f)
-                except Exception:
-                    # Skip files that can't be read
-                    continue
+            try:
+                data = self.storage.read_section_or_default(project_id, section)
+            except Exception:
+                # Skip sections that can't be read
+                continue
+            if data is not None:
+                context[section] = data
         
         return context
     
-    def _update_project_timestamp(self, projects_dir: Path, project_id: str):
-        """Update project's lastModified timestamp"""
-        metadata_file = projects_dir / project_id / 'project_metadata.json'
+    # ------------------------------------------------------------------
+    # Entities
+    # ------------------------------------------------------------------
+    
+    def _entity_section_error(self, project_id: str, section: str) -> Optional[Dict]:
+        """Error result if section isn't an existing list section, otherwise None"""
+        if section not in ENTITY_LISTS:
+            return {
+                'success': False,
+                'error': f'Section {section} does not hold entities'
+            }
+        if not self.storage.section_available(project_id, section):
+            return {
+                'success': False,
+                'error': f'Section file not found: {section}'
+            }
+        return None
+    
+    def _entity_ids(self, section: str, entities: List[Dict]) -> Tuple[List, Optional[Dict]]:
+        """Ids of a batch of entities, or an error result if any is missing or repeated"""
+        _, id_field = ENTITY_LISTS[section]
+        if not isinstance(entities, list) or not all(isinstance(e, dict) for e in entities):
+            return [], {'success': False, 'error': 'Entities must be a list of objects'}
+        
+        ids = [e.get(id_field) for e in entities]
+        if not all(ids):
+            return [], {'success': False, 'error': f"Every entity needs a '{id_field}'"}
         
-        if not metadata_file.exists():
-            return
+        seen = set()
+        repeated = sorted({i for i in ids if i in seen or seen.add(i)}, key=str)
+        if repeated:
+            return [], {
+                'success': False,
+                'conflict': True,
+                'error': f"Duplicate {id_field} in request: {', '.join(map(str, repeated))}"
+            }
+        return ids, None
+    
+    def get_entity(self, project_id: str, section: str, entity_id: str) -> Dict:
+        """Get one entity of a list section by id"""
+        error = self._entity_section_error(project_id, section)
+        if error:
+            return error
+        
+        try:
+            entity = self.storage.get_entity(project_id, section, entity_id)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to read entity: {str(e)}'
+            }
+        if entity is None:
+            return {
+                'success': False,
+                'missing': [entity_id],
+                'error': f'{entity_id} not found in {section}'
+            }
+        return {
+            'success': True,
+            'section': section,
+            'entity': entity
+        }
+    
+    def create_entities(self,
+                        projects_dir: Path,
+                        project_id: str,
+                        section: str,
+                        entities: List[Dict]) -> Dict:
+        """
+        Add new entities to a list section
+        
+        Ids must be unique: the whole batch is rejected ('conflict') if any
+        id is repeated or already taken.
+        """
+        error = self._entity_section_error(project_id, section)
+        if error:
+            return error
+        ids, error = self._entity_ids(section, entities)
+        if error:
+            return error
+        
+        try:
+            with self.storage.locks.write(project_id):
+                taken = self.storage.get_entities(project_id, section, ids)
+                if taken:
+                    return {
+                        'success': False,
+                        'conflict': True,
+                        'error': f"Already exists in {section}: {', '.join(map(str, taken))}"
+                    }
+                
+                self.storage.put_entities(project_id, section, entities)
+            
+            return {
+                'success': True,
+                'message': f'Added {len(ids)} to {section}',
+                'ids': ids
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to add entities: {str(e)}'
+            }
+    
+    def update_entities(self,
+                        projects_dir: Path,
+                        project_id: str,
+                        section: str,
+                        entities: List[Dict],
+                        merge: bool = True) -> Dict:
+        """
+        Update existing entities of a list section, matched by id
+        
+        Args:
+            entities: Entities (or, with merge, RFC 7396 merge patches) each
+                      carrying the id of the entity to update
+            merge: Merge into the stored entity instead of replacing it
+        """
+        error = self._entity_section_error(project_id, section)
+        if error:
+            return error
+        ids, error = self._entity_ids(section, entities)
+        if error:
+            return error
         
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            with self.storage.locks.write(project_id):
+                current = self.storage.get_entities(project_id, section, ids)
+                missing = [i for i in ids if i not in current]
+                if missing:
+                    return {
+                        'success': False,
+                        'missing': missing,
+                        'error': f"Not found in {section}: {', '.join(map(str, missing))}"
+                    }
+                
+                if merge:
+                    entities = [apply_merge_patch(current[i], e) for i, e in zip(ids, entities)]
+                self.storage.put_entities(project_id, section, entities)
             
-            metadata['lastModified'] = datetime.now().isoformat()
+            return {
+                'success': True,
+                'message': f'Updated {len(ids)} in {section}',
+                'ids': ids
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to update entities: {str(e)}'
+            }
+    
+    def delete_entities(self,
+                        projects_dir: Path,
+                        project_id: str,
+                        section: str,
+                        entity_ids: List[str]) -> Dict:
+        """Delete entities of a list section by id; nothing is deleted if any id is unknown"""
+        error = self._entity_section_error(project_id, section)
+        if error:
+            return error
+        if not isinstance(entity_ids, list) or not entity_ids:
+            return {'success': False, 'error': 'A list of ids is required'}
+        
+        try:
+            with self.storage.locks.write(project_id):
+                current = self.storage.get_entities(project_id, section, entity_ids)
+                missing = [i for i in entity_ids if i not in current]
+                if missing:
+                    return {
+                        'success': False,
+                        'missing': missing,
+                        'error': f"Not found in {section}: {', '.join(map(str, missing))}"
+                    }
+                
+                self.storage.delete_entities(project_id, section, entity_ids)
             
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-        except Exception:
-            # Fail silently - timestamp update is not critical
-            pass
+            return {
+                'success': True,
+                'message': f'Deleted {len(current)} from {section}',
+                'ids': list(current)
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to delete entities: {str(e)}'
+            }
     
     def add_location(self, 
                     projects_dir: Path,
                     project_id: str,
                     location_data: Dict) -> Dict:
         """Add a new location to the world"""
-        result = self.get_section(projects_dir, project_id, 'locations')
-        
-        if not result.get('success'):
-            return result
-        
-        locations = result['data']
-        
-        # Add new location
-        if 'places' not in locations:
-            locations['places'] = []
-        
-        locations['places'].append(location_data)
-        
-        # Save updated data
-        return self.update_section(projects_dir, project_id, 'locations', locations)
+        return self.create_entities(projects_dir, project_id, 'locations', [location_data])
     
     def add_character(self,
                      projects_dir: Path,
                      project_id: str,
                      character_data: Dict) -> Dict:
         """Add a new character to the world"""
-        result = self.get_section(projects_dir, project_id, 'characters')
-        
-        if not result.get('success'):
-            return result
-        
-        characters = result['data']
-        
-        # Add new character
-        if 'characters' not in characters:
-            characters['characters'] = []
-        
-        characters['characters'].append(character_data)
-        
-        # Save updated data
-        return self.update_section(projects_dir, project_id, 'characters', characters)
+        return self.create_entities(projects_dir, project_id, 'characters', [character_data])
     
     def add_faction(self,
                    projects_dir: Path,
                    project_id: str,
                    faction_data: Dict) -> Dict:
         """Add a new faction to the world"""
-        result = self.get_section(projects_dir, project_id, 'factions')
-        
-        if not result.get('success'):
-            return result
-        
-        factions = result['data']
-        
-        # Add new faction
-        if 'factions' not in factions:
-            factions['factions'] = []
-        
-        factions['factions'].append(faction_data)
-        
-        # Save updated data
-        return self.update_section(projects_dir, project_id, 'factions', factions)
+        return self.create_entities(projects_dir, project_id, 'factions', [faction_data])
     
     def get_world_summary(self, projects_dir: Path, project_id: str) -> Dict:
         """Get a summary of the world for display purposes"""
@@ -3,21 +3,24 @@ World Extractor Module - Phase 2.1: AI Summary Extraction
 Extracts world data from AI-generated structured summary
 """
 
-import json
 import re
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from ..storage import JsonStorage, StorageBackend
 
 
 class WorldExtractor:
-    def __init__(self, ollama_client):
+    def __init__(self, ollama_client, storage: Optional[StorageBackend] = None):
         """
         Initialize with existing OllamaClient
         
         Args:
             ollama_client: OllamaClient instance from ai_integration module
+            storage: Storage backend (defaults to JSON files under projects_dir)
         """
         self.ollama = ollama_client
+        self.storage = storage
     
     def extract_from_ai_summary(self, 
                                projects_dir: Path,
@@ -37,12 +40,7 @@ class WorldExtractor:
             Dict with success status and created files list
         """
         try:
-            project_path = projects_dir / project_id
-            world_dir = project_path / 'world'
-            
-            # Create world directory if it doesn't exist
-            if not world_dir.exists():
-                world_dir.mkdir(parents=True, exist_ok=True)
+            storage = self.storage or JsonStorage(projects_dir)
             
             # Extract structured data from AI summary
             extracted_data = self._parse_ai_summary(summary_message, schemas)
@@ -56,8 +54,8 @@ class WorldExtractor:
                     'error': 'No entities found in summary. Please generate a world summary first.'
                 }
             
-            # Write JSON files
-            created_files = self._write_world_files(world_dir, extracted_data)
+            # Write all sections together
+            created_files = self._write_world_files(storage, project_id, extracted_data)
             
             return {
                 'success': True,
@@ -398,10 +396,8 @@ class WorldExtractor:
             'items': len(data.get('content', {}).get('items', [])),
         }
     
-    def _write_world_files(self, world_dir: Path, data: Dict) -> List[str]:
-        """Write extracted data to JSON files"""
-        
-        created_files = []
+    def _write_world_files(self, storage: StorageBackend, project_id: str, data: Dict) -> List[str]:
+        """Write extracted data to world sections in one multi-section write"""
         
         # File mapping
         file_mapping = {
@@ -415,14 +411,7 @@ class WorldExtractor:
             'content': 'content.json'
         }
         
-        for data_key, filename in file_mapping.items():
-            if data_key in data:
-                file_path = world_dir / filename
-                
-                # Write JSON with pretty printing
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data[data_key], f, indent=2, ensure_ascii=False)
-                
-                created_files.append(filename)
+        sections = {key: data[key] for key in file_mapping if key in data}
+        storage.write_sections(project_id, sections)
         
-        return created_files
\ No newline at end of file
+        return [file_mapping[key] for key in sections]
@@ -0,0 +1,264 @@
+"""
+World Patch Module
+Partial updates for world sections: RFC 6902 JSON Patch, RFC 7396 merge
+patches, and entity-level merges keyed by id
+
+Patches are applied copy-on-write: containers along each patched path are
+copied and everything else is shared with the original document, which is
+never modified. Entities a patch doesn't touch therefore keep their
+identity, which is how callers tell which entities actually changed.
+"""
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+
+class PatchError(ValueError):
+    """Malformed patch, or a path that doesn't resolve"""
+
+
+class PatchConflict(PatchError):
+    """A JSON Patch 'test' operation failed"""
+
+
+# ----------------------------------------------------------------------
+# JSON Pointer (RFC 6901)
+# ----------------------------------------------------------------------
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer into unescaped reference tokens"""
+    if not isinstance(pointer, str):
+        raise PatchError(f'Invalid JSON Pointer: {pointer!r}')
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError(f"JSON Pointer must start with '/': {pointer}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _index(container: List, token: str, allow_end: bool) -> int:
+    """Resolve an array token to an index ('-' means one past the end)"""
+    if token == '-' and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f'Invalid array index: {token}')
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise PatchError(f'Array index out of range: {token}')
+    return index
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchError(f'Path not found: {token}')
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(container, token, allow_end=False)]
+    raise PatchError(f'Cannot descend into a scalar at: {token}')
+
+
+def resolve(document: Any, tokens: List[str]) -> Any:
+    """Get the value a token list points at"""
+    value = document
+    for token in tokens:
+        value = _child(value, token)
+    return value
+
+
+def _clone_path(document: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    """
+    Copy the containers from the root down to the parent of tokens[-1]
+
+    Returns:
+        (new root, copied parent container)
+    """
+    root = copy.copy(document)
+    parent = root
+    for token in tokens[:-1]:
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f'Path not found: {token}')
+            parent[token] = copy.copy(parent[token])
+            parent = parent[token]
+        elif isinstance(parent, list):
+            i = _index(parent, token, allow_end=False)
+            parent[i] = copy.copy(parent[i])
+            parent = parent[i]
+        else:
+            raise PatchError(f'Cannot descend into a scalar at: {token}')
+    if not isinstance(parent, (dict, list)):
+        raise PatchError(f'Cannot descend into a scalar at: {tokens[-1]}')
+    return root, parent
+
+
+# ----------------------------------------------------------------------
+# JSON Patch (RFC 6902)
+# ----------------------------------------------------------------------
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    root, parent = _clone_path(document, tokens)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    else:
+        parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+    return root
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError('Cannot remove the whole document')
+    root, parent = _clone_path(document, tokens)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f'Path not found: {tokens[-1]}')
+        del parent[tokens[-1]]
+    else:
+        del parent[_index(parent, tokens[-1], allow_end=False)]
+    return root
+
+
+def _replace(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    root, parent = _clone_path(document, tokens)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f'Path not found: {tokens[-1]}')
+        parent[tokens[-1]] = value
+    else:
+        parent[_index(parent, tokens[-1], allow_end=False)] = value
+    return root
+
+
+def apply_json_patch(document: Any, operations: List[Dict]) -> Any:
+    """
+    Apply an RFC 6902 JSON Patch
+
+    Args:
+        document: Document to patch (left unmodified)
+        operations: List of {"op", "path", "value"/"from"} operations
+
+    Returns:
+        The patched document
+
+    Raises:
+        PatchConflict: A 'test' operation failed
+        PatchError: Any other invalid operation; nothing is applied
+    """
+    if not isinstance(operations, list):
+        raise PatchError('JSON Patch must be a list of operations')
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError('Each JSON Patch operation must be an object')
+        op = operation.get('op')
+        tokens = parse_pointer(operation.get('path'))
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f"'{op}' operation requires a value")
+
+        if op == 'add':
+            document = _add(document, tokens, operation['value'])
+        elif op == 'remove':
+            document = _remove(document, tokens)
+        elif op == 'replace':
+            document = _replace(document, tokens, operation['value'])
+        elif op in ('move', 'copy'):
+            source = parse_pointer(operation.get('from'))
+            value = resolve(document, source)
+            if op == 'move':
+                if tokens[:len(source)] == source and len(tokens) > len(source):
+                    raise PatchError('Cannot move a value into one of its children')
+                document = _remove(document, source)
+            else:
+                value = copy.deepcopy(value)
+            document = _add(document, tokens, value)
+        elif op == 'test':
+            try:
+                actual = resolve(document, tokens)
+            except PatchError:
+                raise PatchConflict(f"Test failed: {operation['path']} does not exist")
+            if actual != operation['value']:
+                raise PatchConflict(f"Test failed: {operation['path']} has changed")
+        else:
+            raise PatchError(f'Unknown JSON Patch operation: {op}')
+
+    return document
+
+
+# ----------------------------------------------------------------------
+# Merge patches (RFC 7396) and entity merges
+# ----------------------------------------------------------------------
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """
+    Apply an RFC 7396 merge patch
+
+    Objects merge recursively, null removes a member and anything else
+    (including arrays) replaces the target value.
+    """
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def merge_entities(document: Dict,
+                   list_key: str,
+                   id_field: str,
+                   merges: List[Dict],
+                   deletes: List[str]) -> Dict:
+    """
+    Merge-patch entities of a list section by id
+
+    Args:
+        document: Section document (left unmodified)
+        list_key: Key of the entity list in the document
+        id_field: Entity id field
+        merges: Merge patches, each carrying the id of the entity it
+                applies to; unknown ids are appended as new entities
+        deletes: Ids of entities to remove
+
+    If the list already repeats an id, patches apply to its first entry,
+    matching how storage resolves entity ids.
+
+    Returns:
+        The patched document
+    """
+    if not isinstance(merges, list) or not isinstance(deletes, list):
+        raise PatchError("'entities' and 'delete' must be lists")
+
+    entities = list(document.get(list_key, []))
+    positions = {}
+    for i, entity in enumerate(entities):
+        if entity.get(id_field):
+            positions.setdefault(entity[id_field], i)
+
+    for patch in merges:
+        if not isinstance(patch, dict) or not patch.get(id_field):
+            raise PatchError(f"Each entity patch needs a '{id_field}'")
+        entity_id = patch[id_field]
+        if entity_id in positions:
+            entities[positions[entity_id]] = apply_merge_patch(entities[positions[entity_id]], patch)
+        else:
+            positions[entity_id] = len(entities)
+            entities.append(apply_merge_patch({}, patch))
+
+    doomed = set(deletes)
+    missing = doomed - set(positions)
+    if missing:
+        raise PatchError(f"Unknown {id_field}(s) to delete: {', '.join(sorted(map(str, missing)))}")
+
+    result = dict(document)
+    result[list_key] = [e for e in entities if e.get(id_field) not in doomed]
+    return result
@@ -0,0 +1,25 @@
+"""
+Shared test setup: make the backend's modules importable and provide
+fresh storage backends rooted in a temporary projects directory
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.storage import JsonStorage, SQLiteStorage  # noqa: E402
+
+
+PROJECT_ID = 'test_project'
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    """A storage backend of each kind with one empty project"""
+    backend = JsonStorage(tmp_path) if request.param == 'json' else SQLiteStorage(tmp_path)
+    (tmp_path / PROJECT_ID).mkdir()
+    yield backend
+    backend.forget(PROJECT_ID)
@@ -0,0 +1,41 @@
+"""
+Episode lookups in the arc query index
+"""
+
+from modules.story_engine.arc_index import ArcIndex
+
+
+def _arc(arc_id, start, end, number=1):
+    return {'id': arc_id, 'arcNumber': number, 'episodes': {'start': start, 'end': end}}
+
+
+def _covering(index, episode, season=None):
+    return [arc['id'] for arc in index.arcs_covering(episode, season)]
+
+
+def test_arcs_covering_follows_adds_and_removes():
+    index = ArcIndex.build({
+        1: {'arcs': [_arc('a', 1, 4, 1), _arc('b', 3, 6, 2)]},
+        2: {'arcs': [_arc('c', 3, 3)]}
+    })
+
+    assert _covering(index, 3) == ['a', 'b', 'c']
+    assert _covering(index, 3, season=1) == ['a', 'b']
+    assert _covering(index, 7) == []
+
+    index.remove('a')
+    index.add(_arc('b', 5, 8, 2), 1)
+
+    assert _covering(index, 3) == ['c']
+    assert _covering(index, 8) == ['b']
+
+
+def test_over_long_ranges_are_found_without_bucketing():
+    index = ArcIndex.build({1: {'arcs': [_arc('short', 2, 2, 1), _arc('long', 1, 10 ** 6, 2)]}})
+
+    assert _covering(index, 2) == ['short', 'long']
+    assert _covering(index, 500000) == ['long']
+    assert len(index.covering) == 1
+
+    index.remove('long')
+    assert _covering(index, 500000) == []
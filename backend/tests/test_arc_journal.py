@@ -0,0 +1,57 @@
+"""
+Arc journal crash recovery
+"""
+
+from modules.storage import JsonStorage
+
+from .conftest import PROJECT_ID
+
+
+def _arc(arc_id):
+    return {'id': arc_id, 'title': arc_id.upper(), 'episodes': {'start': 1, 'end': 2}}
+
+
+def _tear(storage):
+    """Simulate a writer that crashed part-way through appending a line"""
+    with open(storage.journal.journal_path(PROJECT_ID), 'ab') as f:
+        f.write(b'{"op": "put", "season": 1, "arc": {"id": "tor')
+
+
+def _arc_ids(projects_dir):
+    """Arc ids as a freshly started process would load them"""
+    fresh = JsonStorage(projects_dir)
+    return {arc['id'] for arc in fresh.read_season(PROJECT_ID, 1)['arcs']}
+
+
+def test_append_after_torn_line_survives_restart(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    storage = JsonStorage(tmp_path)
+    storage.put_arc(PROJECT_ID, 1, _arc('a'))
+    _tear(storage)
+
+    storage.put_arc(PROJECT_ID, 1, _arc('b'))
+
+    assert {a['id'] for a in storage.read_season(PROJECT_ID, 1)['arcs']} == {'a', 'b'}
+    assert _arc_ids(tmp_path) == {'a', 'b'}
+
+
+def test_cold_load_with_torn_line_then_append(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    first = JsonStorage(tmp_path)
+    first.put_arc(PROJECT_ID, 1, _arc('a'))
+    _tear(first)
+
+    # A new process loads the journal (ignoring the torn tail), then writes
+    second = JsonStorage(tmp_path)
+    second.put_arc(PROJECT_ID, 1, _arc('b'))
+
+    assert _arc_ids(tmp_path) == {'a', 'b'}
+
+
+def test_torn_line_alone_is_ignored(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    storage = JsonStorage(tmp_path)
+    storage.put_arc(PROJECT_ID, 1, _arc('a'))
+    _tear(storage)
+
+    assert _arc_ids(tmp_path) == {'a'}
@@ -0,0 +1,85 @@
+"""
+Project export and import as .tar.gz archives
+"""
+
+import io
+import json
+import tarfile
+
+import pytest
+
+from modules.storage import archive
+from modules.storage.archive import export_archive, import_archive
+
+from .conftest import PROJECT_ID
+
+
+def _new_id(title):
+    return 'imported_project'
+
+
+def _make_project(storage):
+    (storage.projects_dir / PROJECT_ID / 'project_metadata.json').write_text(json.dumps({
+        'id': PROJECT_ID, 'title': 'Test Project', 'created': '2024-01-01T00:00:00'
+    }))
+    storage.write_section(PROJECT_ID, 'npcs', {'npcs': [{'id': 'aria', 'name': 'Aria'}]})
+    storage.put_arc(PROJECT_ID, 1, {'id': 'arc1', 'title': 'One', 'season': 1})
+    storage.put_arc(PROJECT_ID, 2, {'id': 'arc2', 'title': 'Two', 'season': 2})
+    (storage.projects_dir / PROJECT_ID / 'exports').mkdir()
+    (storage.projects_dir / PROJECT_ID / 'exports' / 'notes.txt').write_text('raw file')
+
+
+def _tar(entries):
+    """A .tar.gz of (name, bytes) entries, after a valid manifest"""
+    buffer = io.BytesIO()
+    manifest = json.dumps({'format': archive.ARCHIVE_FORMAT, 'version': 1, 'projectId': 'evil'}).encode()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for name, data in [('evil/manifest.json', manifest)] + entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_export_import_round_trip(storage):
+    _make_project(storage)
+    buffer = io.BytesIO()
+    export_archive(storage, PROJECT_ID, buffer)
+    buffer.seek(0)
+
+    result = import_archive(storage, buffer, _new_id)
+
+    assert result['success'], result
+    assert result['renamed'] and result['project_id'] == 'imported_project'
+    assert (result['sections'], result['seasons'], result['arcs'], result['files']) == (1, 2, 2, 1)
+    copy = result['project_id']
+    assert storage.read_section(copy, 'npcs') == storage.read_section(PROJECT_ID, 'npcs')
+    assert storage.read_seasons(copy).keys() == {1, 2}
+    assert storage.arc_season(copy, 'arc2') == 2
+    assert (storage.projects_dir / copy / 'exports' / 'notes.txt').read_text() == 'raw file'
+    storage.forget(copy)
+
+
+@pytest.mark.parametrize('name', [
+    'evil/exports/../../escaped.txt',
+    'evil/../escaped.txt',
+    'other/escaped.txt'
+])
+def test_import_rejects_paths_outside_the_project(storage, name):
+    result = import_archive(storage, _tar([(name, b'x')]), _new_id)
+
+    assert not result['success']
+    assert not (storage.projects_dir / 'escaped.txt').exists()
+    assert not (storage.projects_dir / 'evil').exists()
+
+
+def test_import_rejects_oversize_documents(storage, monkeypatch):
+    monkeypatch.setattr(archive, 'MAX_DOCUMENT_BYTES', 64)
+    section = json.dumps({'npcs': [{'id': f'npc{i}'} for i in range(20)]}).encode()
+
+    result = import_archive(storage, _tar([('evil/world/npcs.json', section)]), _new_id)
+
+    assert not result['success']
+    assert 'too large' in result['error']
+    assert not (storage.projects_dir / 'evil').exists()
@@ -0,0 +1,30 @@
+"""
+World and episode consistency scopes
+"""
+
+from modules.consistency.validator import ConsistencyValidator
+
+from .conftest import PROJECT_ID
+
+
+def _dangling(result):
+    return sorted(w['path'] for w in result['warnings'] if w['type'] == 'dangling_reference')
+
+
+def test_arc_references_are_reported_by_the_episode_scope_only(tmp_path, storage):
+    storage.write_section(PROJECT_ID, 'characters', {'characters': [
+        {'id': 'kael', 'name': 'Kael', 'currentLocation': 'nowhere'}
+    ]})
+    storage.put_arc(PROJECT_ID, 1, {
+        'id': 'arc1', 'title': 'One', 'episodes': {'start': 1, 'end': 2},
+        'mainCharacters': ['kael', 'ghost']
+    })
+    validator = ConsistencyValidator(storage)
+
+    world = validator.validate(tmp_path, PROJECT_ID, 'world')
+    episode = validator.validate(tmp_path, PROJECT_ID, 'episode')
+
+    assert _dangling(world) == ['characters/kael/currentLocation']
+    assert _dangling(episode) == ['arcs/arc1/mainCharacters/1']
+    # Kael is still connected through the arc in the world scope
+    assert not any(s['path'] == 'characters/kael' for s in world['suggestions'])
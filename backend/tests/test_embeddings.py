@@ -0,0 +1,116 @@
+"""
+Embedding cache and similarity search against a stand-in for Ollama's /api/embed
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.ai_integration.ollama_client import OllamaClient
+from modules.retrieval import EmbeddingIndex, EmbeddingStore
+
+from .conftest import PROJECT_ID
+
+
+# Each text embeds as its word counts over this vocabulary
+VOCABULARY = ['dragon', 'knight', 'sea', 'forest']
+
+
+def _vector(text):
+    words = text.lower().replace(':', ' ').replace('|', ' ').split()
+    return [words.count(term) + 0.01 for term in VOCABULARY]
+
+
+@pytest.fixture
+def ollama():
+    """An OllamaClient pointed at a local /api/embed, and the inputs it received"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            requests_seen.append(body['input'])
+            payload = json.dumps({'embeddings': [_vector(t) for t in body['input']]}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield OllamaClient(f'http://127.0.0.1:{server.server_address[1]}'), requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def _npcs(*descriptions):
+    return {'npcs': [
+        {'id': f'npc{i}', 'name': f'NPC {i}', 'description': text}
+        for i, text in enumerate(descriptions)
+    ]}
+
+
+def test_entities_are_embedded_in_batches(tmp_path, storage, ollama):
+    client, requests_seen = ollama
+    storage.write_section(PROJECT_ID, 'npcs', _npcs(*[f'villager number {i}' for i in range(40)]))
+    index = EmbeddingIndex(storage, client, tmp_path / '.embeddings')
+
+    assert index.refresh(PROJECT_ID) is None
+
+    assert [len(batch) for batch in requests_seen] == [32, 8]
+
+
+def test_unchanged_entities_are_not_embedded_again(tmp_path, storage, ollama):
+    client, requests_seen = ollama
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('a dragon', 'a knight', 'a sailor at sea'))
+    index = EmbeddingIndex(storage, client, tmp_path / '.embeddings')
+    index.refresh(PROJECT_ID)
+    requests_seen.clear()
+
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('a dragon', 'a knight', 'a hermit in the forest'))
+    index.refresh(PROJECT_ID)
+    assert len(requests_seen) == 1
+    assert len(requests_seen[0]) == 1 and 'forest' in requests_seen[0][0]
+
+    # A new index on the same cache directory, as in another worker
+    requests_seen.clear()
+    EmbeddingIndex(storage, client, tmp_path / '.embeddings').refresh(PROJECT_ID)
+    assert requests_seen == []
+
+
+def test_similar_returns_top_k_by_cosine(tmp_path, storage, ollama):
+    client, _ = ollama
+    storage.write_section(PROJECT_ID, 'npcs', _npcs(
+        'a knight',
+        'a dragon and a knight',
+        'a sailor at sea',
+        'a dragon',
+        'a dragon and a dragon in the forest'
+    ))
+    index = EmbeddingIndex(storage, client, tmp_path / '.embeddings')
+
+    result = index.similar(PROJECT_ID, 'dragon', k=3)
+
+    assert result['success'], result
+    assert [r['id'] for r in result['results']] == ['npc3', 'npc4', 'npc1']
+    scores = [r['score'] for r in result['results']]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_store_keeps_rows_written_by_another_instance(tmp_path):
+    first = EmbeddingStore(tmp_path / 'model.db')
+    second = EmbeddingStore(tmp_path / 'model.db')
+
+    first.put_many({'a': [3.0, 4.0]})
+    second.put_many({'b': [1.0, 0.0]})
+
+    vectors = EmbeddingStore(tmp_path / 'model.db').get_many(['a', 'b', 'c'])
+    assert sorted(vectors) == ['a', 'b']
+    assert vectors['a'].tolist() == pytest.approx([0.6, 0.8])
@@ -0,0 +1,80 @@
+"""
+Episode-level timeline checks
+"""
+
+from modules.consistency.episode_timeline import EpisodeTimeline
+
+
+def _arc(arc_id, start, end, **fields):
+    return {'id': arc_id, 'title': arc_id.upper(), 'episodes': {'start': start, 'end': end}, **fields}
+
+
+def _types(result):
+    return sorted(w['type'] for w in result['warnings'])
+
+
+def test_sweep_finds_overlap_and_gap():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 4),
+        _arc('b', 3, 5),
+        _arc('c', 8, 10)
+    ]}).check()
+
+    overlaps = [w for w in result['warnings'] if w['type'] == 'overlapping_arcs']
+    gaps = [w for w in result['warnings'] if w['type'] == 'episode_gap']
+    assert [w['arcs'] for w in overlaps] == [['a', 'b']]
+    assert 'episodes 3-4' in overlaps[0]['message']
+    assert len(gaps) == 1 and 'episodes 6-7' in gaps[0]['message']
+
+
+def test_beat_outside_its_arc():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 3, plotBeats=[{'episode': 2}, {'episode': 5}])
+    ]}).check()
+
+    assert _types(result) == ['beat_outside_arc']
+    assert result['warnings'][0]['path'] == 'arcs/a/plotBeats/1/episode'
+
+
+def test_one_sided_next_arc():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 2, connections={'nextArc': 'b'}),
+        _arc('b', 3, 4)
+    ]}).check()
+
+    assert _types(result) == ['broken_arc_chain']
+    assert result['warnings'][0]['path'] == 'arcs/a/connections/nextArc'
+
+
+def test_two_arc_cycle_is_reported_once():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 2, connections={'nextArc': 'b', 'previousArc': 'b'}),
+        _arc('b', 3, 4, connections={'nextArc': 'a', 'previousArc': 'a'})
+    ]}).check()
+
+    cycles = [w for w in result['warnings'] if w['type'] == 'arc_chain_cycle']
+    assert [w['arcs'] for w in cycles] == [['a', 'b']]
+
+
+def test_malformed_links_are_ignored():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 2, connections={'nextArc': ['b'], 'previousArc': {'id': 'b'}}),
+        _arc('b', 3, 4)
+    ]}).check()
+
+    assert _types(result) == []
+
+
+def test_character_in_two_locations_in_one_episode():
+    result = EpisodeTimeline({1: [
+        _arc('a', 1, 3, plotBeats=[{'episode': 2, 'location': 'castle', 'characters': ['kael']}]),
+        _arc('b', 1, 3, plotBeats=[
+            {'episode': 2, 'location': 'harbour', 'characters': ['kael', 'mira']},
+            {'episode': 3, 'location': 'harbour', 'characters': ['kael']}
+        ])
+    ]}).check()
+
+    conflicts = [w for w in result['warnings'] if w['type'] == 'character_location_conflict']
+    assert len(conflicts) == 1
+    assert 'kael' in conflicts[0]['message'] and 'episode 2' in conflicts[0]['message']
+    assert conflicts[0]['conflicts_with'] == 'arcs/a/plotBeats/0'
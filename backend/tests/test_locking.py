@@ -0,0 +1,110 @@
+"""
+Per-project reader/writer locks
+"""
+
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from modules.storage import ProjectLocks
+from modules.storage.locking import ReadWriteLock, fcntl
+
+from .conftest import PROJECT_ID
+
+
+def _in_thread(func):
+    """Start func in a thread; returns (thread, event set once func returns)"""
+    done = threading.Event()
+
+    def run():
+        func()
+        done.set()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, done
+
+
+def test_write_lock_is_reentrant_and_allows_nested_reads(tmp_path):
+    locks = ProjectLocks(tmp_path)
+
+    with locks.write(PROJECT_ID):
+        with locks.write(PROJECT_ID):
+            with locks.read(PROJECT_ID):
+                pass
+        with locks.read(PROJECT_ID):
+            with locks.read(PROJECT_ID):
+                pass
+
+    # Fully released: another thread can write
+    def write():
+        with locks.write(PROJECT_ID):
+            pass
+
+    thread, done = _in_thread(write)
+    assert done.wait(2)
+
+
+def test_read_lock_cannot_be_upgraded():
+    lock = ReadWriteLock()
+    lock.acquire_read()
+    try:
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    finally:
+        lock.release_read()
+
+
+def test_writer_excludes_readers_in_other_threads(tmp_path):
+    locks = ProjectLocks(tmp_path)
+
+    def read():
+        with locks.read(PROJECT_ID):
+            pass
+
+    with locks.write(PROJECT_ID):
+        thread, done = _in_thread(read)
+        assert not done.wait(0.2)
+    assert done.wait(2)
+
+
+def test_readers_share_the_lock(tmp_path):
+    locks = ProjectLocks(tmp_path)
+
+    def read():
+        with locks.read(PROJECT_ID):
+            pass
+
+    with locks.read(PROJECT_ID):
+        thread, done = _in_thread(read)
+        assert done.wait(2)
+
+
+def test_storage_objects_share_one_lock_per_project(tmp_path):
+    assert ProjectLocks(tmp_path).get(PROJECT_ID) is ProjectLocks(tmp_path).get(PROJECT_ID)
+
+
+@pytest.mark.skipif(fcntl is None, reason='cross-process locking needs fcntl')
+def test_write_lock_excludes_other_processes(tmp_path):
+    locks = ProjectLocks(tmp_path)
+    lock_file = locks.get(PROJECT_ID).lock_file
+    probe = (
+        'import fcntl, os, sys\n'
+        'fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT)\n'
+        'try:\n'
+        '    fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)\n'
+        'except BlockingIOError:\n'
+        '    sys.exit(1)\n'
+    )
+
+    def other_process_can_read():
+        return subprocess.run([sys.executable, '-c', probe, str(lock_file)]).returncode == 0
+
+    with locks.write(PROJECT_ID):
+        with locks.read(PROJECT_ID):
+            assert not other_process_can_read()
+    with locks.read(PROJECT_ID):
+        assert other_process_can_read()
+    assert other_process_can_read()
@@ -0,0 +1,69 @@
+"""
+Full-text search over world sections, arcs and plot beats
+"""
+
+from modules.retrieval import SearchIndex
+from modules.retrieval.search_index import parse_query
+
+from .conftest import PROJECT_ID
+
+
+def _seed(storage):
+    storage.write_section(PROJECT_ID, 'characters', {'characters': [
+        {'id': 'char_cassian', 'name': 'Cassian', 'description': 'A knight sworn to the silver crown'},
+        {'id': 'char_mira', 'name': 'Mira', 'description': 'Crown thief who once served the silver guard'}
+    ]})
+    storage.put_arc(PROJECT_ID, 1, {
+        'id': 'arc1', 'title': 'The Silver Crown', 'season': 1,
+        'plotBeats': [{'title': 'Theft', 'episode': 2, 'description': 'Mira steals the crown'}]
+    })
+
+
+def _ids(result):
+    return sorted(r['id'] for r in result['results'])
+
+
+def test_parse_query():
+    assert parse_query('crown "silver crown" kni* char_cassian') == [
+        ('term', ['crown']),
+        ('phrase', ['silver', 'crown']),
+        ('prefix', ['kni']),
+        ('phrase', ['char', 'cassian'])
+    ]
+
+
+def test_prefix_and_phrase_queries(storage):
+    _seed(storage)
+    index = SearchIndex(storage)
+
+    assert _ids(index.search(PROJECT_ID, 'kni*')) == ['char_cassian']
+    # Both characters mention silver and crown, only one as a phrase
+    assert _ids(index.search(PROJECT_ID, '"silver crown"', types=['characters'])) == ['char_cassian']
+    assert _ids(index.search(PROJECT_ID, 'crown', types=['arc', 'beat'])) == ['arc1', 'arc1#0']
+
+
+def test_snippet_highlights_the_match(storage):
+    _seed(storage)
+
+    result = SearchIndex(storage).search(PROJECT_ID, 'thief')['results'][0]
+
+    assert result['field'] == 'description'
+    assert [result['snippet'][s:e] for s, e in result['highlights']] == ['thief']
+
+
+def test_section_write_updates_only_changed_documents(storage):
+    _seed(storage)
+    index = SearchIndex(storage)
+    index.search(PROJECT_ID, 'crown')
+    docs = index.refresh(PROJECT_ID).index.docs
+    mira = docs[('characters', 'char_mira')]
+
+    storage.write_section(PROJECT_ID, 'characters', {'characters': [
+        {'id': 'char_cassian', 'name': 'Cassian', 'description': 'A knight who renounced the dragon throne'},
+        {'id': 'char_mira', 'name': 'Mira', 'description': 'Crown thief who once served the silver guard'}
+    ]})
+
+    assert _ids(index.search(PROJECT_ID, 'dragon')) == ['char_cassian']
+    assert _ids(index.search(PROJECT_ID, 'crown', types=['characters'])) == ['char_mira']
+    # The unchanged character was not re-indexed
+    assert docs[('characters', 'char_mira')] is mira
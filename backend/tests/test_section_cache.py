@@ -0,0 +1,61 @@
+"""
+Section cache memory accounting
+"""
+
+from modules.storage import JsonStorage
+from modules.storage.fileio import atomic_write_json
+from modules.storage.section_cache import SectionCache, estimate_size
+from modules.storage.serialization import dumps, sniff_format
+
+from .conftest import PROJECT_ID
+
+
+def _section(n):
+    return {'characters': [{'id': f'c{i}', 'name': f'Character {i}', 'traits': ['brave'] * 5} for i in range(n)]}
+
+
+def test_cap_uses_estimate_from_encoded_size():
+    cache = SectionCache(max_bytes=estimate_size(1000, 'compact') * 2)
+
+    for section in ('a', 'b', 'c'):
+        cache.put('p', section, (1, 1, 1000), _section(1), 'compact')
+
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['bytes'] == estimate_size(1000, 'compact') * 2
+
+
+def test_denser_formats_count_for_more_per_byte():
+    assert estimate_size(1000, 'pretty') < estimate_size(1000, 'compact') < estimate_size(1000, 'msgpack')
+
+
+def test_document_larger_than_cap_is_not_cached():
+    cache = SectionCache(max_bytes=estimate_size(1000, 'compact') - 1)
+
+    cache.put('p', 'characters', (1, 1, 1000), _section(1), 'compact')
+
+    assert cache.stats()['entries'] == 0
+
+
+def test_sniff_format():
+    data = _section(2)
+    assert sniff_format(dumps(data, 'compact')) == 'compact'
+    assert sniff_format(dumps(data, 'pretty')) == 'pretty'
+    assert sniff_format(b'\x82\xa1a\x01') == 'msgpack'
+
+
+def test_read_and_write_account_the_file_size(tmp_path):
+    storage = JsonStorage(tmp_path)
+    (tmp_path / PROJECT_ID).mkdir()
+    data = _section(20)
+
+    storage.write_section(PROJECT_ID, 'characters', data)
+    size = storage.section_path(PROJECT_ID, 'characters').stat().st_size
+    assert storage.sections.stats()['bytes'] == estimate_size(size, 'compact')
+
+    # Replaced behind the cache's back in another format, then read
+    atomic_write_json(storage.section_path(PROJECT_ID, 'characters'), data, 'pretty')
+    storage.read_section(PROJECT_ID, 'characters')
+    size = storage.section_path(PROJECT_ID, 'characters').stat().st_size
+    assert storage.sections.stats()['bytes'] == estimate_size(size, 'pretty')
+    storage.forget(PROJECT_ID)
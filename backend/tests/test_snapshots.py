@@ -0,0 +1,65 @@
+"""
+Content-addressed project snapshots
+"""
+
+import json
+
+from modules.storage.snapshots import SnapshotStore
+
+from .conftest import PROJECT_ID
+
+
+def _npcs(*names):
+    return {'npcs': [{'id': name.lower(), 'name': name} for name in names]}
+
+
+def _store(storage):
+    (storage.projects_dir / PROJECT_ID / 'project_metadata.json').write_text(json.dumps({
+        'id': PROJECT_ID, 'title': 'Test Project', 'created': '2024-01-01T00:00:00'
+    }))
+    return SnapshotStore(storage)
+
+
+def _history_files(store):
+    return sorted(p for p in store.history_path(PROJECT_ID).rglob('*') if p.is_file())
+
+
+def test_snapshot_diff_restore(storage):
+    store = _store(storage)
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('Aria', 'Bran'))
+    storage.put_arc(PROJECT_ID, 1, {'id': 'arc1', 'title': 'One', 'season': 1})
+    first = store.snapshot(PROJECT_ID, label='before')['snapshot']['id']
+
+    storage.write_section(PROJECT_ID, 'npcs', {'npcs': [{'id': 'aria', 'name': 'Aria the Bard'}, {'id': 'cole', 'name': 'Cole'}]})
+    storage.put_arc(PROJECT_ID, 2, {'id': 'arc2', 'title': 'Two', 'season': 2})
+
+    changes = {c['path']: c for c in store.diff(PROJECT_ID, first)['changes']}
+    assert changes.keys() == {'world/npcs', 'story/season2'}
+    assert changes['story/season2']['status'] == 'added'
+    npcs = changes['world/npcs']
+    assert (npcs['added'], npcs['removed'], npcs['modified']) == (['cole'], ['bran'], ['aria'])
+
+    result = store.restore(PROJECT_ID, first)
+
+    assert result['success'], result
+    assert result['sections'] == ['npcs'] and result['seasons'] == [2]
+    assert storage.read_section(PROJECT_ID, 'npcs') == _npcs('Aria', 'Bran')
+    assert not (storage.read_season(PROJECT_ID, 2) or {}).get('arcs')
+    assert store.diff(PROJECT_ID, first)['changes'] == []
+    # The state before the restore was kept and can be restored in turn
+    backup = store.get_snapshot(PROJECT_ID, result['backup'])
+    assert backup['reason'] == 'before-restore'
+    assert 'story/season2' in backup['entries']
+
+
+def test_snapshot_of_unchanged_project_writes_nothing(storage):
+    store = _store(storage)
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('Aria'))
+    assert store.snapshot(PROJECT_ID)['created'] is True
+    files = _history_files(store)
+
+    result = store.snapshot(PROJECT_ID)
+
+    assert result['created'] is False
+    assert _history_files(store) == files
+    assert len(store.list_snapshots(PROJECT_ID)) == 1
@@ -0,0 +1,88 @@
+"""
+SQLite connection lifecycle and read consistency
+"""
+
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.storage import SQLiteStorage
+from modules.storage import sqlite_storage
+
+from .conftest import PROJECT_ID
+
+
+def _names(storage):
+    section = storage.read_section(PROJECT_ID, 'characters')
+    return [c['name'] for c in section['characters']] if section else None
+
+
+def _characters(*names):
+    return {'characters': [{'id': name.lower(), 'name': name} for name in names]}
+
+
+def _recreate(storage):
+    """Delete the project and create a new one under the same id"""
+    shutil.rmtree(storage.projects_dir / PROJECT_ID)
+    (storage.projects_dir / PROJECT_ID).mkdir()
+
+
+def test_forget_retires_other_threads_connections(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    storage = SQLiteStorage(tmp_path)
+    storage.write_section(PROJECT_ID, 'characters', _characters('Old'))
+
+    with ThreadPoolExecutor(max_workers=1) as worker:
+        assert worker.submit(_names, storage).result() == ['Old']
+
+        storage.forget(PROJECT_ID)
+        _recreate(storage)
+        storage.write_section(PROJECT_ID, 'characters', _characters('New'))
+
+        assert worker.submit(_names, storage).result() == ['New']
+
+
+def test_replaced_database_file_is_reopened(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    storage = SQLiteStorage(tmp_path)
+    storage.write_section(PROJECT_ID, 'characters', _characters('Old'))
+    assert _names(storage) == ['Old']
+
+    # Another process deletes and re-imports the project
+    other = SQLiteStorage(tmp_path)
+    other.forget(PROJECT_ID)
+    _recreate(other)
+    other.write_section(PROJECT_ID, 'characters', _characters('New'))
+
+    assert _names(storage) == ['New']
+    other.forget(PROJECT_ID)
+    storage.forget(PROJECT_ID)
+
+
+def test_read_section_sees_one_snapshot(tmp_path, monkeypatch):
+    (tmp_path / PROJECT_ID).mkdir()
+    storage = SQLiteStorage(tmp_path)
+    storage.write_section(PROJECT_ID, 'characters', {'characters': [{'id': 'a', 'name': 'A'}], 'version': 1})
+
+    real_loads = sqlite_storage.loads
+    interrupted = []
+
+    def loads_with_concurrent_write(raw):
+        if not interrupted:
+            # A writer commits between the section row and its entity rows
+            interrupted.append(True)
+            writer = threading.Thread(target=storage.write_section, args=(
+                PROJECT_ID, 'characters', {'characters': [{'id': 'b', 'name': 'B'}], 'version': 2}
+            ))
+            writer.start()
+            writer.join()
+        return real_loads(raw)
+
+    monkeypatch.setattr(sqlite_storage, 'loads', loads_with_concurrent_write)
+    section = storage.read_section(PROJECT_ID, 'characters')
+
+    assert interrupted
+    assert section == {'characters': [{'id': 'a', 'name': 'A'}], 'version': 1}
+    monkeypatch.undo()
+    assert storage.read_section(PROJECT_ID, 'characters')['version'] == 2
+    storage.forget(PROJECT_ID)
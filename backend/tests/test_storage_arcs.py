@@ -0,0 +1,144 @@
+"""
+Arc ids are unique per project on both storage backends
+"""
+
+import pytest
+
+from modules.storage import JsonStorage, SQLiteStorage
+from modules.storage.migrator import migrate_project
+from modules.story_engine.arc_manager import ArcManager
+
+from .conftest import PROJECT_ID
+
+
+def _arc(arc_id, season=1, title=None):
+    return {'id': arc_id, 'title': title or arc_id.upper(), 'season': season, 'episodes': {'start': 1, 'end': 3}}
+
+
+def _season(*arcs, season=1):
+    return {'arcs': list(arcs), 'metadata': {'season': season, 'totalArcs': len(arcs)}}
+
+
+def _counts(storage):
+    return {s['season']: s['arcCount'] for s in storage.season_summaries(PROJECT_ID)}
+
+
+def test_put_arc_rejects_id_from_another_season(storage):
+    storage.put_arc(PROJECT_ID, 1, _arc('a'))
+
+    with pytest.raises(ValueError):
+        storage.put_arc(PROJECT_ID, 2, _arc('a', season=2))
+
+    assert storage.arc_season(PROJECT_ID, 'a') == 1
+    assert [a['id'] for a in storage.read_season(PROJECT_ID, 1)['arcs']] == ['a']
+    assert storage.read_season(PROJECT_ID, 2) is None
+
+
+def test_put_arc_replaces_within_its_season(storage):
+    storage.put_arc(PROJECT_ID, 1, _arc('a'))
+    storage.put_arc(PROJECT_ID, 1, _arc('a', title='Renamed'))
+
+    assert storage.get_arc(PROJECT_ID, 'a')['title'] == 'Renamed'
+    assert _counts(storage) == {1: 1}
+
+
+def test_write_season_moves_arcs_and_updates_old_season(storage):
+    storage.write_season(PROJECT_ID, 1, _season(_arc('a'), _arc('b')))
+
+    storage.write_season(PROJECT_ID, 2, _season(_arc('a', season=2), season=2))
+
+    assert [a['id'] for a in storage.read_season(PROJECT_ID, 1)['arcs']] == ['b']
+    assert storage.arc_season(PROJECT_ID, 'a') == 2
+    assert _counts(storage) == {1: 1, 2: 1}
+
+
+def test_write_season_rejects_repeated_ids(storage):
+    with pytest.raises(ValueError):
+        storage.write_season(PROJECT_ID, 1, _season(_arc('a'), _arc('a')))
+
+    assert storage.read_season(PROJECT_ID, 1) is None
+
+
+def test_add_arc_rejects_id_from_another_season(tmp_path, storage):
+    manager = ArcManager(tmp_path, storage)
+    assert manager.add_arc(PROJECT_ID, _arc('a'))['success']
+
+    result = manager.add_arc(PROJECT_ID, _arc('a', season=2))
+
+    assert not result['success'] and result['conflict']
+    assert storage.arc_season(PROJECT_ID, 'a') == 1
+    assert _counts(storage) == {1: 1}
+
+
+def test_update_arc_rejects_rename_onto_existing_id(tmp_path, storage):
+    manager = ArcManager(tmp_path, storage)
+    manager.add_arc(PROJECT_ID, _arc('a'))
+    manager.add_arc(PROJECT_ID, _arc('b', season=2))
+
+    result = manager.update_arc(PROJECT_ID, 'a', _arc('b'))
+
+    assert not result['success'] and result['conflict']
+    assert storage.arc_season(PROJECT_ID, 'a') == 1
+    assert storage.arc_season(PROJECT_ID, 'b') == 2
+
+
+def test_bulk_create_rejects_id_from_another_season(tmp_path, storage):
+    manager = ArcManager(tmp_path, storage)
+    manager.add_arc(PROJECT_ID, _arc('a'))
+
+    result = manager.bulk_apply(PROJECT_ID, [{'op': 'create', 'arc': _arc('a', season=2)}])
+
+    assert result['failed'] == 1
+    assert _counts(storage) == {1: 1}
+
+
+
+def test_bulk_delete_then_create_moves_arc_to_a_lower_season(tmp_path, storage):
+    manager = ArcManager(tmp_path, storage)
+    manager.add_arc(PROJECT_ID, _arc('a', season=2))
+    manager.add_arc(PROJECT_ID, _arc('b', season=2))
+
+    result = manager.bulk_apply(PROJECT_ID, [
+        {'op': 'delete', 'id': 'a'},
+        {'op': 'create', 'arc': _arc('a', season=1, title='Moved')}
+    ])
+
+    assert result['success'], result
+    assert sorted(result['seasons_written']) == [1, 2]
+    assert storage.arc_season(PROJECT_ID, 'a') == 1
+    assert storage.read_season(PROJECT_ID, 1)['arcs'][0]['title'] == 'Moved'
+    assert [a['id'] for a in storage.read_season(PROJECT_ID, 2)['arcs']] == ['b']
+    assert _counts(storage) == {1: 1, 2: 1}
+
+
+def test_bulk_apply_across_seasons(tmp_path, storage):
+    manager = ArcManager(tmp_path, storage)
+    manager.add_arc(PROJECT_ID, _arc('a'))
+    manager.add_arc(PROJECT_ID, _arc('b', season=2))
+    manager.add_arc(PROJECT_ID, _arc('c', season=3))
+
+    result = manager.bulk_apply(PROJECT_ID, [
+        {'op': 'update', 'id': 'a', 'arc': _arc('a', title='Updated')},
+        {'op': 'create', 'arc': _arc('d', season=2)},
+        {'op': 'upsert', 'arc': _arc('e', season=3)},
+        {'op': 'delete', 'id': 'c'}
+    ])
+
+    assert result['success'], result
+    assert result['applied'] == 4
+    assert sorted(result['seasons_written']) == [1, 2, 3]
+    assert result['seasons_failed'] == []
+    assert storage.read_season(PROJECT_ID, 1)['arcs'][0]['title'] == 'Updated'
+    assert [a['id'] for a in storage.read_season(PROJECT_ID, 2)['arcs']] == ['b', 'd']
+    assert [a['id'] for a in storage.read_season(PROJECT_ID, 3)['arcs']] == ['e']
+    assert _counts(storage) == {1: 1, 2: 2, 3: 1}
+
+def test_migration_refuses_ids_shared_across_seasons(tmp_path):
+    (tmp_path / PROJECT_ID / 'story').mkdir(parents=True)
+    source = JsonStorage(tmp_path)
+    # Written behind the storage layer, as an older version could have
+    source._write_season_file(PROJECT_ID, 1, _season(_arc('a')))
+    source._write_season_file(PROJECT_ID, 2, _season(_arc('a', season=2), season=2))
+
+    with pytest.raises(ValueError):
+        migrate_project(tmp_path, PROJECT_ID, SQLiteStorage(tmp_path))
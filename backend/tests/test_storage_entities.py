@@ -0,0 +1,86 @@
+"""
+World entities on both storage backends
+"""
+
+import sqlite3
+
+from modules.storage import JsonStorage, SQLiteStorage
+from modules.storage.migrator import migrate_project
+
+from .conftest import PROJECT_ID
+
+
+def _characters(*pairs):
+    return {'characters': [{'id': entity_id, 'name': name} for entity_id, name in pairs]}
+
+
+def test_duplicate_ids_are_kept(storage):
+    storage.write_section(PROJECT_ID, 'characters', _characters(('a', 'one'), ('a', 'two'), ('b', 'three')))
+
+    names = [c['name'] for c in storage.read_section(PROJECT_ID, 'characters')['characters']]
+    assert names == ['one', 'two', 'three']
+    assert storage.get_entity(PROJECT_ID, 'characters', 'a')['name'] == 'one'
+
+
+def test_put_replaces_first_duplicate(storage):
+    storage.write_section(PROJECT_ID, 'characters', _characters(('a', 'one'), ('a', 'two')))
+
+    storage.put_entities(PROJECT_ID, 'characters', [{'id': 'a', 'name': 'new'}, {'id': 'c', 'name': 'four'}])
+
+    names = [c['name'] for c in storage.read_section(PROJECT_ID, 'characters')['characters']]
+    assert names == ['new', 'two', 'four']
+
+
+def test_delete_removes_every_duplicate(storage):
+    storage.write_section(PROJECT_ID, 'characters', _characters(('a', 'one'), ('b', 'two'), ('a', 'three')))
+
+    assert storage.delete_entities(PROJECT_ID, 'characters', ['a']) == 2
+    assert [c['id'] for c in storage.read_section(PROJECT_ID, 'characters')['characters']] == ['b']
+
+
+def test_entities_without_ids_are_kept(storage):
+    storage.write_section(PROJECT_ID, 'characters', {'characters': [{'name': 'x'}, {'name': 'y'}]})
+    storage.put_entities(PROJECT_ID, 'characters', [{'name': 'z'}])
+
+    names = [c['name'] for c in storage.read_section(PROJECT_ID, 'characters')['characters']]
+    assert names == ['x', 'y', 'z']
+
+
+def test_migration_keeps_duplicate_ids(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    JsonStorage(tmp_path).write_section(PROJECT_ID, 'characters', _characters(('a', 'one'), ('a', 'two')))
+
+    target = SQLiteStorage(tmp_path)
+    migrate_project(tmp_path, PROJECT_ID, target)
+
+    names = [c['name'] for c in target.read_section(PROJECT_ID, 'characters')['characters']]
+    assert names == ['one', 'two']
+
+
+def test_version_1_database_is_upgraded(tmp_path):
+    (tmp_path / PROJECT_ID).mkdir()
+    db_file = tmp_path / PROJECT_ID / SQLiteStorage.DB_FILE
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+        CREATE TABLE entities (
+            section TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (section, entity_id)
+        );
+        CREATE TABLE sections (section TEXT PRIMARY KEY, doc TEXT NOT NULL, updated TEXT NOT NULL);
+        INSERT INTO sections VALUES ('characters', '{}', '');
+        INSERT INTO entities VALUES ('characters', 'b', 3, '{"id": "b"}');
+        INSERT INTO entities VALUES ('characters', '#1', 1, '{"name": "anon"}');
+        INSERT INTO entities VALUES ('characters', 'a', 0, '{"id": "a"}');
+    """)
+    conn.close()
+
+    storage = SQLiteStorage(tmp_path)
+    characters = storage.read_section(PROJECT_ID, 'characters')['characters']
+
+    assert characters == [{'id': 'a'}, {'name': 'anon'}, {'id': 'b'}]
+    storage.put_entities(PROJECT_ID, 'characters', [{'id': 'b', 'name': 'bee'}])
+    assert storage.get_entity(PROJECT_ID, 'characters', 'b') == {'id': 'b', 'name': 'bee'}
+    storage.forget(PROJECT_ID)
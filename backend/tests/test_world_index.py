@@ -0,0 +1,21 @@
+"""
+Entity retrieval for prompt context
+"""
+
+from modules.retrieval import WorldIndex
+
+from .conftest import PROJECT_ID
+
+
+def test_section_filter_applies_before_the_top_hits_are_cut(storage):
+    storage.write_section(PROJECT_ID, 'npcs', {'npcs': [
+        {'id': f'npc{i}', 'name': f'Dragon Rider {i}', 'description': 'rides a dragon, fears no dragon'}
+        for i in range(80)
+    ]})
+    storage.write_section(PROJECT_ID, 'locations', {'places': [
+        {'id': 'lair', 'name': 'The Lair', 'description': 'a cave where a dragon once slept among old bones'}
+    ]})
+
+    result = WorldIndex(storage).retrieve(PROJECT_ID, 'dragon', k=3, token_budget=10000, sections=['locations'])
+
+    assert [(e['section'], e['id']) for e in result['entities']] == [('locations', 'lair')]
@@ -0,0 +1,90 @@
+"""
+World section patches: JSON Patch tests and rollback, entity merges by id
+"""
+
+import pytest
+
+from modules.world_builder.world_builder import WorldBuilder
+from modules.world_builder.world_patch import PatchConflict, PatchError, apply_json_patch, merge_entities
+
+from .conftest import PROJECT_ID
+
+
+def _npcs(*names):
+    return {'npcs': [{'id': name.lower(), 'name': name} for name in names]}
+
+
+def test_failed_test_op_raises_conflict():
+    document = _npcs('Aria', 'Bran')
+
+    with pytest.raises(PatchConflict):
+        apply_json_patch(document, [
+            {'op': 'test', 'path': '/npcs/0/id', 'value': 'bran'},
+            {'op': 'replace', 'path': '/npcs/0/name', 'value': 'Changed'}
+        ])
+
+    assert document == _npcs('Aria', 'Bran')
+
+
+def test_patch_section_reports_conflict_on_failed_test(tmp_path, storage):
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('Aria', 'Bran'))
+    builder = WorldBuilder(tmp_path, storage)
+
+    result = builder.patch_section(tmp_path, PROJECT_ID, 'npcs', [
+        {'op': 'test', 'path': '/npcs/1/id', 'value': 'aria'},
+        {'op': 'remove', 'path': '/npcs/1'}
+    ])
+
+    # The PATCH route answers 409 for results flagged as a conflict
+    assert not result['success']
+    assert result['conflict'] is True
+    assert storage.read_section(PROJECT_ID, 'npcs') == _npcs('Aria', 'Bran')
+
+
+def test_patch_is_rolled_back_when_a_later_op_fails(tmp_path, storage):
+    storage.write_section(PROJECT_ID, 'npcs', _npcs('Aria', 'Bran'))
+    builder = WorldBuilder(tmp_path, storage)
+
+    result = builder.patch_section(tmp_path, PROJECT_ID, 'npcs', [
+        {'op': 'test', 'path': '/npcs/0/id', 'value': 'aria'},
+        {'op': 'replace', 'path': '/npcs/0/name', 'value': 'Changed'},
+        {'op': 'remove', 'path': '/npcs/5'}
+    ])
+
+    assert not result['success']
+    assert 'conflict' not in result
+    assert storage.read_section(PROJECT_ID, 'npcs') == _npcs('Aria', 'Bran')
+
+
+def test_merge_entities_by_id():
+    document = _npcs('Aria', 'Bran', 'Cole')
+
+    result = merge_entities(document, 'npcs', 'id', [
+        {'id': 'bran', 'name': 'Bran the Bold', 'role': 'guard'},
+        {'id': 'dara', 'name': 'Dara'}
+    ], ['cole'])
+
+    assert result['npcs'] == [
+        {'id': 'aria', 'name': 'Aria'},
+        {'id': 'bran', 'name': 'Bran the Bold', 'role': 'guard'},
+        {'id': 'dara', 'name': 'Dara'}
+    ]
+    # Untouched entities are shared, the original document is not modified
+    assert result['npcs'][0] is document['npcs'][0]
+    assert document == _npcs('Aria', 'Bran', 'Cole')
+
+
+def test_merge_entities_patches_first_of_duplicate_ids():
+    document = {'npcs': [{'id': 'aria', 'name': 'First'}, {'id': 'aria', 'name': 'Second'}]}
+
+    result = merge_entities(document, 'npcs', 'id', [{'id': 'aria', 'role': 'bard'}], [])
+
+    assert result['npcs'] == [
+        {'id': 'aria', 'name': 'First', 'role': 'bard'},
+        {'id': 'aria', 'name': 'Second'}
+    ]
+
+
+def test_merge_entities_rejects_unknown_delete():
+    with pytest.raises(PatchError):
+        merge_entities(_npcs('Aria'), 'npcs', 'id', [], ['ghost'])
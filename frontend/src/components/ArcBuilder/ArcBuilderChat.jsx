@@ -17,15 +17,52 @@ const ARC_CONVERSATION_CONFIG = {
   ENABLE_SLIDING_WINDOW: true,
   INCLUDE_WORLD_CONTEXT_FIRST_MESSAGE: true,
   SUMMARY_WINDOW_SIZE: 6, // How many older messages to analyze for arc summary (smaller due to complexity)
+  RETRIEVAL_TOP_K: 8, // Most relevant world entities attached to each message
+  RETRIEVAL_TOKEN_BUDGET: 1200, // Token budget for those entities
 
   // How it works:
-  // - World context (characters, locations, etc.) only sent on first message + periodically
+  // - World context (characters, locations, etc.) only sent on first message + periodically,
+  //   as a names-only directory; full details of the entities relevant to each message
+  //   are retrieved by the backend (BM25) and attached to that message
   // - Previously sent world context with EVERY message (exponential growth!)
   // - Now uses sliding window for conversation + AI-generated summaries of recent older messages
   // - Uses AI to intelligently summarize recent portion of arc discussion content
   // - Dramatically reduces payload size while maintaining world awareness and story context
 };
 
+// Detail levels for the world directory: overview plus id/name of every entity
+const WORLD_DIRECTORY_DETAIL = [
+  'world_overview:brief',
+  'characters:names',
+  'locations:names',
+  'factions:names',
+  'religions:names',
+  'npcs:names',
+  'glossary:none',
+  'content:none',
+].join(',');
+
+// Fetch the world entities most relevant to a message, within a token budget
+async function retrieveWorldContext(projectId, query) {
+  try {
+    const response = await fetch(`http://localhost:5000/api/projects/${projectId}/world/retrieve`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        query,
+        k: ARC_CONVERSATION_CONFIG.RETRIEVAL_TOP_K,
+        token_budget: ARC_CONVERSATION_CONFIG.RETRIEVAL_TOKEN_BUDGET,
+      }),
+    });
+    if (!response.ok) return '';
+    const data = await response.json();
+    return data.success ? data.context : '';
+  } catch (error) {
+    console.error('Failed to retrieve world context:', error);
+    return '';
+  }
+}
+
 // Generate AI-powered summary of older arc discussion messages
 async function generateArcConversationSummary(olderMessages, selectedModel) {
   try {
@@ -113,6 +150,8 @@ export default function ArcBuilderChat({ selectedModel }) {
   const [isGeneratingConversationSummary, setIsGeneratingConversationSummary] = useState(false);
   const [schemas, setSchemas] = useState(null);
   const [worldContext, setWorldContext] = useState(null);
+  // Compact text rendering of the world, built and cached by the backend
+  const [worldContextText, setWorldContextText] = useState('');
   // selectedModel is provided via props from App -> AIStatus
   const [temperature, setTemperature] = useState(0.8);
   const [hasSummary, setHasSummary] = useState(false);
@@ -138,6 +177,14 @@ export default function ArcBuilderChat({ selectedModel }) {
             const contextData = await contextResponse.json();
             setWorldContext(contextData.context);
           }
+
+          const textResponse = await fetch(
+            `http://localhost:5000/api/projects/${currentProject}/world/context?format=text&detail=${WORLD_DIRECTORY_DETAIL}`
+          );
+          if (textResponse.ok) {
+            const textData = await textResponse.json();
+            setWorldContextText(textData.context);
+          }
         }
       } catch (error) {
         console.error('Failed to load schemas/context:', error);
@@ -250,171 +297,25 @@ export default function ArcBuilderChat({ selectedModel }) {
       console.log('Should include world context:', shouldIncludeWorldContext);
       console.log('World context available:', worldContext);
 
-      if (worldContext && shouldIncludeWorldContext) {
-        const contextParts = [];
-
-        // World Overview - ALL fields
-        if (worldContext.world_overview) {
-          const wo = worldContext.world_overview;
-          contextParts.push(`WORLD OVERVIEW:
-Name: ${wo.name || 'Unknown'}
-Description: ${wo.description || 'N/A'}
-Time Period: ${wo.timePeriod || 'N/A'}
-Technology Level: ${wo.technologyLevel || 'N/A'}
-Magic System: ${wo.magicSystem || 'None'}
-History: ${wo.history || 'N/A'}
-Physics Rules: ${wo.rulesPhysics || 'Standard'}`);
-        }
-
-        // Characters - ALL fields
-        if (worldContext.characters?.characters?.length > 0) {
-          const charDetails = worldContext.characters.characters.map(c => {
-            const skills = Array.isArray(c.skills) ? c.skills.join(', ') : 'None';
-            const fears = Array.isArray(c.fears) ? c.fears.join(', ') : 'None';
-            const weaknesses = Array.isArray(c.weaknesses) ? c.weaknesses.join(', ') : 'None';
-            const equipment = Array.isArray(c.equipment) ? c.equipment.join(', ') : 'None';
-            const rels = c.relationships?.map(r => `${r.character_id} (${r.type}, ${r.status}): ${r.description}`).join('; ') || 'None';
-
-            return `${c.id}: ${c.name}
-  Role: ${c.role}, Age: ${c.age}, Race: ${c.race}, Class: ${c.class}, Level: ${c.level}
-  Alignment: ${c.alignment}
-  Description: ${c.description}
-  Personality: ${c.personality}
-  Backstory: ${c.backstory}
-  Motivation: ${c.motivation}
-  Fears: ${fears}
-  Skills: ${skills}
-  Weaknesses: ${weaknesses}
-  Equipment: ${equipment}
-  Current Location: ${c.currentLocation}
-  Relationships: ${rels}`;
-          }).join('\n\n');
-          contextParts.push(`CHARACTERS:\n${charDetails}`);
-        }
-
-        // Locations - ALL fields
-        if (worldContext.locations?.places?.length > 0) {
-          const locDetails = worldContext.locations.places.map(l => {
-            const features = Array.isArray(l.notableFeatures) ? l.notableFeatures.join(', ') : 'None';
-            const coords = l.coords ? `(${l.coords.x}, ${l.coords.y})` : 'N/A';
-
-            return `${l.id}: ${l.name} (${l.type})
-  Region: ${l.region || 'N/A'}
-  Population: ${l.population || 0}
-  Description: ${l.description || 'N/A'}
-  Government: ${l.government || 'N/A'}
-  Economy: ${l.economy || 'N/A'}
-  Culture: ${l.culture || 'N/A'}
-  Defenses: ${l.defenses || 'None'}
-  Notable Features: ${features}
-  Coordinates: ${coords}`;
-          }).join('\n\n');
-          contextParts.push(`LOCATIONS:\n${locDetails}`);
-        }
-
-        // Factions - ALL fields
-        if (worldContext.factions?.factions?.length > 0) {
-          const factDetails = worldContext.factions.factions.map(f => {
-            const goals = Array.isArray(f.goals) ? f.goals.join(', ') : 'None';
-            const members = Array.isArray(f.members) ? f.members.join(', ') : 'None';
-            const rels = f.relationships?.map(r => `${r.faction_id} (${r.status}): ${r.description}`).join('; ') || 'None';
-
-            return `${f.id}: ${f.name} (${f.type})
-  Alignment: ${f.alignment}
-  Headquarters: ${f.headquarters}
-  Description: ${f.description || 'N/A'}
-  Goals: ${goals}
-  Methods: ${f.methods || 'N/A'}
-  Leadership: ${f.leadership || 'N/A'}
-  Membership: ${f.membership || 0}
-  Resources: ${f.resources || 'N/A'}
-  Reputation: ${f.reputation || 'N/A'}
-  Members: ${members}
-  Relationships: ${rels}`;
-          }).join('\n\n');
-          contextParts.push(`FACTIONS:\n${factDetails}`);
-        }
-
-        // Religions - ALL fields
-        if (worldContext.religions?.religions?.length > 0) {
-          const relDetails = worldContext.religions.religions.map(r => {
-            const beliefs = Array.isArray(r.beliefs) ? r.beliefs.join(', ') : 'None';
-            const practices = Array.isArray(r.practices) ? r.practices.join(', ') : 'None';
-            const temples = Array.isArray(r.temples) ? r.temples.join(', ') : 'None';
-            const holyDays = Array.isArray(r.holyDays) ? r.holyDays.join(', ') : 'None';
-            const rels = r.relationships?.map(rel => `${rel.religion_id} (${rel.status}): ${rel.description}`).join('; ') || 'None';
-
-            return `${r.id}: ${r.name} (${r.type})
-  Alignment: ${r.alignment}
-  Domain: ${r.domain || 'N/A'}
-  Description: ${r.description || 'N/A'}
-  Beliefs: ${beliefs}
-  Practices: ${practices}
-  Clergy: ${r.clergy || 'N/A'}
-  Temples: ${temples}
-  Followers: ${r.followers || 0}
-  Influence: ${r.influence || 'Low'}
-  Holy Days: ${holyDays}
-  Symbols: ${r.symbols || 'N/A'}
-  Relationships: ${rels}`;
-          }).join('\n\n');
-          contextParts.push(`RELIGIONS:\n${relDetails}`);
-        }
-
-        // NPCs - ALL fields
-        if (worldContext.npcs?.npcs?.length > 0) {
-          const npcDetails = worldContext.npcs.npcs.map(n => {
-            const services = Array.isArray(n.services) ? n.services.join(', ') : 'None';
-
-            return `${n.id}: ${n.name} (${n.role})
-  Location: ${n.location}
-  Description: ${n.description || 'N/A'}
-  Personality: ${n.personality || 'N/A'}
-  Services: ${services}
-  Quest Giver: ${n.questGiver ? 'Yes' : 'No'}
-  Attitude: ${n.attitude}`;
-          }).join('\n\n');
-          contextParts.push(`NPCS:\n${npcDetails}`);
-        }
-
-        // Glossary - ALL fields
-        if (worldContext.glossary?.terms?.length > 0) {
-          const glossaryDetails = worldContext.glossary.terms.map(t =>
-            `${t.term} [${t.pronunciation || 'N/A'}] (${t.category}): ${t.definition}. Etymology: ${t.etymology || 'Unknown'}. Usage: ${t.usage || 'N/A'}`
-          ).join('\n');
-          contextParts.push(`GLOSSARY:\n${glossaryDetails}`);
-        }
-
-        // Items/Content - ALL fields
-        if (worldContext.content?.items?.length > 0) {
-          const itemDetails = worldContext.content.items.map(i =>
-            `${i.id}: ${i.name} (${i.type}, ${i.rarity})
-  Description: ${i.description || 'N/A'}
-  Properties: ${i.properties || 'None'}
-  Value: ${i.value || 0} gp
-  Weight: ${i.weight || 0} lbs
-  Requires Attunement: ${i.requiresAttunement ? 'Yes' : 'No'}`
-          ).join('\n\n');
-          contextParts.push(`ITEMS:\n${itemDetails}`);
-        }
-
+      if (worldContextText && shouldIncludeWorldContext) {
         chatMessages.push({
           role: 'system',
-          content: `You are helping plan story arcs. Here is the COMPLETE world information.
-
-        IMPORTANT: When discussing arcs, you can use character NAMES naturally in conversation, but when I ask you to generate the arc summary, you MUST use the exact IDs shown below.
+          content: `You are helping plan story arcs. Here is a directory of the world, one entry per line as "id: Name". Full details of the entities relevant to each message are provided with that message.
 
-        NAME → ID MAPPING:
-        ${worldContext.characters?.characters?.map(c => `"${c.name}" → ${c.id}`).join('\n') || ''}
+IMPORTANT: When discussing arcs, you can use character NAMES naturally in conversation, but when I ask you to generate the arc summary, you MUST use the exact IDs shown at the start of each entry.
 
-        LOCATION NAME → ID MAPPING:
-        ${worldContext.locations?.places?.map(l => `"${l.name}" → ${l.id}`).join('\n') || ''}
+${worldContextText}
 
-        [Rest of world context below]
-
-        ${contextParts.join('\n\n')}
+Remember: In conversation use names naturally, but in the arc summary use IDs!`
+        });
+      }
 
-        Remember: In conversation use names naturally, but in the arc summary use IDs!`
+      // Details of the entities this message is about, so the prompt grows with the question
+      const relevantContext = await retrieveWorldContext(currentProject, userMessage.content);
+      if (relevantContext) {
+        chatMessages.push({
+          role: 'system',
+          content: `World details relevant to the latest user message (entries are "id: Name (type) | field: value | ..."):\n\n${relevantContext}`
         });
       }
 
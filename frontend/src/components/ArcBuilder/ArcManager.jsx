@@ -1,5 +1,9 @@
 import { useState, useEffect } from 'react';
 
+// The list only needs summary fields; full arcs are fetched on selection
+const LIST_FIELDS = 'id,title,season,arcNumber,episodes,status';
+const PAGE_SIZE = 200;
+
 export default function ArcManager({ projectId }) {
   const [arcs, setArcs] = useState([]);
   const [selectedArc, setSelectedArc] = useState(null);
@@ -18,11 +22,18 @@ export default function ArcManager({ projectId }) {
 
   const loadArcs = async () => {
     try {
-      const response = await fetch(`http://localhost:5000/api/projects/${projectId}/arcs`);
-      const data = await response.json();
-      if (data.success) {
-        setArcs(data.arcs || []);
-      }
+      const loaded = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`http://localhost:5000/api/projects/${projectId}/arcs?${params}`);
+        const data = await response.json();
+        if (!data.success) break;
+        loaded.push(...(data.arcs || []));
+        cursor = data.next_cursor;
+      } while (cursor);
+      setArcs(loaded);
     } catch (error) {
       console.error('Failed to load arcs:', error);
     } finally {
@@ -45,6 +56,18 @@ export default function ArcManager({ projectId }) {
     }
   };
 
+  const selectArc = async (arcId) => {
+    try {
+      const response = await fetch(`http://localhost:5000/api/projects/${projectId}/arcs/${arcId}`);
+      const data = await response.json();
+      if (data.success) {
+        setSelectedArc(data.arc);
+      }
+    } catch (error) {
+      console.error('Failed to load arc:', error);
+    }
+  };
+
   const saveArc = async (arcData) => {
     setSaving(true);
     try {
@@ -168,7 +191,7 @@ export default function ArcManager({ projectId }) {
                 ...styles.arcCard,
                 ...(selectedArc?.id === arc.id ? styles.arcCardSelected : {})
               }}
-              onClick={() => setSelectedArc(arc)}
+              onClick={() => selectArc(arc.id)}
             >
               <div style={styles.arcHeader}>
                 <h3 style={styles.arcTitle}>{arc.title}</h3>
@@ -12,6 +12,20 @@ import Glossary from './Glossary';
 import Content from './Content';
 import styles from '../../styles/components/styles';
 
+// Entity list held by each list section and the field that identifies an
+// entry in it; these sections are saved with JSON Patch
+const LIST_FIELDS = {
+  locations: ['places', 'id'],
+  characters: ['characters', 'id'],
+  npcs: ['npcs', 'id'],
+  factions: ['factions', 'id'],
+  religions: ['religions', 'id'],
+  glossary: ['terms', 'term'],
+  content: ['items', 'id'],
+};
+
+const JSON_PATCH = { headers: { 'Content-Type': 'application/json-patch+json' } };
+
 const WorldBuilder = ({ activeSection: propActiveSection, setActiveSection: propSetActiveSection }) => {
   const { currentProject } = useProject();
   const [internalSection, setInternalSection] = useState('world_overview');
@@ -25,6 +39,13 @@ const WorldBuilder = ({ activeSection: propActiveSection, setActiveSection: prop
   const [sectionViewMode, setSectionViewMode] = useState('split');
   const [uploading, setUploading] = useState(false);
   const [uploadMessage, setUploadMessage] = useState('');
+  // Saved list items edited since the last save, as index -> the item's key
+  // when it was saved (undefined for items without one), and how many
+  // leading items of the list already exist on the server (new items are
+  // appended). Tracking by position keeps edits to the key itself, and to
+  // items with no key, from being missed.
+  const [dirtyItems, setDirtyItems] = useState(new Map());
+  const [savedCount, setSavedCount] = useState(0);
 
   const sections = [
     { id: 'world_overview', label: 'World Overview', icon: '🌍' },
@@ -69,6 +90,9 @@ const WorldBuilder = ({ activeSection: propActiveSection, setActiveSection: prop
         }
 
         setWorldData(sectionData);
+        setDirtyItems(new Map());
+        const [arrayField] = LIST_FIELDS[section] || [];
+        setSavedCount(arrayField ? (sectionData[arrayField] || []).length : 0);
       }
     } catch (error) {
       console.error('Failed to load section:', error);
@@ -82,17 +106,55 @@ const WorldBuilder = ({ activeSection: propActiveSection, setActiveSection: prop
     setSaveMessage('');
     setSaveError('');
     try {
-      await api.put(`/projects/${currentProject}/world/${activeSection}`, worldData);
+      const [arrayField, idField] = LIST_FIELDS[activeSection] || [];
+      if (arrayField) {
+        // Only send the items that changed, so a save scales with the edit
+        const items = worldData[arrayField] || [];
+        const ops = buildPatch(arrayField, idField, items);
+        if (ops.length) {
+          await api.patch(`/projects/${currentProject}/world/${activeSection}`, ops, JSON_PATCH);
+        }
+        setDirtyItems(new Map());
+        setSavedCount(items.length);
+      } else {
+        await api.put(`/projects/${currentProject}/world/${activeSection}`, worldData);
+      }
       setSaveMessage('Saved successfully');
       setTimeout(() => setSaveMessage(''), 3000);
     } catch (error) {
-      setSaveError('Failed to save: ' + (error.message || 'unknown error'));
+      const conflict = error.response && error.response.status === 409;
+      setSaveError(conflict
+        ? 'Failed to save: this section was changed elsewhere, reload it and try again'
+        : 'Failed to save: ' + (error.message || 'unknown error'));
       setTimeout(() => setSaveError(''), 5000);
     } finally {
       setSaving(false);
     }
   };
 
+  // JSON Patch for unsaved list edits; each replace first checks the item
+  // at that index still has the key it had when we loaded it
+  const buildPatch = (arrayField, idField, items) => {
+    const ops = [];
+    items.forEach((item, index) => {
+      if (index >= savedCount) {
+        ops.push({ op: 'add', path: `/${arrayField}/-`, value: item });
+      } else if (dirtyItems.has(index)) {
+        const savedKey = dirtyItems.get(index);
+        if (savedKey !== undefined) {
+          ops.push({ op: 'test', path: `/${arrayField}/${index}/${idField}`, value: savedKey });
+        }
+        ops.push({ op: 'replace', path: `/${arrayField}/${index}`, value: item });
+      }
+    });
+    return ops;
+  };
+
+  const idFieldOf = (arrayField) => {
+    const entry = Object.values(LIST_FIELDS).find(([field]) => field === arrayField);
+    return entry ? entry[1] : 'id';
+  };
+
   const updateField = (field, value) => {
     setWorldData({ ...worldData, [field]: value });
   };
@@ -137,28 +199,50 @@ const WorldBuilder = ({ activeSection: propActiveSection, setActiveSection: prop
     }
 
     setWorldData({ ...worldData, [arrayField]: items });
+    if (index < savedCount && !dirtyItems.has(index)) {
+      setDirtyItems(new Map(dirtyItems).set(index, orig[idFieldOf(arrayField)]));
+    }
   };
 
   const removeItem = async (arrayField, index) => {
     const items = [...(worldData[arrayField] || [])];
-    items.splice(index, 1);
+    const [removed] = items.splice(index, 1);
     const newData = { ...worldData, [arrayField]: items };
 
     // optimistic update
     setWorldData(newData);
 
+    // an item that was never saved only exists locally
+    if (index >= savedCount) return;
+
+    // unsaved edits to later items move down with them
+    const idField = idFieldOf(arrayField);
+    const savedKey = dirtyItems.has(index) ? dirtyItems.get(index) : (removed || {})[idField];
+    const previousDirty = dirtyItems;
+    const shifted = new Map();
+    dirtyItems.forEach((key, i) => {
+      if (i !== index) shifted.set(i > index ? i - 1 : i, key);
+    });
+    setDirtyItems(shifted);
+
     // persist change immediately
     setSaving(true);
     setSaveError('');
     setSaveMessage('Deleting...');
     try {
-      await api.put(`/projects/${currentProject}/world/${activeSection}`, newData);
+      const ops = [{ op: 'remove', path: `/${arrayField}/${index}` }];
+      if (savedKey !== undefined) {
+        ops.unshift({ op: 'test', path: `/${arrayField}/${index}/${idField}`, value: savedKey });
+      }
+      await api.patch(`/projects/${currentProject}/world/${activeSection}`, ops, JSON_PATCH);
+      setSavedCount((count) => count - 1);
       setSaveMessage('Deleted');
       setTimeout(() => setSaveMessage(''), 2000);
     } catch (err) {
       // revert optimistic update
       const reverted = { ...worldData, [arrayField]: [...(worldData[arrayField] || [])] };
       setWorldData(reverted);
+      setDirtyItems(previousDirty);
       setSaveError('Failed to delete: ' + (err.message || 'unknown error'));
       setTimeout(() => setSaveError(''), 5000);
     } finally {